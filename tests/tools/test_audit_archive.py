@@ -0,0 +1,40 @@
+"""Unit tests for the content-addressed audit report archive."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from tools.audit_archive import ReportArchive, split_chunks
+
+
+def _report(path: Path, fixed: int) -> Path:
+    issues = [{"rule_id": "task-fqcn", "path": f"web/m{i}/playbook.yml", "key": f"play[0]/tasks[{i}]"}
+              for i in range(fixed, 2000)]
+    path.write_text(json.dumps({"audit_date": f"2026-10-0{fixed + 1}", "issues": issues}, indent=2), encoding="utf-8")
+    return path
+
+
+def test_split_chunks_resynchronizes_after_an_edit() -> None:
+    """Test that content-defined chunk boundaries survive removed lines."""
+    data = b"".join(f"line {i}\n".encode() for i in range(5000))
+    edited = data.replace(b"line 10\n", b"")
+    original, changed = list(split_chunks(data)), list(split_chunks(edited))
+
+    assert b"".join(original) == data
+    assert len(set(original) - set(changed)) == 1
+
+
+def test_consecutive_reports_share_chunks_and_restore_exactly(tmp_path: Path) -> None:
+    """Test deduplication, byte-exact restore and garbage collection."""
+    archive = ReportArchive(tmp_path / "archive")
+    first = archive.add(_report(tmp_path / "audit_20261001_090000.json", 0))
+    second = archive.add(_report(tmp_path / "audit_20261002_090000.json", 1))
+
+    assert second["stored_bytes"] * 10 < first["stored_bytes"]
+    assert archive.read("audit_20261002_090000.json") == (tmp_path / "audit_20261002_090000.json").read_bytes()
+    assert archive.names() == ["audit_20261001_090000.json", "audit_20261002_090000.json"]
+
+    before = archive.usage()["objects"]
+    archive.remove("audit_20261001_090000.json")
+    assert 0 < archive.gc() < before
+    assert archive.read("audit_20261002_090000.json") == (tmp_path / "audit_20261002_090000.json").read_bytes()
@@ -0,0 +1,130 @@
+"""Unit tests for audit issue fingerprints and the baseline file."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from tools.audit_baseline import Baseline, fingerprint, normalize_path
+from tools.comprehensive_audit import ComprehensiveAuditor
+
+
+def _write_module(root: Path, task_name: str = "Copy file") -> Path:
+    module = root / "files" / "copy"
+    module.mkdir(parents=True, exist_ok=True)
+    playbook = module / "playbook.yml"
+    playbook.write_text(
+        "- hosts: all\n"
+        "  gather_facts: false\n"
+        "  tasks:\n"
+        f"    - name: {task_name}\n"
+        "      ansible.builtin.copy:\n"
+        "        src: a\n"
+        "        dest: b\n",
+        encoding="utf-8",
+    )
+    return playbook
+
+
+def _audit(root: Path, baseline: Baseline | None = None, new_only: bool = False) -> dict:
+    auditor = ComprehensiveAuditor(str(root), baseline=baseline, new_only=new_only)
+    auditor.check_file_contents()
+    return auditor.generate_report()
+
+
+def test_fingerprints_ignore_checkout_location_and_wording(tmp_path: Path) -> None:
+    """Test that fingerprints depend only on rule id, relative path and node key."""
+    for checkout in ("a", "b"):
+        _write_module(tmp_path / checkout)
+    first = _audit(tmp_path / "a")
+    second = _audit(tmp_path / "b")
+
+    issue = first["issues"]["low"][0]
+    assert issue["rule_id"] == "task-chinese-name"
+    assert issue["path"] == "files/copy/playbook.yml"
+    assert issue["key"] == "play[0]/tasks[Copy file]"
+    assert issue["fingerprint"] == fingerprint("task-chinese-name", issue["path"], issue["key"])
+    assert [i["fingerprint"] for i in second["issues"]["low"]] == [issue["fingerprint"]]
+    assert normalize_path(tmp_path / "a" / "x.yml", tmp_path / "a") == "x.yml"
+
+
+def test_baseline_round_trip_suppresses_known_issues(tmp_path: Path) -> None:
+    """Test --update-baseline followed by a new-only run."""
+    _write_module(tmp_path)
+    baseline_path = tmp_path / "metadata" / "audit_baseline.json"
+    auditor = ComprehensiveAuditor(str(tmp_path), baseline=Baseline(), update_baseline=True)
+    auditor.check_file_contents()
+    assert auditor.save_baseline(baseline_path) == 1
+
+    baseline = Baseline.load(baseline_path)
+    assert len(baseline) == 1
+    assert _audit(tmp_path, baseline, new_only=True)["summary"]["total_issues"] == 0
+
+    # A second English task is new; the known one stays suppressed
+    playbook = tmp_path / "files" / "copy" / "playbook.yml"
+    playbook.write_text(
+        playbook.read_text(encoding="utf-8")
+        + "    - name: Restart app\n      ansible.builtin.debug:\n        msg: hi\n",
+        encoding="utf-8",
+    )
+    report = _audit(tmp_path, baseline, new_only=True)
+    assert [i["description"] for i in report["issues"]["low"]] == [
+        f'任务名称不是中文: "Restart app" in {playbook}'
+    ]
+    assert report["baseline"]["suppressed"]["low"] == 1
+
+    # Without --new-only every issue is listed, with the split recorded
+    full = _audit(tmp_path, baseline)
+    assert full["summary"]["low_issues"] == 2
+    assert full["baseline"]["new"]["low"] == 1
+
+
+def test_same_named_tasks_have_distinct_fingerprints(tmp_path: Path) -> None:
+    """Test that a new finding on a repeated task name is not hidden by the first one's baseline entry."""
+    playbook = _write_module(tmp_path)
+    baseline_path = tmp_path / "metadata" / "audit_baseline.json"
+    auditor = ComprehensiveAuditor(str(tmp_path), baseline=Baseline(), update_baseline=True)
+    auditor.check_file_contents()
+    auditor.save_baseline(baseline_path)
+
+    playbook.write_text(
+        playbook.read_text(encoding="utf-8")
+        + "    - name: Copy file\n      ansible.builtin.copy:\n        src: c\n        dest: d\n",
+        encoding="utf-8",
+    )
+    report = _audit(tmp_path, Baseline.load(baseline_path), new_only=True)
+    assert [i["key"] for i in report["issues"]["low"]] == ["play[0]/tasks[Copy file]@2"]
+    assert report["baseline"]["suppressed"]["low"] == 1
+
+
+def test_baseline_reports_fixed_issues_and_tolerates_missing_file(tmp_path: Path) -> None:
+    """Test the fixed count and an absent baseline file."""
+    assert len(Baseline.load(tmp_path / "missing.json")) == 0
+
+    _write_module(tmp_path, task_name="复制文件")
+    report = _audit(tmp_path, Baseline(["0123456789abcdef"]))
+    assert report["summary"]["total_issues"] == 0
+    assert report["baseline"]["fixed"] == 1
+
+    # Without --update-baseline only the baseline fingerprints seen again are kept
+    _write_module(tmp_path)
+    known = fingerprint("task-chinese-name", "files/copy/playbook.yml", "play[0]/tasks[Copy file]")
+    auditor = ComprehensiveAuditor(str(tmp_path), baseline=Baseline([known, "0123456789abcdef"]), new_only=True)
+    auditor.check_file_contents()
+    assert auditor.generate_report()["baseline"]["fixed"] == 1
+    assert auditor.baseline_entries is None and auditor.seen_known == {known}
+
+
+def test_hidden_directories_are_not_audited_or_baselined(tmp_path: Path) -> None:
+    """Test that local tool directories such as .pytest_cache never reach the baseline."""
+    _write_module(tmp_path)
+    (tmp_path / ".pytest_cache").mkdir()
+    (tmp_path / ".pytest_cache" / "README.md").write_text("# pytest cache directory\n" + "words " * 20, encoding="utf-8")
+
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    auditor.check_file_contents()
+    assert auditor.stats["total_readmes"] == 0
+
+    baseline = tmp_path / "baseline.json"
+    entries = [("a" * 16, "low", "readme-language", ".pytest_cache/README.md", ""),
+               ("b" * 16, "low", "task-fqcn", "files/copy/playbook.yml", "k")]
+    assert Baseline.save(baseline, entries) == 1
+    assert Baseline.load(baseline).fingerprints == {"b" * 16}
@@ -0,0 +1,112 @@
+"""Unit tests for the per-file audit finding cache."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from tools import audit_rules, comprehensive_audit
+from tools.audit_cache import FindingCache, content_hash, file_hash, rule_version
+from tools.comprehensive_audit import ComprehensiveAuditor, cache_engine_version
+from tools.secret_scanner import MMAP_THRESHOLD, SecretScanner
+
+PLAYBOOK = """\
+- hosts: all
+  gather_facts: false
+  tasks:
+    - name: Copy file
+      copy:
+        src: a
+        dest: b
+      notify: 重启服务
+"""
+
+
+def _audit(root: Path) -> tuple[ComprehensiveAuditor, dict]:
+    cache = FindingCache(root / ".cache" / "audit_findings.json", root, cache_engine_version())
+    auditor = ComprehensiveAuditor(str(root), cache=cache)
+    auditor.check_file_contents()
+    auditor.check_security()
+    auditor.check_handler_graph()
+    cache.save()
+    return auditor, auditor.generate_report()
+
+
+def _findings(report: dict) -> list[tuple[str, str]]:
+    return [(p, i["fingerprint"]) for p, issues in report["issues"].items() for i in issues]
+
+
+def test_unchanged_files_are_replayed_without_parsing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a warm run gives the same issues, stats and handler graph."""
+    module = tmp_path / "files" / "copy"
+    (module / "vars").mkdir(parents=True)
+    (module / "playbook.yml").write_text(PLAYBOOK, encoding="utf-8")
+    (module / "vars" / "example_vars.yml").write_text('db_password: "R3alPassw0rd!x"\n', encoding="utf-8")
+    _, cold = _audit(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged file was parsed")
+
+    monkeypatch.setattr(comprehensive_audit.yaml, "safe_load", fail)
+    auditor, warm = _audit(tmp_path)
+
+    assert _findings(warm) == _findings(cold)
+    assert {i["rule_id"] for i in warm["issues"]["high"]} == {"notify-missing-handler"}
+    assert warm["statistics"] == cold["statistics"]
+    assert warm["cache"]["misses"] == 0
+    assert auditor.rule_engine.calls == {}
+
+
+def test_changed_rule_invalidates_only_its_results(tmp_path: Path) -> None:
+    """Test that a rule version change re-runs that rule alone."""
+    module = tmp_path / "files" / "copy"
+    module.mkdir(parents=True)
+    (module / "playbook.yml").write_text(PLAYBOOK, encoding="utf-8")
+    _, cold = _audit(tmp_path)
+
+    cache_path = tmp_path / ".cache" / "audit_findings.json"
+    cache = FindingCache(cache_path, tmp_path, cache_engine_version())
+    cache.files["files/copy/playbook.yml"]["rules"]["task-fqcn"]["version"] = "outdated"
+    cache.save()
+    auditor, warm = _audit(tmp_path)
+
+    assert set(auditor.rule_engine.calls) == {"task-fqcn"}
+    assert sorted(_findings(warm)) == sorted(_findings(cold))
+
+    # Editing the file invalidates every rule for it
+    (module / "playbook.yml").write_text(PLAYBOOK.replace("Copy file", "复制文件"), encoding="utf-8")
+    auditor, edited = _audit(tmp_path)
+    assert "task-chinese-name" in auditor.rule_engine.calls
+    assert "task-chinese-name" not in {i["rule_id"] for i in edited["issues"]["low"]}
+
+
+def test_rule_version_tracks_referenced_constants(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that changing a constant a rule uses changes only that rule's version."""
+    rules = {rule.rule_id: rule for rule in audit_rules.DEFAULT_RULES.rules}
+    before = {rule_id: rule_version(rule) for rule_id, rule in rules.items()}
+
+    monkeypatch.setattr(audit_rules, "TECH_WORDS", audit_rules.TECH_WORDS | {"terraform"})
+    after = {rule_id: rule_version(rule) for rule_id, rule in rules.items()}
+
+    assert [rule_id for rule_id in rules if before[rule_id] != after[rule_id]] == ["readme-language"]
+
+
+def test_secret_scan_streams_large_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the secrets pass hashes in chunks and scans through scan_file."""
+    vars_file = tmp_path / "files" / "copy" / "vars" / "example_vars.yml"
+    vars_file.parent.mkdir(parents=True)
+    content = b"# filler\n" * (MMAP_THRESHOLD // 9) + b'db_password: "R3alPassw0rd!x"\n'
+    vars_file.write_bytes(content)
+    assert file_hash(vars_file) == content_hash(content)
+
+    scanned = []
+    original_scan_file = SecretScanner.scan_file
+    monkeypatch.setattr(SecretScanner, "scan_text", lambda *args: pytest.fail("file was scanned from memory"))
+    monkeypatch.setattr(SecretScanner, "scan_file",
+                        lambda self, path: scanned.append(path) or original_scan_file(self, path))
+    _, cold = _audit(tmp_path)
+    _, warm = _audit(tmp_path)
+
+    assert scanned == [vars_file]
+    assert cold["statistics"]["potential_hardcoded_secrets"] == 1
+    assert _findings(warm) == _findings(cold)
@@ -0,0 +1,87 @@
+"""Unit tests for the cached per-file audit feature vectors."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from tools import audit_features
+from tools.audit_features import DEFAULT_FEATURE_CACHE, FeatureCache, PlaybookFeatures, VarsFeatures, playbook_features
+from tools.audit_report import AuditCollector
+
+PLAYBOOK = """\
+- hosts: all
+  gather_facts: false
+  vars:
+    db_password: "{{ vault_db_password }}"
+  tasks:
+    - name: 复制文件
+      ansible.builtin.copy:
+        src: a
+        dest: b
+"""
+
+
+def test_playbook_features() -> None:
+    """Test the extracted flags and counts."""
+    features = playbook_features(PLAYBOOK)
+    assert features.gather_facts and features.vault_vars and features.fqcn and features.sensitive
+    assert not features.check_mode and not features.no_log
+    assert features.chinese_names == 1
+    assert not features.has_chinese_names
+    # Sensitive patterns only matter without no_log, so they are not searched for
+    assert not playbook_features(PLAYBOOK + "      no_log: true\n").sensitive
+
+
+def test_unchanged_files_reuse_cached_features(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a warm scan gives the same stats and issues without extracting."""
+    module = tmp_path / "files" / "copy"
+    (module / "vars").mkdir(parents=True)
+    (module / "playbook.yml").write_text(PLAYBOOK, encoding="utf-8")
+    (module / "vars" / "example_vars.yml").write_text("# ⚠️ 示例\napp_port: 8080\n", encoding="utf-8")
+    cold = AuditCollector(tmp_path)
+    cold.scan(run_tests=False)
+    assert cold.feature_cache.misses == 2
+
+    def fail(content: str):
+        raise AssertionError("unchanged file was re-scanned")
+
+    with monkeypatch.context() as patch:
+        patch.setitem(audit_features.EXTRACTORS, "playbook", (fail, PlaybookFeatures))
+        patch.setitem(audit_features.EXTRACTORS, "vars", (fail, VarsFeatures))
+        warm = AuditCollector(tmp_path)
+        warm.scan(run_tests=False)
+    assert warm.feature_cache.hits == 2
+    assert warm.stats == cold.stats
+    assert warm.issues == cold.issues
+
+    # A stale entry is detected by content hash
+    cache = FeatureCache(tmp_path / DEFAULT_FEATURE_CACHE, tmp_path)
+    (module / "playbook.yml").write_text(PLAYBOOK + "      no_log: true\n", encoding="utf-8")
+    edited = AuditCollector(tmp_path)
+    edited.scan(run_tests=False)
+    assert edited.feature_cache.misses == 1
+    assert edited.stats["playbooks_with_no_log"] == 1
+    assert "files/copy/playbook.yml" in cache.files
+
+
+def test_parallel_scan_matches_sequential_scan(tmp_path: Path) -> None:
+    """Test that per-category workers merge into the same ordered results."""
+    for category in ("web", "database", "files"):
+        for module in ("b", "a"):
+            (tmp_path / category / module / "vars").mkdir(parents=True)
+            (tmp_path / category / module / "playbook.yml").write_text(PLAYBOOK, encoding="utf-8")
+            (tmp_path / category / module / "vars" / "example_vars.yml").write_text("a: 1\n", encoding="utf-8")
+    (tmp_path / "web" / "a" / "playbook.yml").write_bytes(b"\xff\xfe")
+
+    sequential = AuditCollector(tmp_path)
+    sequential.scan(run_tests=False)
+    (tmp_path / DEFAULT_FEATURE_CACHE).unlink()
+    parallel = AuditCollector(tmp_path, jobs=3)
+    parallel.scan(run_tests=False)
+
+    assert parallel.feature_cache.misses == 12
+    assert list(parallel.categories) == ["database", "files", "web"]
+    assert parallel.issues == sequential.issues
+    assert parallel.stats == sequential.stats
+    assert parallel.issues["medium"][-1]["issue"].startswith("Failed to read playbook:")
@@ -0,0 +1,183 @@
+"""Unit tests for the audit rule engine used by comprehensive_audit.py."""
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from tools import audit_rules
+from tools.comprehensive_audit import ComprehensiveAuditor
+
+
+def _context(path: str = "playbook.yml") -> tuple[audit_rules.FileContext, list]:
+    issues: list = []
+    ctx = audit_rules.FileContext(
+        path=Path(path),
+        add_issue=lambda priority, description, *fingerprint: issues.append((priority, description)),
+        stats=defaultdict(int),
+    )
+    return ctx, issues
+
+
+def test_engine_walks_each_node_once_in_order() -> None:
+    """Test that rules receive only their node types, in walk order."""
+    registry = audit_rules.RuleRegistry()
+    seen: list = []
+
+    @registry.rule("plays", "play")
+    def plays(node, ctx):
+        seen.append(("play", node["name"]))
+
+    @registry.rule("tasks-and-handlers", "task", "handler")
+    def tasks(node, ctx):
+        seen.append(("node", node["name"]))
+
+    engine = audit_rules.RuleEngine(registry)
+    ctx, _ = _context()
+    engine.visit_playbook(
+        [
+            {
+                "name": "p1",
+                "pre_tasks": [{"name": "pre"}],
+                "tasks": [{"name": "t1"}, "not a task"],
+                "post_tasks": None,
+                "handlers": [{"name": "h1"}],
+            },
+            "not a play",
+        ],
+        ctx,
+    )
+
+    assert seen == [("play", "p1"), ("node", "t1"), ("node", "pre"), ("node", "h1")]
+    assert engine.calls == {"plays": 1, "tasks-and-handlers": 3}
+    assert set(engine.timing_report()) == {"plays", "tasks-and-handlers"}
+
+
+def test_registry_rejects_unknown_node_types_and_duplicate_ids() -> None:
+    """Test rule registration validation."""
+    registry = audit_rules.RuleRegistry()
+    registry.rule("one", "task")(lambda node, ctx: None)
+
+    with pytest.raises(ValueError):
+        registry.rule("two", "inventory")(lambda node, ctx: None)
+    with pytest.raises(ValueError):
+        registry.rule("one", "play")(lambda node, ctx: None)
+
+
+@pytest.mark.parametrize(
+    "task",
+    [
+        {"name": "创建用户", "ansible.builtin.user": {"name": "app", "password": "{{ vault_pw }}"}},
+        {"name": "安装", "ansible.builtin.apt": {"name": ["curl", "gnupg"]}, "vars": {"apt_key": 1}},
+        {"name": "读取", "ansible.builtin.slurp": {"src": "/etc/ssh/ssh_host_rsa_KEY"}},
+        {"name": "普通任务", "ansible.builtin.debug": {"msg": "hello", "verbosity": 1}},
+        {"name": "已保护", "ansible.builtin.uri": {"url_password": "x"}, "no_log": True},
+    ],
+)
+def test_no_log_rule_matches_stringified_task(task: dict) -> None:
+    """Test that the short-circuit walk flags the same tasks as str(task)."""
+    ctx, issues = _context()
+    audit_rules.check_task_no_log(task, ctx)
+
+    expected = (
+        any(keyword in str(task).lower() for keyword in audit_rules.SENSITIVE_KEYWORDS)
+        and not task.get("no_log")
+    )
+    assert bool(issues) == expected
+
+
+def test_auditor_reports_rule_findings_and_timings(tmp_path: Path) -> None:
+    """Test the auditor end to end on a small module tree."""
+    module = tmp_path / "files" / "copy"
+    (module / "vars").mkdir(parents=True)
+    (module / "playbook.yml").write_text(
+        "- hosts: all\n"
+        "  tasks:\n"
+        "    - name: Copy file\n"
+        "      copy:\n"
+        "        src: a\n"
+        "        dest: b\n"
+        "  handlers:\n"
+        "    - name: restart app\n"
+        "      ansible.builtin.service:\n"
+        "        name: app\n",
+        encoding="utf-8",
+    )
+    (module / "vars" / "example_vars.yml").write_text("copy_dest: /tmp\n", encoding="utf-8")
+    (module / "README.md").write_text("# 复制\n\n说明\n", encoding="utf-8")
+
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    auditor.check_file_contents()
+    report = auditor.generate_report()
+
+    descriptions = [
+        issue["description"] for issues in report["issues"].values() for issue in issues
+    ]
+    playbook = module / "playbook.yml"
+    assert f"缺少 gather_facts 声明: {playbook}" in descriptions
+    assert f"模块未使用 FQCN: copy in {playbook}" in descriptions
+    assert f'任务名称不是中文: "Copy file" in {playbook}' in descriptions
+    assert f'Handler 名称不是中文: "restart app" in {playbook}' in descriptions
+    assert f"变量文件缺少警告头: {module / 'vars' / 'example_vars.yml'}" in descriptions
+    assert report["statistics"]["total_playbooks"] == 1
+    assert report["rule_timings"]["task-fqcn"]["calls"] == 1
+
+
+def test_time_budget_samples_then_skips_expensive_checks() -> None:
+    """Test sampling after the deadline and skipping past the hard limit."""
+    now = [0.0]
+    budget = audit_rules.TimeBudget(max_seconds=10, sample_every=3, clock=lambda: now[0])
+    assert all(budget.allow("secrets") for _ in range(5))
+    assert not budget.partial
+
+    now[0] = 10.0
+    assert [budget.allow("secrets") for _ in range(6)] == [True, False, False, True, False, False]
+    now[0] = 15.0
+    assert not budget.allow("secrets")
+    assert budget.partial
+    assert budget.report()["skipped"] == {"secrets": 5}
+    assert budget.report()["sampled"] == {"secrets": 2}
+
+
+def test_rule_budget_disables_slow_rules() -> None:
+    """Test that a rule over its cumulative budget stops receiving nodes."""
+    registry = audit_rules.RuleRegistry()
+    calls: list = []
+
+    @registry.rule("slow", "task")
+    def slow(node, ctx):
+        calls.append(node["name"])
+        time.sleep(0.002)
+
+    engine = audit_rules.RuleEngine(registry, rule_budget=0.001)
+    ctx, _ = _context()
+    engine.visit_playbook([{"tasks": [{"name": "a"}, {"name": "b"}, {"name": "c"}]}], ctx)
+
+    assert calls == ["a"]
+    assert engine.budget.disabled_rules == ["slow"]
+    assert engine.budget.skipped == {"slow": 2}
+
+
+def test_auditor_marks_report_partial_when_budget_is_exhausted(tmp_path: Path) -> None:
+    """Test that structural checks still complete and only the expensive passes are cut."""
+    module = tmp_path / "files" / "copy"
+    module.mkdir(parents=True)
+    (module / "playbook.yml").write_text(
+        "- hosts: all\n  tasks:\n"
+        "    - name: 复制文件\n      copy: {src: a, dest: b}\n      notify: 重启服务\n"
+        "    - name: 设置密码\n      ansible.builtin.set_fact:\n        db_password: x\n",
+        encoding="utf-8",
+    )
+    (module / "README.md").write_text("# Copy\n\nEnglish only text.\n", encoding="utf-8")
+
+    auditor = ComprehensiveAuditor(str(tmp_path), max_seconds=0)
+    report = auditor.run_audit()
+
+    assert report["summary"]["partial"] is True
+    assert set(report["budget"]["skipped"]) <= {"secrets", "readme-language"}
+    assert set(report["budget"]["sampled"]) <= {"secrets", "readme-language"}
+    rule_ids = {issue["rule_id"] for issues in report["issues"].values() for issue in issues}
+    assert {"gather-facts", "task-fqcn", "task-no-log", "notify-missing-handler"} <= rule_ids
+    assert any("缺失文件: vars/example_vars.yml" in issue["description"] for issue in report["issues"]["high"])
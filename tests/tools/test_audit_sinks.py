@@ -0,0 +1,80 @@
+"""Unit tests for the streaming NDJSON and SARIF audit outputs."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from tools.audit_baseline import Baseline
+from tools.audit_sinks import NdjsonSink, SarifSink
+from tools.comprehensive_audit import ComprehensiveAuditor
+
+
+def _write_module(root: Path) -> None:
+    module = root / "files" / "copy"
+    module.mkdir(parents=True)
+    (module / "playbook.yml").write_text(
+        "- hosts: all\n"
+        "  tasks:\n"
+        "    - name: Copy file\n"
+        "      copy:\n"
+        "        src: a\n"
+        "        dest: b\n",
+        encoding="utf-8",
+    )
+
+
+def test_sinks_receive_issues_as_they_are_added(tmp_path: Path) -> None:
+    """Test that each issue is written immediately, in order, to both formats."""
+    _write_module(tmp_path)
+    ndjson = NdjsonSink(tmp_path / "out" / "audit.ndjson")
+    sarif = SarifSink(tmp_path / "out" / "audit.sarif", {"task-fqcn": "任务应使用 FQCN 模块名"})
+    auditor = ComprehensiveAuditor(str(tmp_path), sinks=[ndjson, sarif], keep_issues=False)
+
+    auditor.check_file_contents()
+    ndjson.file.flush()
+    lines = (tmp_path / "out" / "audit.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["rule_id"] for line in lines] == [
+        "gather-facts",
+        "task-fqcn",
+        "task-chinese-name",
+    ]
+    assert auditor.issues["low"] == []  # nothing retained in memory
+
+    ndjson.close()
+    sarif.close()
+    sarif.close()  # closing twice is harmless
+
+    log = json.loads((tmp_path / "out" / "audit.sarif").read_text(encoding="utf-8"))
+    run = log["runs"][0]
+    assert log["version"] == "2.1.0"
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == [
+        "gather-facts",
+        "task-fqcn",
+        "task-chinese-name",
+    ]
+    assert run["tool"]["driver"]["rules"][1]["shortDescription"]["text"] == "任务应使用 FQCN 模块名"
+    result = run["results"][1]
+    assert result["level"] == "note"
+    assert result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == "files/copy/playbook.yml"
+    assert result["partialFingerprints"]["auditFingerprint/v1"] == json.loads(lines[1])["fingerprint"]
+
+
+def test_summary_only_report_counts_without_issue_lists(tmp_path: Path) -> None:
+    """Test summary-only mode together with a baseline."""
+    _write_module(tmp_path)
+    sink = SarifSink(tmp_path / "audit.sarif")
+    known = ComprehensiveAuditor(str(tmp_path), baseline=Baseline(), update_baseline=True)
+    known.check_file_contents()
+    baseline = Baseline(list(known.baseline_entries)[:1])
+
+    auditor = ComprehensiveAuditor(str(tmp_path), baseline=baseline, sinks=[sink], keep_issues=False)
+    auditor.check_file_contents()
+    sink.close()
+    report = auditor.generate_report()
+
+    assert "issues" not in report
+    assert report["summary"]["summary_only"] is True
+    assert report["summary"]["total_issues"] == 3
+    assert sum(report["baseline"]["new"].values()) == 2
+    states = [r["baselineState"] for r in json.loads((tmp_path / "audit.sarif").read_text(encoding="utf-8"))["runs"][0]["results"]]
+    assert sorted(states) == ["new", "new", "unchanged"]
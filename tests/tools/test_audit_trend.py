@@ -0,0 +1,123 @@
+"""Unit tests for the SQLite audit trend store."""
+from __future__ import annotations
+
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from tools.audit_archive import ReportArchive
+from tools.audit_trend import RetentionPolicy, Thresholds, TrendStore, apply_retention, main
+
+
+def _report(date: str, high: int, fqcn: int = 3) -> dict:
+    issues = {
+        "critical": [],
+        "high": [{"rule_id": "notify-missing-handler"}] * high,
+        "medium": [],
+        "low": [{"rule_id": "task-fqcn"}] * fqcn,
+    }
+    return {
+        "audit_date": date,
+        "summary": {
+            "critical_issues": 0,
+            "high_issues": high,
+            "medium_issues": 0,
+            "low_issues": fqcn,
+            "total_issues": high + fqcn,
+        },
+        "issues": issues,
+    }
+
+
+def test_delta_moving_average_and_rule_history() -> None:
+    """Test trend queries over several ingested reports."""
+    with TrendStore(":memory:") as store:
+        for day, high in enumerate((10, 20, 30, 5), start=1):
+            run = store.ingest(_report(f"2026-10-0{day}T09:00:00", high))
+        # Re-ingesting the same report is a no-op
+        assert store.ingest(_report("2026-10-04T09:00:00", 5)) == run
+
+        assert store.delta(run) == {"critical": 0, "high": -25, "medium": 0, "low": 0, "total": -25}
+        assert store.rule_deltas(run) == {"notify-missing-handler": -25}
+        assert [average for _, average in store.moving_averages(window=2, limit=3)] == [18.0, 28.0, 20.5]
+        assert store.average_before(run, 3) == 23.0
+        assert store.rule_history("task-fqcn", limit=2) == [
+            ("2026-10-03T09:00:00", 3),
+            ("2026-10-04T09:00:00", 3),
+        ]
+
+
+def test_alert_thresholds_are_configurable(tmp_path: Path) -> None:
+    """Test default and file-configured alert thresholds."""
+    config = tmp_path / "thresholds.yml"
+    config.write_text("high: 100\nrule_increase: 5\naverage_increase: 0.5\naverage_window: 2\n", encoding="utf-8")
+    thresholds = Thresholds.load(config)
+
+    with TrendStore(":memory:") as store:
+        store.ingest(_report("2026-10-01T09:00:00", 10))
+        run = store.ingest(_report("2026-10-02T09:00:00", 60, fqcn=4))
+
+        assert store.check_alerts(run, Thresholds()) == [
+            "High 级别问题超过 50 个（当前 60）",
+            "问题总数增加超过 20 个（+51）",
+        ]
+        assert store.check_alerts(run, thresholds) == [
+            "问题总数增加超过 20 个（+51）",
+            "规则 notify-missing-handler 的问题增加 50 个",
+            "问题总数 64 超过最近 2 次平均值 13.0 的 50% 以上",
+        ]
+
+
+def test_cli_imports_legacy_csv_and_ingests_report(tmp_path: Path, capsys) -> None:
+    """Test the monitor workflow: legacy CSV import, ingest, summary and exit status."""
+    db = tmp_path / "trend.sqlite3"
+    legacy = tmp_path / "audit_trend.csv"
+    legacy.write_text("timestamp,critical,high,medium,low,total\n20261001_090000,1,70,0,0,71\n", encoding="utf-8")
+    report = tmp_path / "audit.json"
+    report.write_text(json.dumps(_report("2026-10-02T09:00:00", 40)), encoding="utf-8")
+    summary = tmp_path / "daily.md"
+
+    assert main(["--db", str(db), "import-csv", str(legacy)]) == 0
+    assert main(["--db", str(db), "ingest", str(report), "--daily-summary", str(summary)]) == 0
+    output = capsys.readouterr().out
+    assert "✅ Critical: -1 (改善)" in output
+    assert "**20/100**" in summary.read_text(encoding="utf-8")
+
+    with TrendStore(db) as store:
+        assert [run.high for run in store.runs()] == [70, 40]
+        assert list(store.recent_alerts()) == []
+
+
+def test_retention_archives_reports_and_downsamples_runs(tmp_path: Path) -> None:
+    """Test the retention policy: archive old reports, runs -> days -> weeks."""
+    history = tmp_path / "history"
+    history.mkdir()
+    old_report = history / "audit_20260901_090000.json"
+    old_report.write_text("{}\n", encoding="utf-8")
+    recent_report = history / "audit_20261018_090000.json"
+    recent_report.write_text("{}\n", encoding="utf-8")
+
+    with TrendStore(history / "trend.sqlite3") as store:
+        # Two runs on Monday 2026-08-31, one on Tuesday, one recent
+        store.ingest(_report("2026-08-31T09:00:00", 10))
+        store.ingest(_report("2026-08-31T18:00:00", 20))
+        store.ingest(_report("2026-09-01T09:00:00", 40, fqcn=0))
+        store.ingest(_report("2026-10-18T09:00:00", 5))
+
+        policy = RetentionPolicy(full_days=30, daily_days=30, archive_days=None)
+        stats = apply_retention(store, history, policy, today=date(2026, 10, 19))
+
+        assert stats["archived_reports"] == 1
+        assert stats["downsampled_runs"] == 3
+        assert not old_report.exists() and recent_report.exists()
+        assert ReportArchive(history / "archive").read(old_report.name) == b"{}\n"
+
+        week, run = store.history()
+        assert (week.period, week.start, week.runs, week.max_total) == ("week", "2026-08-31", 3, 40)
+        assert week.high == pytest.approx(70 / 3)
+        assert store.summary_rule_counts("week", "2026-08-31") == pytest.approx(
+            {"notify-missing-handler": 70 / 3, "task-fqcn": 2.0})
+        assert (run.period, run.total) == ("run", 8)
+        assert store.latest().high == 5
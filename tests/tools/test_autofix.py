@@ -0,0 +1,86 @@
+"""Unit tests for the rule-driven autofix engine."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import yaml
+
+from tools.audit_rules import VARS_WARNING_PATTERN
+from tools.autofix import fix_text, main
+
+PLAYBOOK = """\
+---
+- hosts: all  # 目标主机
+  gather_facts: false
+  tasks:
+    - name: 复制文件
+      copy:  # 保留注释
+        src: a
+        dest: {{ dest_dir }}
+        mode: {{ mode }}/x
+    - name: 显示示例
+      debug:
+        msg: |
+          force: {{ not_yaml }}
+    - block:
+        - name: 执行命令
+          shell: echo {{ value }}
+          community.general.ufw:
+            rule: allow
+"""
+
+
+def test_playbook_fixes_keep_comments_and_block_scalars() -> None:
+    """Test quoting, FQCN renames and that untouched text is byte-identical."""
+    fixed, fixes, error = fix_text(PLAYBOOK, "playbook", ["yaml-syntax", "task-fqcn"])
+    assert error == ""
+    assert fixed == (
+        PLAYBOOK.replace("dest: {{ dest_dir }}", 'dest: "{{ dest_dir }}"')
+        .replace("mode: {{ mode }}/x", 'mode: "{{ mode }}/x"')
+        .replace("copy:", "ansible.builtin.copy:")
+        .replace("shell:", "ansible.builtin.shell:")
+    )
+    assert len(fixes["yaml-syntax"]) == 2 and len(fixes["task-fqcn"]) == 2
+    tasks = yaml.safe_load(fixed)[0]["tasks"]
+    assert tasks[0]["ansible.builtin.copy"]["mode"] == "{{ mode }}/x"
+    assert tasks[1]["debug"]["msg"] == "force: {{ not_yaml }}\n"
+
+    # Running again is a no-op; the opt-in no_log fixer inserts a line under the task name
+    assert fix_text(fixed, "playbook", ["yaml-syntax", "task-fqcn"])[1] == {}
+    secret, fixes, _ = fix_text("- name: 设置密码\n  set_fact:\n    db_password: x\n", "tasks", ["task-no-log"])
+    assert secret == "- name: 设置密码\n  no_log: true\n  set_fact:\n    db_password: x\n"
+
+
+def test_vars_header_keeps_document_start() -> None:
+    """Test that the header satisfies the audit rule and is added once."""
+    fixed, fixes, _ = fix_text("---\n# 示例变量\napp_port: 8080\n", "vars", ["vars-warning-header"])
+    assert fixed.startswith("---\n# ⚠️ 警告") and fixed.endswith("# 示例变量\napp_port: 8080\n")
+    assert VARS_WARNING_PATTERN.search(fixed)
+    assert fix_text(fixed, "vars", ["vars-warning-header"])[0] == fixed
+
+
+def test_cli_dry_run_and_backs_up_only_changed_files(tmp_path: Path, capsys) -> None:
+    """Test the dry-run diff, parallel fixing and selective backups."""
+    for index in range(10):
+        module = tmp_path / "files" / f"m{index}"
+        module.mkdir(parents=True)
+        content = "- hosts: all\n  tasks:\n    - name: 复制\n      copy:\n        dest: {{ d }}\n" if index < 3 else \
+            "- hosts: all\n  tasks: []\n"
+        (module / "playbook.yml").write_text(content, encoding="utf-8")
+    before = (tmp_path / "files" / "m0" / "playbook.yml").read_text(encoding="utf-8")
+    backup = tmp_path / "backup"
+
+    assert main(["--project-root", str(tmp_path), "--dry-run", "--backup-dir", str(backup)]) == 0
+    output = capsys.readouterr().out
+    assert '+        dest: "{{ d }}"' in output and "将修改 3 个" in output
+    assert (tmp_path / "files" / "m0" / "playbook.yml").read_text(encoding="utf-8") == before
+    assert not backup.exists()
+
+    report = tmp_path / "report.txt"
+    assert main(["--project-root", str(tmp_path), "--jobs", "3", "--backup-dir", str(backup),
+                 "--report", str(report)]) == 0
+    assert sorted(path.relative_to(backup).as_posix() for path in backup.rglob("*.yml")) == [
+        f"files/m{index}/playbook.yml" for index in range(3)]
+    assert (backup / "files" / "m0" / "playbook.yml").read_text(encoding="utf-8") == before
+    assert "ansible.builtin.copy" in (tmp_path / "files" / "m1" / "playbook.yml").read_text(encoding="utf-8")
+    assert "- yaml-syntax: 3 处" in report.read_text(encoding="utf-8")
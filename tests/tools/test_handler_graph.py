@@ -0,0 +1,113 @@
+"""Unit tests for the notify/handler graph built during the audit pass."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from tools import handler_graph
+from tools.comprehensive_audit import ComprehensiveAuditor
+
+PLAYBOOK = """\
+- name: 部署
+  hosts: all
+  gather_facts: false
+  roles:
+    - web
+  handlers:
+    - name: 重启应用
+      ansible.builtin.service: {name: app, state: restarted}
+      listen: restart app
+    - name: 从未使用
+      ansible.builtin.debug: {msg: x}
+    - ansible.builtin.import_tasks: handlers/main.yml
+  tasks:
+    - name: 配置
+      ansible.builtin.copy: {src: a, dest: b}
+      notify: restart app
+    - name: 分组
+      block:
+        - name: 嵌套任务
+          ansible.builtin.copy: {src: a, dest: b}
+          notify: [重载 Web, 不存在的 handler, "{{ dynamic }}"]
+    - name: 共享 handler
+      ansible.builtin.copy: {src: a, dest: b}
+      notify: 共享重启
+"""
+
+
+def _write(root: Path, relative: str, content: str) -> None:
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _tree(root: Path) -> None:
+    _write(root, "files/app/playbook.yml", PLAYBOOK)
+    _write(root, "files/app/handlers/main.yml", "- name: 共享重启\n  ansible.builtin.debug: {msg: x}\n")
+    _write(root, "files/app/roles/web/handlers/main.yml", "- name: 重载 Web\n  ansible.builtin.debug: {msg: x}\n")
+    _write(root, "files/app/roles/web/tasks/main.yml", "- name: 角色任务\n  ansible.builtin.debug: {msg: x}\n  notify: 重载 Web\n")
+    # Not used by any audited play: its wiring cannot be judged
+    _write(root, "files/app/roles/other/tasks/main.yml", "- name: 其他\n  ansible.builtin.debug: {msg: x}\n  notify: 外部 handler\n")
+
+
+def test_auditor_reports_missing_unreachable_and_duplicate_handlers(tmp_path: Path) -> None:
+    """Test one pass over playbooks, role files and handlers/main.yml."""
+    _tree(tmp_path)
+    _write(tmp_path, "files/copy/playbook.yml", "- hosts: all\n  gather_facts: false\n  handlers:\n    - name: 重启应用\n      ansible.builtin.debug: {msg: x}\n")
+
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    auditor.check_file_contents()
+    auditor.check_handler_graph()
+
+    found = {
+        (issue["rule_id"], issue["path"], issue["key"])
+        for issues in auditor.issues.values()
+        for issue in issues
+        if issue["rule_id"] in ("notify-missing-handler", "handler-unreachable", "duplicate-handler")
+    }
+    assert found == {
+        ("notify-missing-handler", "files/app/playbook.yml", "play[部署]/tasks[分组]#不存在的 handler"),
+        ("handler-unreachable", "files/app/playbook.yml", "play[部署]/handlers[从未使用]"),
+        ("handler-unreachable", "files/copy/playbook.yml", "play[0]/handlers[重启应用]"),
+        ("duplicate-handler", "", "重启应用"),
+    }
+    assert auditor.stats["total_task_files"] == 4
+
+
+def test_fan_out_counts_distinct_tasks_in_one_play() -> None:
+    """Test the fan-out threshold and listen topics."""
+    graph = handler_graph.HandlerGraph()
+    path = Path("playbook.yml")
+    graph.add_handler("play:a", {"name": "重启", "listen": ["restart"]}, path, "handlers[重启]")
+    for index in range(handler_graph.FAN_OUT_THRESHOLD):
+        target = "restart" if index % 2 else "重启"
+        graph.add_task("play:a", {"notify": target}, path, f"tasks[{index}]")
+    graph.add_task("play:a", {"notify": "重启"}, path, "tasks[0]")  # same task again
+
+    results = list(graph.analyze())
+    assert [(kind, count) for kind, _, count in results] == [("fan-out", handler_graph.FAN_OUT_THRESHOLD)]
+
+
+def test_file_scope_groups_role_files() -> None:
+    """Test that every file in a role shares the role scope."""
+    assert handler_graph.file_scope(Path("x/roles/web/tasks/main.yml")) == "role:x/roles/web"
+    assert handler_graph.file_scope(Path("x/roles/web/handlers/main.yml")) == "role:x/roles/web"
+    assert handler_graph.file_scope(Path("x/handlers/main.yml")) == "file:x/handlers/main.yml"
+
+
+def test_disabled_graph_rule_suppresses_missing_and_unreachable(tmp_path: Path) -> None:
+    """Test that a handler graph cut short by the rule budget does not produce missing-handler findings."""
+    _write(tmp_path, "web/site/playbook.yml",
+           "- hosts: all\n  gather_facts: false\n  roles: [web]\n  tasks:\n"
+           "    - name: 配置\n      ansible.builtin.copy: {src: a, dest: b}\n      notify: 重启 web\n")
+    _write(tmp_path, "web/site/roles/web/handlers/main.yml", "- name: 重启 web\n  ansible.builtin.debug: {msg: x}\n")
+
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    # The rule goes over its budget on the playbook, before the role's handler file is indexed
+    auditor.check_playbook_content(tmp_path / "web/site/playbook.yml")
+    auditor.budget.disabled_rules.append("handler-graph")
+    auditor.check_tasks_file(tmp_path / "web/site/roles/web/handlers/main.yml", handlers=True)
+    auditor.check_handler_graph()
+
+    rule_ids = {issue["rule_id"] for issues in auditor.issues.values() for issue in issues}
+    assert "notify-missing-handler" not in rule_ids
+    assert auditor.budget.skipped["handler-analysis"] == 1
@@ -0,0 +1,79 @@
+"""Unit tests for the interned audit issue store."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from tools.comprehensive_audit import ComprehensiveAuditor
+from tools.issue_store import IssueStore
+
+
+def _add_fqcn(store: IssueStore, module: str, path: str = "web/nginx/playbook.yml") -> None:
+    store.add("low", "模块未使用 FQCN: {module} in {path}", "使用完全限定名，如 ansible.builtin.{module}",
+              "task-fqcn", path, f"/repo/{path}", f"play[0]/tasks[{module}]#{module}", module, {"module": module})
+
+
+def test_strings_are_interned_and_formatted_lazily() -> None:
+    """Test that repeated findings share strings and render like the eager messages."""
+    store = IssueStore()
+    for module in ("copy", "template", "copy"):
+        _add_fqcn(store, module)
+    store.add("high", "缺少 requirements.txt", "创建 requirements.txt", "deps-missing-file", "", "", "", "fp")
+
+    assert len(store.strings) == 9
+    assert store.format(store.records["low"][1]) == {
+        "description": "模块未使用 FQCN: template in /repo/web/nginx/playbook.yml",
+        "suggestion": "使用完全限定名，如 ansible.builtin.template",
+        "rule_id": "task-fqcn",
+        "path": "web/nginx/playbook.yml",
+        "key": "play[0]/tasks[template]#template",
+        "fingerprint": "template",
+    }
+    assert store.as_dict()["high"][0]["description"] == "缺少 requirements.txt"
+    assert store.aggregates() == {
+        "by_rule": {"task-fqcn": 3, "deps-missing-file": 1},
+        "by_path": {"web/nginx/playbook.yml": 3, "(项目)": 1},
+    }
+
+
+def test_groups_merge_repeated_findings_per_path() -> None:
+    """Test group titles, per-path counts and detail de-duplication."""
+    store = IssueStore()
+    for module in ("copy", "template", "copy"):
+        _add_fqcn(store, module)
+    _add_fqcn(store, "shell", "files/copy/playbook.yml")
+    store.add("low", "可能存在高熵密钥 (置信度 {confidence:.2f}): {path}", "加密: {text}",
+              "secret-high-entropy", "a.yml", "a.yml", "x", "fp", {"confidence": 0.9, "text": "ab****"})
+
+    fqcn, entropy = store.groups("low")
+    assert fqcn.title == "模块未使用 FQCN: <module> in <path>"
+    assert fqcn.suggestion == "使用完全限定名，如 ansible.builtin.<module>"
+    assert list(store.group_details(fqcn)) == [
+        ("web/nginx/playbook.yml", 3, ["copy ×2", "template"]),
+        ("files/copy/playbook.yml", 1, ["shell"]),
+    ]
+    # A single finding keeps its full message
+    assert entropy.title == "可能存在高熵密钥 (置信度 0.90): a.yml"
+
+
+def test_markdown_report_groups_and_summary_mode_only_counts(tmp_path: Path) -> None:
+    """Test the grouped Markdown section and counting without retained records."""
+    module = tmp_path / "files" / "copy"
+    module.mkdir(parents=True)
+    (module / "playbook.yml").write_text(
+        "- hosts: all\n  gather_facts: false\n  tasks:\n"
+        "    - name: Copy file\n      ansible.builtin.debug: {}\n"
+        "    - name: Restart app\n      ansible.builtin.debug: {}\n",
+        encoding="utf-8",
+    )
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    auditor.check_file_contents()
+    markdown = auditor.format_report_markdown(auditor.generate_report())
+
+    assert '#### 1. 任务名称不是中文: "<name>" in <path> (2 项，`task-chinese-name`)' in markdown
+    assert "- `files/copy/playbook.yml` (2): Copy file, Restart app" in markdown
+
+    summary = ComprehensiveAuditor(str(tmp_path), keep_issues=False)
+    summary.check_file_contents()
+    assert summary.store.records["low"] == []
+    assert summary.store.strings == []
+    assert summary.generate_report()["aggregates"]["by_rule"] == {"task-chinese-name": 2}
@@ -0,0 +1,91 @@
+"""Unit tests for the shared Markdown structure scanner."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from tools.comprehensive_audit import ComprehensiveAuditor
+from tools.markdown_scan import MarkdownScanner, parse_markdown
+
+README = """\
+# **Nginx** 部署
+
+> 使用 `nginx` 模块部署 Web 服务，
+> 参见 [配置说明](docs/config.md#options)。
+
+## 使用方法
+
+```bash
+ansible-playbook playbook.yml --check --diff --verbose
+```
+
+Run this example against staging before production please.
+- list items are skipped entirely
+详见 [官方文档](https://docs.ansible.com) 与 [变量](vars/example_vars.yml)。
+"""
+
+
+def test_parse_markdown_extracts_structure_in_one_pass() -> None:
+    """Test title, summary, headings, code spans, links and word counts."""
+    structure = parse_markdown(README, "README.md")
+
+    assert structure.title == "Nginx 部署"
+    assert structure.summary == "使用 nginx 模块部署 Web 服务， 参见 配置说明。"
+    assert structure.headings == ((1, "Nginx 部署", 1), (2, "使用方法", 6))
+    assert structure.code_blocks == ((8, 10),)
+    assert structure.local_links == ("docs/config.md", "vars/example_vars.yml")
+    # Code blocks, headings and list items are not prose
+    assert "playbook" not in structure.latin_words
+    assert "list" not in structure.latin_words
+    assert structure.latin_words["docs"] == 2  # link targets in prose are counted too
+    assert structure.latin_word_count == 15
+    assert structure.cjk_chars > 10
+
+
+def test_unclosed_code_block_runs_to_end_of_file() -> None:
+    """Test that an unclosed fence hides the rest of the document."""
+    structure = parse_markdown("intro text\n```\n# not a heading\n")
+
+    assert structure.code_blocks == ((2, 3),)
+    assert structure.headings == ()
+    assert structure.title == ""
+    assert structure.summary == "intro text"
+
+
+def test_scanner_caches_until_file_changes(tmp_path: Path) -> None:
+    """Test cache hits, invalidation on modification and missing files."""
+    path = tmp_path / "README.md"
+    path.write_text("# 旧标题\n", encoding="utf-8")
+    scanner = MarkdownScanner()
+
+    first = scanner.scan(path)
+    assert scanner.scan(path) is first
+    assert (scanner.hits, scanner.misses) == (1, 1)
+
+    path.write_text("# 新标题\n", encoding="utf-8")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert scanner.scan(path).title == "新标题"
+    assert scanner.scan(tmp_path / "missing.md") is None
+
+
+def test_audit_reads_each_readme_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the audit parses the README from the bytes it hashed."""
+    readme = tmp_path / "web" / "nginx" / "README.md"
+    readme.parent.mkdir(parents=True)
+    readme.write_text(README, encoding="utf-8")
+    reads = []
+    for method in ("read_bytes", "read_text"):
+        original = getattr(Path, method)
+
+        def counted(self, *args, _original=original, **kwargs):
+            reads.append(self.name)
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, method, counted)
+
+    auditor = ComprehensiveAuditor(str(tmp_path))
+    auditor.check_readme_content(readme)
+    assert reads == ["README.md"]
+    assert auditor.stats["total_readmes"] == 1
@@ -602,3 +602,481 @@ def test_graceful_fallback_on_ansible_doc_failure(
     # Should fallback to common modules list
     assert len(modules) > 0
     assert "ansible.builtin.copy" in modules
+
+
+def test_records_intern_category_and_priority() -> None:
+    """Test that coverage records share interned category/priority strings."""
+    first = module_diff.ModuleCoverage(
+        module="ansible.builtin.copy",
+        status="covered",
+        category="".join(["fi", "les"]),
+        priority="".join(["P", "1"]),
+    )
+    second = module_diff.ModuleCoverage(
+        module="ansible.builtin.file",
+        status="covered",
+        category="".join(["file", "s"]),
+        priority="".join(["P1"]),
+    )
+    
+    assert first.category is second.category
+    assert first.priority is second.priority
+
+
+@pytest.mark.skipif(
+    not module_diff.RECORD_OPTIONS, reason="slotted dataclasses need Python 3.10+"
+)
+def test_records_are_slotted() -> None:
+    """Test that coverage records carry no per-instance __dict__."""
+    coverage = module_diff.ModuleCoverage(
+        module="ansible.builtin.copy", status="covered", category="files", priority="P1"
+    )
+    info = module_diff.ModuleInfo(name="copy", collection="ansible.builtin")
+    
+    assert not hasattr(coverage, "__dict__")
+    assert not hasattr(info, "__dict__")
+    assert info.full_name == "ansible.builtin.copy"
+
+
+def test_json_report_matches_dataclass_layout(
+    tmp_path: Path,
+    sample_priorities: Path,
+    sample_modules_metadata: Path,
+    sample_repo: Path,
+    mocked_ansible_doc_output: str,
+) -> None:
+    """Test that the JSON writer keeps the asdict() layout without deep copies."""
+    from dataclasses import asdict
+    
+    json_output = tmp_path / "report.json"
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=sample_priorities,
+        modules_path=sample_modules_metadata,
+        cache_path=tmp_path / "cache.json",
+        root=sample_repo,
+    )
+    
+    with patch("subprocess.run") as mock_run:
+        mock_result = MagicMock()
+        mock_result.returncode = 0
+        mock_result.stdout = mocked_ansible_doc_output
+        mock_run.return_value = mock_result
+        
+        report = analyzer.analyze()
+    
+    analyzer.write_json_report(report, json_output)
+    
+    with open(json_output, encoding="utf-8") as f:
+        data = json.load(f)
+    
+    assert data == json.loads(json.dumps(asdict(report), ensure_ascii=False))
+    assert data["total_covered"] == sum(
+        stats["total_covered"] for stats in data["categories"].values()
+    )
+
+
+def test_ndjson_report_generation(
+    tmp_path: Path,
+    sample_priorities: Path,
+    sample_modules_metadata: Path,
+    sample_repo: Path,
+    mocked_ansible_doc_output: str,
+) -> None:
+    """Test NDJSON report: summary line first, then one record per line."""
+    ndjson_output = tmp_path / "report.ndjson"
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=sample_priorities,
+        modules_path=sample_modules_metadata,
+        cache_path=tmp_path / "cache.json",
+        root=sample_repo,
+    )
+    
+    with patch("subprocess.run") as mock_run:
+        mock_result = MagicMock()
+        mock_result.returncode = 0
+        mock_result.stdout = mocked_ansible_doc_output
+        mock_run.return_value = mock_result
+        
+        report = analyzer.analyze()
+    
+    analyzer.write_ndjson_report(report, ndjson_output)
+    
+    records = [
+        json.loads(line)
+        for line in ndjson_output.read_text(encoding="utf-8").splitlines()
+    ]
+    
+    assert records[0]["type"] == "summary"
+    assert records[0]["total_covered"] == report.total_covered
+    coverage = [r for r in records if r["type"] == "coverage"]
+    assert len(coverage) == len(report.coverage_details)
+    assert {r["category"] for r in records if r["type"] == "category"} == set(report.categories)
+
+
+def test_streamed_json_handles_empty_sections(tmp_path: Path) -> None:
+    """Test that streamed JSON stays valid when sections are empty."""
+    report = module_diff.DiffReport(
+        generated_at="2024-01-01T00:00:00+00:00",
+        total_ansible_modules=0,
+        total_covered=0,
+        total_missing=0,
+        total_undocumented=0,
+        overall_coverage=0,
+        categories={},
+        coverage_details=[],
+        duplicates=[],
+        inconsistencies=[],
+    )
+    
+    data = json.loads("".join(module_diff.iter_json_report(report)))
+    
+    assert data["categories"] == {}
+    assert data["coverage_details"] == []
+    assert data["inconsistencies"] == []
+
+
+def _coverage_report(records: list) -> module_diff.DiffReport:
+    """Build a report from (module, status, category, priority) tuples."""
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=Path("dummy"),
+        modules_path=Path("dummy"),
+        cache_path=Path("dummy"),
+        root=Path("dummy"),
+    )
+    coverage_details = [
+        module_diff.ModuleCoverage(
+            module=module,
+            status=status,
+            category=category,
+            priority=priority,
+            in_ansible_doc=True,
+            in_metadata=status == "covered",
+            in_filesystem=status == "covered",
+        )
+        for module, status, category, priority in records
+    ]
+    return analyzer.build_report(coverage_details)
+
+
+def test_compare_reports_delta() -> None:
+    """Test delta detection between two runs."""
+    old = _coverage_report([
+        ("ansible.builtin.copy", "covered", "files", "P1"),
+        ("ansible.builtin.stat", "missing", "files", "P2"),
+        ("ansible.builtin.raw", "covered", "commands", "P3"),
+        ("ansible.builtin.ping", "missing", "network", "P2"),
+    ])
+    new = _coverage_report([
+        ("ansible.builtin.copy", "covered", "files", "P1"),
+        ("ansible.builtin.stat", "covered", "files", "P1"),
+        ("ansible.builtin.raw", "missing", "commands", "P3"),
+        ("ansible.builtin.ping", "missing", "network_protocols", "P2"),
+        ("ansible.builtin.uri", "missing", "web", "P2"),
+    ])
+    
+    delta = module_diff.compare_reports(old, new)
+    
+    assert delta.added_modules == ["ansible.builtin.uri"]
+    assert delta.removed_modules == []
+    assert [c["module"] for c in delta.newly_covered] == ["ansible.builtin.stat"]
+    assert [c["module"] for c in delta.lost_coverage] == ["ansible.builtin.raw"]
+    assert [c["module"] for c in delta.newly_missing] == ["ansible.builtin.raw", "ansible.builtin.uri"]
+    assert delta.priority_changes == [{"module": "ansible.builtin.stat", "old": "P2", "new": "P1"}]
+    assert delta.category_moves == [
+        {"module": "ansible.builtin.ping", "old": "network", "new": "network_protocols"}
+    ]
+    assert delta.category_deltas["files"]["covered_delta"] == 1
+    assert delta.category_deltas["commands"]["missing_delta"] == 1
+    assert "Newly Covered" in module_diff.render_delta(delta)
+
+
+def test_load_report_round_trip(tmp_path: Path) -> None:
+    """Test that JSON and NDJSON reports load back into equal reports."""
+    report = _coverage_report([
+        ("ansible.builtin.copy", "covered", "files", "P1"),
+        ("ansible.builtin.stat", "missing", "files", "P2"),
+    ])
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=Path("dummy"),
+        modules_path=Path("dummy"),
+        cache_path=Path("dummy"),
+        root=Path("dummy"),
+    )
+    analyzer.write_json_report(report, tmp_path / "report.json")
+    analyzer.write_ndjson_report(report, tmp_path / "report.ndjson")
+    
+    from_json = module_diff.load_report(tmp_path / "report.json")
+    from_ndjson = module_diff.load_report(tmp_path / "report.ndjson")
+    
+    assert from_json == report
+    assert from_ndjson == report
+    assert not module_diff.compare_reports(from_json, from_ndjson).has_changes
+
+
+def test_sharded_runs_merge_to_full_report(
+    tmp_path: Path,
+    sample_priorities: Path,
+    sample_modules_metadata: Path,
+    sample_repo: Path,
+    mocked_ansible_doc_output: str,
+) -> None:
+    """Test that merged shard reports match a single full run."""
+    cache_path = tmp_path / "cache.json"
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = mocked_ansible_doc_output
+    
+    def run(shard=None) -> module_diff.DiffReport:
+        analyzer = module_diff.ModuleDiffAnalyzer(
+            priorities_path=sample_priorities,
+            modules_path=sample_modules_metadata,
+            cache_path=cache_path,
+            root=sample_repo,
+            shard=shard,
+        )
+        with patch("subprocess.run", return_value=mock_result):
+            return analyzer.analyze()
+    
+    full = run()
+    shards = [
+        run(["community.general", "community.docker"]),
+        run(["files", "system"]),
+    ]
+    sharded_modules = {c.module for report in shards for c in report.coverage_details}
+    rest = sorted({c.category for c in full.coverage_details if c.module not in sharded_modules})
+    shards.append(run(rest))
+    
+    assert all(
+        c.module.startswith("community.") for c in shards[0].coverage_details
+    )
+    
+    merged = module_diff.merge_reports(shards)
+    
+    assert merged.coverage_details == full.coverage_details
+    assert merged.categories == full.categories
+    assert merged.duplicates == full.duplicates
+    assert merged.inconsistencies == full.inconsistencies
+    assert merged.total_ansible_modules == full.total_ansible_modules
+    assert merged.overall_coverage == full.overall_coverage
+
+
+def test_load_phases_run_concurrently(
+    tmp_path: Path,
+    sample_priorities: Path,
+    sample_modules_metadata: Path,
+    sample_repo: Path,
+    mocked_ansible_doc_output: str,
+) -> None:
+    """Test that the filesystem scan overlaps with the ansible-doc phase."""
+    import time
+    
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=sample_priorities,
+        modules_path=sample_modules_metadata,
+        cache_path=tmp_path / "cache.json",
+        root=sample_repo,
+    )
+    parse = analyzer._parse_ansible_doc_output
+    scan = analyzer.load_filesystem_modules
+    
+    def slow_ansible_doc() -> dict:
+        time.sleep(0.4)
+        return parse(mocked_ansible_doc_output)
+    
+    def slow_scan() -> None:
+        time.sleep(0.4)
+        scan()
+    
+    with patch.object(analyzer, "fetch_ansible_doc_list", slow_ansible_doc), \
+            patch.object(analyzer, "load_filesystem_modules", slow_scan):
+        report = analyzer.analyze()
+    
+    timings = report.phase_timings
+    assert list(timings) == list(module_diff.PHASE_ORDER)
+    assert timings["ansible_doc"] >= 0.4
+    assert timings["filesystem"] >= 0.4
+    assert timings["load_wall"] < timings["ansible_doc"] + timings["filesystem"]
+    assert "copy" in analyzer.filesystem_modules["files"]
+    assert "ansible.builtin.copy" in analyzer.ansible_modules
+
+
+def test_priority_rules_most_specific_wins() -> None:
+    """Test namespace and glob priority rules with most-specific-wins semantics."""
+    rules = module_diff.PriorityRules({
+        "ansible.builtin.*": "P1",
+        "community.*": "P3",
+        "community.aws.*": "P3",
+        "*.mysql_*": "P1",
+        "community.mysql.mysql_*": "P2",
+        "community.mysql.mysql_db": "P1",
+        "amazon.aws.ec2_*": "P2",
+    })
+    
+    # Exact names beat every pattern
+    assert rules.match("community.mysql.mysql_db") == "P1"
+    # More literal segments win over broader rules
+    assert rules.match("community.mysql.mysql_user") == "P2"
+    assert rules.match("community.aws.ec2_instance") == "P3"
+    assert rules.match("ansible.builtin.copy") == "P1"
+    # A leading "*" spans several segments
+    assert rules.match("someone.db.mysql_query") == "P1"
+    # Globs inside a segment
+    assert rules.match("amazon.aws.ec2_vpc_net") == "P2"
+    assert rules.match("amazon.aws.s3_bucket") is None
+    assert rules.match("ansible.posix.mount") is None
+
+
+def test_get_module_priority_uses_pattern_rules(tmp_path: Path) -> None:
+    """Test that pattern rules sit between exact names and category fallback."""
+    priorities_file = tmp_path / "priorities.yml"
+    priorities_file.write_text(
+        yaml.dump({
+            "default_priority": "P2",
+            "modules": {
+                "ansible.builtin.raw": "P3",
+                "ansible.builtin.*": "P1",
+                "community.aws.*": "P3",
+            },
+            "category_priorities": {"cloud": "P2"},
+        }),
+        encoding="utf-8",
+    )
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=priorities_file,
+        modules_path=Path("dummy"),
+        cache_path=Path("dummy"),
+        root=Path("dummy"),
+    )
+    analyzer.load_priorities()
+    
+    assert analyzer.get_module_priority("ansible.builtin.raw") == "P3"
+    assert analyzer.get_module_priority("ansible.builtin.ping") == "P1"
+    assert analyzer.get_module_priority("community.aws.ec2_instance", "cloud") == "P3"
+    assert analyzer.get_module_priority("amazon.aws.ec2_instance", "cloud") == "P2"
+    assert analyzer.get_module_priority("unknown.module") == "P2"
+
+
+def _catalogue_modules() -> dict:
+    return {
+        full_name: module_diff.ModuleInfo(
+            name=full_name.rsplit(".", 1)[1],
+            collection=full_name.rsplit(".", 1)[0],
+            description=f"{full_name} description",
+        )
+        for full_name in [
+            "community.mysql.mysql_user",
+            "ansible.builtin.copy",
+            "community.general.ufw",
+            "ansible.builtin.apt",
+            "community.mysql.mysql_db",
+        ]
+    }
+
+
+def test_catalogue_round_trip_and_collection_index(tmp_path: Path) -> None:
+    """Test the catalogue snapshot format and loading selected collections."""
+    path = tmp_path / "catalogue.json.gz"
+    module_diff.write_catalogue(_catalogue_modules(), path, ansible_core="2.16.3")
+    
+    raw = module_diff.read_catalogue(path)
+    assert raw["format_version"] == module_diff.CATALOGUE_FORMAT_VERSION
+    assert raw["ansible_core"] == "2.16.3"
+    assert raw["collections"]["community.mysql"] == [3, 5]
+    assert [row[0] for row in raw["modules"]] == sorted(_catalogue_modules())
+    
+    modules = module_diff.load_catalogue(path)
+    assert set(modules) == set(_catalogue_modules())
+    assert modules["community.mysql.mysql_db"].collection == "community.mysql"
+    assert modules["community.mysql.mysql_db"].description == "community.mysql.mysql_db description"
+    
+    assert set(module_diff.load_catalogue(path, ["community.mysql"])) == {
+        "community.mysql.mysql_db",
+        "community.mysql.mysql_user",
+    }
+    assert len(module_diff.load_catalogue(path, ["community"])) == 3
+    assert module_diff.load_catalogue(tmp_path / "missing.json.gz") == {}
+
+
+def test_catalogue_is_used_offline_and_as_fallback(tmp_path: Path, capsys) -> None:
+    """Test that the catalogue never replaces a working ansible-doc unless --offline is set."""
+    import os
+    
+    catalogue_path = tmp_path / "catalogue.json.gz"
+    module_diff.write_catalogue(
+        _catalogue_modules(), catalogue_path, ansible_core="2.16.3", generated_at="2024-01-01T00:00:00+00:00"
+    )
+    cache_path = tmp_path / "cache.json"
+    analyzer = module_diff.ModuleDiffAnalyzer(
+        priorities_path=Path("dummy"),
+        modules_path=Path("dummy"),
+        cache_path=cache_path,
+        root=tmp_path,
+        shard=["community.mysql"],
+        catalogue_path=catalogue_path,
+    )
+    mysql = {"community.mysql.mysql_db", "community.mysql.mysql_user"}
+    
+    # Offline runs read the snapshot without starting any process and do not cache it
+    analyzer.offline = True
+    with patch("subprocess.run") as mock_run:
+        assert set(analyzer.fetch_ansible_doc_list()) == mysql
+    mock_run.assert_not_called()
+    assert "Module source: catalogue" in capsys.readouterr().out
+    assert not cache_path.exists()
+    
+    analyzer.offline = False
+    with patch("subprocess.run", side_effect=FileNotFoundError):
+        assert set(analyzer.fetch_ansible_doc_list()) == mysql
+    assert "(ansible-doc unavailable)" in capsys.readouterr().out
+    assert not cache_path.exists()
+    
+    # A working ansible-doc is listed once, without a version query, and cached
+    listing = MagicMock(returncode=0, stdout="community.general.ufw    Manage firewall with UFW\n")
+    with patch("subprocess.run", return_value=listing) as mock_run:
+        assert list(analyzer.fetch_ansible_doc_list()) == ["community.general.ufw"]
+    assert [call.args[0] for call in mock_run.call_args_list] == [["ansible-doc", "-l", "-t", "module"]]
+    assert "Module source: ansible-doc -l" in capsys.readouterr().out
+    
+    # A fresher cache wins; one older than the snapshot is refreshed
+    assert list(analyzer.fetch_ansible_doc_list()) == ["community.general.ufw"]
+    os.utime(cache_path, (1000000000, 1000000000))
+    with patch("subprocess.run", side_effect=FileNotFoundError):
+        assert set(analyzer.fetch_ansible_doc_list()) == mysql
+    
+    # ansible-doc failures fall back to the snapshot rather than the short list
+    analyzer.shard = []
+    with patch("subprocess.run", side_effect=FileNotFoundError):
+        modules = analyzer._execute_ansible_doc()
+    assert set(modules) == set(_catalogue_modules())
+
+
+def test_shipped_catalogue_covers_fallback_modules() -> None:
+    """Test that the shipped snapshot loads and contains the core modules."""
+    modules = module_diff.load_catalogue(module_diff.DEFAULT_CATALOGUE)
+    
+    for full_name in ["ansible.builtin.copy", "ansible.builtin.template", "ansible.posix.mount"]:
+        assert full_name in modules
+        assert modules[full_name].description
+
+
+def test_last_run_is_saved_only_when_requested(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that plain runs leave no snapshot and --compare-last saves one."""
+    default = tmp_path / ".cache" / "module_diff_last.ndjson"
+    monkeypatch.setattr(module_diff, "DEFAULT_LAST_RUN", default)
+    monkeypatch.setattr(
+        module_diff.ModuleDiffAnalyzer, "analyze", lambda self: module_diff.ModuleDiffAnalyzer.build_report([])
+    )
+    
+    def run(*args: str) -> int:
+        monkeypatch.setattr("sys.argv", ["module_diff.py", "--summary", "--root", str(tmp_path), *args])
+        return module_diff.main()
+    
+    assert run() == 0
+    assert not default.exists()
+    assert run("--compare-last") == 0
+    assert default.exists()
+    
+    # An unwritable location only warns
+    blocker = tmp_path / "file"
+    blocker.write_text("", encoding="utf-8")
+    assert run("--last-run", str(blocker / "last.ndjson")) == 0
@@ -0,0 +1,79 @@
+"""Unit tests for the batched pre-commit runner."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from tools import precommit
+from tools.precommit import ResultCache, check_file, check_files
+
+PLAYBOOK = """\
+- hosts: all
+  tasks:
+    - name: 复制文件
+      copy:
+        src: a
+        dest: b
+    - name: 设置数据库密码
+      ansible.builtin.set_fact:
+        db_password: "{{ vault_db_password }}"
+"""
+
+
+def test_check_file_findings() -> None:
+    """Test each check on a single file, including the last task of a playbook."""
+    assert check_file("web/nginx/broken.yml", b"a: [1\n") == [("yaml", "error", "YAML 语法错误: web/nginx/broken.yml")]
+    assert [finding[0] for finding in check_file("web/nginx/vars/example_vars.yml", b"port: 80\n")] == ["vars-header"]
+    assert check_file("web/nginx/vars/example_vars.yml", "# ⚠️ 警告\nport: 80\n".encode()) == []
+
+    findings = check_file("web/nginx/playbook.yml", PLAYBOOK.encode())
+    assert [(check, level) for check, level, _ in findings] == [("no-log", "warning"), ("fqcn", "warning")]
+    assert findings[0][2].endswith("任务: 设置数据库密码")
+
+
+def test_unchanged_files_reuse_cached_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a second run only re-checks edited files."""
+    monkeypatch.chdir(tmp_path)
+    Path("a.yml").write_text("a: 1\n", encoding="utf-8")
+    Path("b.yml").write_text("b: [\n", encoding="utf-8")
+    cold = ResultCache("cache.json")
+    first = check_files(["a.yml", "b.yml", "missing.yml"], cold)
+    cold.save()
+    assert cold.misses == 2
+
+    checked = []
+    monkeypatch.setattr(precommit, "_check_item", lambda item: checked.append(item[0]) or [])
+    Path("a.yml").write_text("a: 2\n", encoding="utf-8")
+    warm = ResultCache("cache.json")
+    second = check_files(["a.yml", "b.yml"], warm)
+    assert checked == ["a.yml"]
+    assert (warm.hits, warm.misses) == (1, 1)
+    assert second["b.yml"] == first["b.yml"] == [("yaml", "error", "YAML 语法错误: b.yml")]
+
+
+def test_parallel_check_matches_sequential_check(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that worker processes return the same results in input order."""
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for index in range(precommit.PARALLEL_MIN_FILES + 2):
+        path = Path(f"m{index}") / "playbook.yml"
+        path.parent.mkdir()
+        path.write_text(PLAYBOOK if index % 2 else "- hosts: all\n", encoding="utf-8")
+        paths.append(str(path))
+
+    parallel = check_files(paths, jobs=3)
+    assert list(parallel) == paths
+    assert parallel == check_files(paths)
+
+
+def test_checker_version_tracks_entropy_detector(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that entropy settings are part of the cache version."""
+    from tools import secret_scanner
+
+    before = precommit.checker_version()
+    # Editing ENTROPY_MIN_CONFIDENCE only shows up in the detector's default arguments
+    init = secret_scanner.EntropyDetector.__init__
+    defaults = tuple(0.5 if value == secret_scanner.ENTROPY_MIN_CONFIDENCE else value for value in init.__defaults__)
+    monkeypatch.setattr(init, "__defaults__", defaults)
+    assert precommit.checker_version() != before
@@ -0,0 +1,159 @@
+"""Unit tests for the structured pytest results plugin."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from tools.audit_report import AuditCollector
+from tools.pytest_results import PLUGIN_NAME, RESULTS_OPTION, inputs_digest, read_results
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+SAMPLE_TESTS = """\
+import pytest
+
+
+def test_passes():
+    assert True
+
+
+def test_fails():
+    assert 1 == 2
+
+
+@pytest.mark.skip(reason="not today")
+def test_skipped():
+    pass
+
+
+@pytest.mark.xfail
+def test_expected_failure():
+    assert False
+"""
+
+
+def _run_plugin(project: Path, results: Path) -> None:
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", PLUGIN_NAME, f"{RESULTS_OPTION}={results}"],
+        cwd=project,
+        capture_output=True,
+        env=env,
+        check=False,
+    )
+
+
+def test_plugin_streams_outcomes_and_summary(tmp_path: Path) -> None:
+    """Test that every outcome, duration and the final summary are recorded."""
+    (tmp_path / "test_sample.py").write_text(SAMPLE_TESTS, encoding="utf-8")
+    results_path = tmp_path / "results.ndjson"
+    _run_plugin(tmp_path, results_path)
+
+    results = read_results(results_path)
+    assert results.complete
+    assert results.exitstatus == 1
+    assert results.collected == 4
+    assert dict(results.outcomes) == {"passed": 1, "failed": 1, "skipped": 1, "xfailed": 1}
+    assert results.failures == ["test_sample.py::test_fails"]
+    assert set(results.durations) == {
+        "test_sample.py::test_passes",
+        "test_sample.py::test_fails",
+        "test_sample.py::test_expected_failure",
+    }
+
+
+def test_truncated_results_keep_finished_tests(tmp_path: Path) -> None:
+    """Test that a run killed mid-write still yields its finished tests."""
+    results_path = tmp_path / "results.ndjson"
+    results_path.write_text(
+        '{"event": "test", "nodeid": "t.py::a", "when": "call", "outcome": "passed", "duration": 0.5}\n'
+        '{"event": "test", "nodeid": "t.py::b", "wh',
+        encoding="utf-8",
+    )
+
+    results = read_results(results_path)
+    assert not results.complete
+    assert results.total == 1
+    assert results.slowest() == [("t.py::a", 0.5)]
+    assert read_results(tmp_path / "missing.ndjson").total == 0
+
+
+def test_collector_reports_failing_tests(tmp_path: Path) -> None:
+    """Test that the audit collector surfaces failures and test counts."""
+    (tmp_path / "test_sample.py").write_text(SAMPLE_TESTS, encoding="utf-8")
+    collector = AuditCollector(tmp_path)
+    collector._run_tests()
+
+    assert collector.stats["tests_passed"] == 1
+    assert collector.stats["tests_failed"] == 1
+    assert collector.issues["high"] == [{
+        "file": "test_sample.py::test_fails",
+        "issue": "1 tests failed or could not be collected",
+        "suggestion": "test_sample.py::test_fails",
+    }]
+    assert collector.to_dict()["tests"]["complete"]
+
+
+def test_collector_labels_timeouts_apart_from_early_exits(tmp_path: Path) -> None:
+    """Test that only a real timeout is reported as timed out."""
+    (tmp_path / "test_exit.py").write_text(
+        "import os\n\ndef test_passes():\n    pass\n\ndef test_exits():\n    os._exit(3)\n",
+        encoding="utf-8",
+    )
+    exited = AuditCollector(tmp_path)
+    exited._run_tests()
+    assert exited.tests_status == "partial (pytest exited with code 3)"
+    assert exited.stats["tests_passed"] == 1
+    assert "exited with code 3" in exited.issues["medium"][0]["issue"]
+
+    (tmp_path / "test_exit.py").write_text("import time\n\ndef test_sleeps():\n    time.sleep(60)\n", encoding="utf-8")
+    slow = AuditCollector(tmp_path, test_timeout=5)
+    slow._run_tests()
+    assert slow.tests_status == "partial (timed out)"
+    assert "skipped (partial (timed out))" in slow._generate_stats_section()
+
+
+def test_collector_reuses_results_until_an_input_changes(tmp_path: Path) -> None:
+    """Test the input-digest result cache and the rerun override."""
+    (tmp_path / "test_sample.py").write_text(SAMPLE_TESTS, encoding="utf-8")
+    (tmp_path / "data.yml").write_text("a: 1\n", encoding="utf-8")
+    AuditCollector(tmp_path)._run_tests()
+
+    warm = AuditCollector(tmp_path)
+    warm._run_tests()
+    assert warm.tests_from_cache
+    assert warm.stats["tests_failed"] == 1
+    assert len(warm.issues["high"]) == 1
+
+    forced = AuditCollector(tmp_path, rerun_tests=True)
+    forced._run_tests()
+    assert not forced.tests_from_cache
+
+    (tmp_path / "data.yml").write_text("a: 2\n", encoding="utf-8")
+    edited = AuditCollector(tmp_path)
+    edited._run_tests()
+    assert not edited.tests_from_cache
+
+
+def test_inputs_digest_covers_every_tracked_file(tmp_path: Path) -> None:
+    """Test that any tracked file changes the digest, in and outside a git checkout."""
+    (tmp_path / ".github").mkdir()
+    (tmp_path / ".github" / "settings").write_text("a", encoding="utf-8")
+    (tmp_path / "catalogue.json.gz").write_bytes(b"\x1f\x8b1")
+    (tmp_path / ".cache").mkdir()
+    (tmp_path / ".cache" / "meta.json").write_text("{}", encoding="utf-8")
+
+    for use_git in (False, True):
+        if use_git:
+            subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+            (tmp_path / ".gitignore").write_text(".cache/\n", encoding="utf-8")
+        before = inputs_digest(tmp_path)
+        for path in (".github/settings", "catalogue.json.gz"):
+            (tmp_path / path).write_bytes((tmp_path / path).read_bytes() + b"+")
+            assert inputs_digest(tmp_path) != before
+            before = inputs_digest(tmp_path)
+        # Cache contents are not inputs
+        (tmp_path / ".cache" / "meta.json").write_text(f'{{"git": {use_git:d}}}', encoding="utf-8")
+        assert inputs_digest(tmp_path) == before
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+审计报告归档 - Audit Report Archive
+旧的 JSON/Markdown 报告按内容切块、gzip 压缩后以内容哈希存放：相邻两次报告的问题列表大多相同，
+相同的块只存一份。每份报告有一个清单记录块顺序与整体哈希，可完整还原
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# 默认归档目录（监控报告目录下）
+DEFAULT_ARCHIVE = 'reports/audit_history/archive'
+
+# 行哈希的低位全为 0 时在该行之后切块，平均约 64 行一块；
+# 切点只取决于行内容，前面插入或删除问题不会改变后面的切块
+CHUNK_MASK = 0x3f
+# 单块最多行数，避免没有切点的长段落成为一个大块
+MAX_CHUNK_LINES = 512
+
+
+def split_chunks(data: bytes) -> Iterator[bytes]:
+    """按内容定义的切点把数据切成若干行块"""
+    chunk: List[bytes] = []
+    for line in data.splitlines(keepends=True):
+        chunk.append(line)
+        if zlib.crc32(line) & CHUNK_MASK == 0 or len(chunk) >= MAX_CHUNK_LINES:
+            yield b''.join(chunk)
+            chunk = []
+    if chunk:
+        yield b''.join(chunk)
+
+
+class ReportArchive:
+    """内容寻址的报告归档
+
+    块存放在 objects/<哈希前两位>/<sha1>.gz，清单存放在 manifests/<报告名>.json。
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_ARCHIVE):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.manifests = self.root / 'manifests'
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f'{digest}.gz'
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.manifests / f'{name}.json'
+
+    def add(self, path: Union[str, Path], name: Optional[str] = None) -> Dict[str, Any]:
+        """归档一份报告，返回清单；stored_bytes 为本次新写入的压缩字节数"""
+        path = Path(path)
+        name = name or path.name
+        data = path.read_bytes()
+        chunks = []
+        stored = 0
+        for chunk in split_chunks(data):
+            digest = hashlib.sha1(chunk).hexdigest()
+            chunks.append(digest)
+            target = self._object_path(digest)
+            if target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            compressed = gzip.compress(chunk, mtime=0)
+            temp = target.with_suffix('.tmp')
+            temp.write_bytes(compressed)
+            temp.replace(target)
+            stored += len(compressed)
+        manifest = {
+            'name': name,
+            'size': len(data),
+            'sha1': hashlib.sha1(data).hexdigest(),
+            'chunks': chunks,
+        }
+        self.manifests.mkdir(parents=True, exist_ok=True)
+        self._manifest_path(name).write_text(json.dumps(manifest), encoding='utf-8')
+        return {**manifest, 'stored_bytes': stored}
+
+    def manifest(self, name: str) -> Dict[str, Any]:
+        with open(self._manifest_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read(self, name: str) -> bytes:
+        """还原一份报告，内容哈希不符时抛出 ValueError"""
+        manifest = self.manifest(name)
+        data = b''.join(gzip.decompress(self._object_path(digest).read_bytes())
+                        for digest in manifest['chunks'])
+        if hashlib.sha1(data).hexdigest() != manifest['sha1']:
+            raise ValueError(f'归档报告已损坏: {name}')
+        return data
+
+    def names(self) -> List[str]:
+        if not self.manifests.exists():
+            return []
+        return sorted(path.name[:-len('.json')] for path in self.manifests.glob('*.json'))
+
+    def remove(self, name: str):
+        """删除清单；不再被引用的块由 gc 清理"""
+        self._manifest_path(name).unlink(missing_ok=True)
+
+    def gc(self) -> int:
+        """删除没有清单引用的块，返回删除的块数"""
+        referenced = set()
+        for name in self.names():
+            referenced.update(self.manifest(name)['chunks'])
+        removed = 0
+        if self.objects.exists():
+            for path in self.objects.glob('*/*.gz'):
+                if path.name[:-len('.gz')] not in referenced:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def usage(self) -> Dict[str, int]:
+        """归档中的报告数、块数、压缩后字节数与原始字节数"""
+        names = self.names()
+        objects = list(self.objects.glob('*/*.gz')) if self.objects.exists() else []
+        return {
+            'reports': len(names),
+            'objects': len(objects),
+            'stored_bytes': sum(path.stat().st_size for path in objects),
+            'original_bytes': sum(self.manifest(name)['size'] for name in names),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='审计报告归档：列出、还原归档的报告')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE, help=f'归档目录 (默认: {DEFAULT_ARCHIVE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='列出归档的报告与占用空间')
+    restore = commands.add_parser('restore', help='还原一份报告')
+    restore.add_argument('name', help='报告文件名，如 audit_20250101_090000.json')
+    restore.add_argument('--output', help='输出路径（默认写到标准输出）')
+    commands.add_parser('gc', help='清理不再被引用的块')
+    args = parser.parse_args(argv)
+
+    archive = ReportArchive(args.archive)
+    if args.command == 'list':
+        for name in archive.names():
+            print(name)
+        usage = archive.usage()
+        print(f'📦 {usage["reports"]} 份报告，{usage["objects"]} 个块，'
+              f'压缩后 {usage["stored_bytes"]} 字节（原始 {usage["original_bytes"]} 字节）')
+    elif args.command == 'restore':
+        data = archive.read(args.name)
+        if args.output:
+            Path(args.output).write_bytes(data)
+        else:
+            sys.stdout.buffer.write(data)
+    elif args.command == 'gc':
+        print(f'🧹 已删除 {archive.gc()} 个块')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
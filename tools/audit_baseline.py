@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+审计基线 - Audit Baseline
+为每个问题生成稳定指纹（规则 ID + 规范化路径 + 节点键），并用基线文件抑制已知问题
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import FrozenSet, Iterable, Tuple, Union
+
+# 仓库中检入的默认基线文件（相对项目根目录）
+DEFAULT_BASELINE = 'metadata/audit_baseline.json'
+
+BASELINE_FORMAT_VERSION = 1
+
+
+def normalize_path(path: Union[str, Path, None], root: Union[str, Path]) -> str:
+    """返回相对项目根目录的 POSIX 路径，使指纹与检出位置无关"""
+    if path is None:
+        return ''
+    path = Path(path)
+    try:
+        path = path.resolve().relative_to(Path(root).resolve())
+    except ValueError:
+        pass  # 项目外或已是相对路径
+    return path.as_posix()
+
+
+def is_hidden_path(path: str) -> bool:
+    """规范化路径是否位于以 . 开头的目录中（.git、.pytest_cache、.cache 等本地生成的目录）"""
+    return any(part.startswith('.') for part in path.split('/')[:-1])
+
+
+def fingerprint(rule_id: str, path: str, key: str = '') -> str:
+    """由规则 ID、规范化路径和节点键计算指纹，与描述文字和行号无关"""
+    digest = hashlib.sha1(f'{rule_id}\0{path}\0{key}'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class Baseline:
+    """已知问题集合，按指纹做 O(1) 查找"""
+
+    def __init__(self, fingerprints: Iterable[str] = ()):
+        self.fingerprints: FrozenSet[str] = frozenset(fingerprints)
+
+    def __contains__(self, issue_fingerprint: str) -> bool:
+        return issue_fingerprint in self.fingerprints
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'Baseline':
+        """读取基线文件，文件不存在时返回空基线"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format_version') != BASELINE_FORMAT_VERSION:
+            raise ValueError(f'不支持的基线格式版本: {data.get("format_version")}')
+        return cls(entry[0] for entry in data.get('findings', []))
+
+    @staticmethod
+    def save(path: Union[str, Path], entries: Iterable[Tuple[str, str, str, str, str]]) -> int:
+        """写入基线文件，返回条目数
+
+        条目为 (指纹, 优先级, 规则 ID, 路径, 节点键)。每个条目占一行并按指纹排序，
+        便于在代码评审中查看基线的增减。隐藏目录中的问题只存在于本地检出，不写入基线。
+        """
+        entries = sorted({entry for entry in entries if not is_hidden_path(entry[3])})
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [json.dumps(list(entry), ensure_ascii=False) for entry in entries]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f'"format_version": {BASELINE_FORMAT_VERSION},\n')
+            f.write('"findings": [\n')
+            f.write(',\n'.join(lines))
+            f.write('\n]\n}\n')
+        return len(entries)
+
+    def fixed(self, seen: Iterable[str]) -> int:
+        """基线中本次未再出现的问题数（可运行 --update-baseline 收紧基线）"""
+        return len(self.fingerprints.difference(seen))
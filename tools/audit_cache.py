@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+审计结果缓存 - Audit Finding Cache
+按文件内容哈希和规则版本哈希缓存单文件检查结果，未变化的文件直接重放问题、统计和 handler 图事件
+"""
+
+import hashlib
+import inspect
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    from tools.audit_baseline import normalize_path
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from audit_baseline import normalize_path
+
+# 默认缓存文件（相对项目根目录，.cache/ 已在 .gitignore 中）
+DEFAULT_CACHE = '.cache/audit_findings.json'
+
+CACHE_FORMAT_VERSION = 2
+
+# 可直接写入版本哈希的常量类型
+PLAIN_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def stable_repr(value: Any) -> str:
+    """与字符串哈希随机化和对象地址无关的常量表示"""
+    if isinstance(value, PLAIN_TYPES):
+        return repr(value)
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(stable_repr(item) for item in value)) + '}'
+    if isinstance(value, dict):
+        items = sorted((stable_repr(k), stable_repr(v)) for k, v in value.items())
+        return '{' + ', '.join(f'{k}: {v}' for k, v in items) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(stable_repr(item) for item in value) + ']'
+    if isinstance(value, re.Pattern):
+        return f're({value.pattern!r}, {value.flags})'
+    return type(value).__qualname__
+
+
+def _code_names(code) -> Iterator[str]:
+    """函数体（含推导式、生成器表达式等嵌套代码）引用的全局名称"""
+    yield from code.co_names
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _code_names(const)
+
+
+def source_version(*objects: Any) -> str:
+    """对象源码及其引用的同模块函数、类和常量的哈希
+
+    只沿这些对象所在的模块展开引用，标准库与第三方代码不计入。
+    """
+    modules = {getattr(obj, '__module__', None) for obj in objects}
+    parts: List[str] = []
+    seen: Set[int] = set()
+    pending = list(objects)
+    while pending:
+        obj = pending.pop(0)
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            parts.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            parts.append(getattr(obj, '__qualname__', type(obj).__qualname__))
+            continue
+        if getattr(obj, '__module__', None) not in modules:
+            continue
+        if inspect.isclass(obj):
+            functions = [member for member in vars(obj).values() if inspect.isfunction(member)]
+        else:
+            functions = [obj] if inspect.isfunction(obj) else []
+        for function in functions:
+            # 默认参数在定义时求值（如 min_confidence=ENTROPY_MIN_CONFIDENCE），源码中只有常量名
+            parts.append(f'{function.__qualname__}:{stable_repr(function.__defaults__ or ())}'
+                         f':{stable_repr(function.__kwdefaults__ or {})}')
+            for name in _code_names(function.__code__):
+                if name not in function.__globals__:
+                    continue
+                value = function.__globals__[name]
+                if inspect.isfunction(value) or inspect.isclass(value):
+                    pending.append(value)
+                elif not inspect.ismodule(value):
+                    parts.append(f'{name}={stable_repr(value)}')
+    return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def rule_version(rule: Any) -> str:
+    """规则版本：规则函数、其引用的常量和辅助函数以及 depends 的源码"""
+    return source_version(rule.check, *rule.depends) + ':' + ','.join(rule.node_types)
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+def file_hash(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """按块读取文件计算内容哈希，结果与 content_hash(文件内容) 相同，不把整个文件读入内存"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _BucketStats:
+    """把 stats[key] += n 记录到当前规则的统计增量中"""
+
+    def __init__(self, recorder: 'RuleRecorder'):
+        self.recorder = recorder
+
+    def __getitem__(self, key: str) -> int:
+        return self.recorder.bucket()['stats'].get(key, 0)
+
+    def __setitem__(self, key: str, value: int):
+        self.recorder.bucket()['stats'][key] = value
+
+
+class RuleRecorder:
+    """规则运行期间按规则分桶记录问题、统计增量与 handler 图事件
+
+    作为 FileContext 的 add_issue/stats 和 HandlerGraph.journal 使用，
+    记录完成后由审计器按规则顺序重放，并写入缓存。
+    """
+
+    def __init__(self):
+        self.current = ''
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.stats = _BucketStats(self)
+
+    def begin(self, rule_id: str):
+        self.current = rule_id
+
+    def bucket(self) -> Dict[str, Any]:
+        bucket = self.buckets.get(self.current)
+        if bucket is None:
+            bucket = self.buckets[self.current] = empty_record()
+        return bucket
+
+    def add_issue(self, priority: str, description: str, suggestion: str,
+                  rule_id: str = 'general', path: Any = None, key: str = '',
+                  fields: Optional[Dict[str, Any]] = None):
+        # 问题总是属于被检查的文件，路径在重放时补回；模板字段原样保存
+        self.bucket()['issues'].append([priority, description, suggestion, rule_id, key, fields])
+
+    def append(self, event: List[Any]):
+        """HandlerGraph.journal 接口"""
+        self.bucket()['events'].append(event)
+
+    def records(self, rule_ids: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """每条规则的输出，未产生任何输出的规则返回空记录"""
+        return {rule_id: self.buckets.get(rule_id) or empty_record() for rule_id in rule_ids}
+
+
+def empty_record() -> Dict[str, Any]:
+    return {'issues': [], 'stats': {}, 'events': []}
+
+
+class FindingCache:
+    """单文件检查结果缓存
+
+    条目按规范化路径存放，包含内容哈希以及每条规则的版本和输出。
+    文件内容变化时该文件的全部结果失效；规则变化时只有该规则的结果失效。
+    engine_version 覆盖节点遍历与节点键的生成逻辑，变化时整个缓存失效。
+    """
+
+    def __init__(self, path: Union[str, Path], root: Union[str, Path], engine_version: str):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.engine_version = engine_version
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return  # 缓存不存在或已损坏时从头开始
+        if data.get('format_version') == CACHE_FORMAT_VERSION and data.get('engine') == self.engine_version:
+            self.files = data.get('files', {})
+
+    def lookup(self, path: Path, digest: str,
+               versions: Dict[str, str]) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+        """返回 (可直接重放的规则输出, 需要重新运行的规则)"""
+        entry = self.files.get(normalize_path(path, self.root))
+        cached = entry['rules'] if entry and entry['sha1'] == digest else {}
+        fresh = {
+            rule_id: cached[rule_id] for rule_id, version in versions.items()
+            if rule_id in cached and cached[rule_id]['version'] == version
+        }
+        stale = set(versions) - set(fresh)
+        self.hits += len(fresh)
+        self.misses += len(stale)
+        return fresh, stale
+
+    def store(self, path: Path, digest: str, versions: Dict[str, str],
+              records: Dict[str, Dict[str, Any]]):
+        key = normalize_path(path, self.root)
+        entry = self.files.get(key)
+        if not entry or entry['sha1'] != digest:
+            entry = self.files[key] = {'sha1': digest, 'rules': {}}
+        for rule_id, record in records.items():
+            entry['rules'][rule_id] = {'version': versions[rule_id], **record}
+
+    def save(self):
+        """写回缓存，丢弃已删除文件的条目"""
+        files = {key: entry for key, entry in self.files.items() if (self.root / key).exists()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'format_version': CACHE_FORMAT_VERSION, 'engine': self.engine_version, 'files': files}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+    def report(self) -> Dict[str, Any]:
+        return {'path': str(self.path), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Per-file feature vectors for the basic audit in ``audit_report.py``.
+
+Each playbook and example vars file is reduced to a small tuple of booleans
+and counts (gather_facts, check_mode, no_log, vault_ usage, FQCN calls,
+Chinese task names, sensitive patterns). ``AuditCollector`` derives both its
+statistics and its issues from these vectors, so the scans run once per file.
+
+``FeatureCache`` stores the vectors in ``.cache/audit_features.json`` keyed
+by content hash; the cache is discarded when the extractor code changes.
+Cache misses are grouped into per-category work units for ``extract_unit``,
+which runs in a worker process when the audit is started with ``--jobs``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    from tools.audit_cache import source_version
+    from tools.secret_scanner import DEFAULT_SCANNER, SecretScanner
+except ImportError:  # running as a script puts tools/ on sys.path
+    from audit_cache import source_version
+    from secret_scanner import DEFAULT_SCANNER, SecretScanner
+
+DEFAULT_FEATURE_CACHE = ".cache/audit_features.json"
+
+SENSITIVE_PATTERN = re.compile(
+    r"password\s*:|token\s*:|secret\s*:|api_key\s*:|credentials\s*:|DATABASE_URL|db_password",
+    re.IGNORECASE,
+)
+# Module calls like ansible.builtin.*, community.*, etc.
+FQCN_PATTERN = re.compile(r"ansible\.builtin\.|community\.|amazon\.|azure\.|google\.")
+# CJK characters in a name field
+CJK_NAME_PATTERN = re.compile(r"name:\s*[^#\n]*[\u4e00-\u9fff]")
+# A playbook needs more than this many Chinese names to count as localized
+MIN_CHINESE_NAMES = 3
+
+
+class PlaybookFeatures(NamedTuple):
+    gather_facts: bool
+    check_mode: bool
+    no_log: bool
+    vault_vars: bool
+    fqcn: bool
+    sensitive: bool
+    chinese_names: int
+
+    @property
+    def has_chinese_names(self) -> bool:
+        return self.chinese_names > MIN_CHINESE_NAMES
+
+
+class VarsFeatures(NamedTuple):
+    warning_header: bool
+    sensitive_values: bool
+
+
+def playbook_features(content: str) -> PlaybookFeatures:
+    """Extract the style and security features of a playbook."""
+    no_log = "no_log:" in content
+    return PlaybookFeatures(
+        gather_facts="gather_facts:" in content,
+        check_mode="check_mode:" in content,
+        no_log=no_log,
+        vault_vars="vault_" in content,
+        fqcn=FQCN_PATTERN.search(content) is not None,
+        # Only needed when no_log is missing
+        sensitive=not no_log and SENSITIVE_PATTERN.search(content) is not None,
+        chinese_names=len(CJK_NAME_PATTERN.findall(content)),
+    )
+
+
+def vars_features(content: str) -> VarsFeatures:
+    """Extract the features of an example vars file."""
+    return VarsFeatures(
+        warning_header="⚠" in content,
+        sensitive_values=bool(DEFAULT_SCANNER.scan_text(content)),
+    )
+
+
+# Feature kind -> (extractor, vector type)
+EXTRACTORS = {
+    "playbook": (playbook_features, PlaybookFeatures),
+    "vars": (vars_features, VarsFeatures),
+}
+
+# (path, kind, file content) to extract in a worker
+WorkItem = Tuple[str, str, bytes]
+
+
+def extract_unit(unit: List[WorkItem]) -> List[Union[Tuple[Any, ...], str]]:
+    """Extract the features of every file in a work unit.
+
+    Returns one entry per file, in order: the feature vector, or the error
+    message if the content could not be decoded.
+    """
+    results: List[Union[Tuple[Any, ...], str]] = []
+    for _, kind, data in unit:
+        extract, _ = EXTRACTORS[kind]
+        try:
+            results.append(extract(data.decode("utf-8")))
+        except Exception as e:
+            results.append(str(e))
+    return results
+
+
+def extractor_version() -> str:
+    """Hash of the extractors, the patterns they use and the secret scanner."""
+    return source_version(playbook_features, vars_features, PlaybookFeatures, VarsFeatures, SecretScanner)
+
+
+class FeatureCache:
+    """Feature vectors keyed by root-relative path and content SHA-1."""
+
+    def __init__(self, path: Union[str, Path], root: Union[str, Path]):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.version = extractor_version()
+        self.files: Dict[str, Tuple[str, list]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # missing or corrupt cache: start empty
+        if data.get("version") == self.version:
+            self.files = {key: tuple(entry) for key, entry in data.get("files", {}).items()}
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def lookup(self, path: Path, kind: str) -> Tuple[str, bytes, Optional[Tuple[Any, ...]]]:
+        """Read path and return (digest, content, cached features or ``None``).
+
+        Read errors propagate to the caller.
+        """
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        entry = self.files.get(self._key(path))
+        if entry is not None and entry[0] == digest:
+            self.hits += 1
+            _, vector_type = EXTRACTORS[kind]
+            return digest, data, vector_type(*entry[1])
+        self.misses += 1
+        return digest, data, None
+
+    def store(self, path: Path, digest: str, features: Tuple[Any, ...]) -> None:
+        self.files[self._key(path)] = (digest, list(features))
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache back if anything changed, dropping deleted files."""
+        files = {key: entry for key, entry in self.files.items() if (self.root / key).exists()}
+        if not self._dirty and len(files) == len(self.files):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data: Dict[str, Any] = {"version": self.version, "files": files}
+        self.path.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        self._dirty = False
+
+    def report(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "hits": self.hits, "misses": self.misses}
@@ -1,6 +1,7 @@
 #!/bin/bash
 # 审计监控脚本 - Audit Monitoring Script
 # 用于定期运行审计并跟踪质量趋势
+# 指标、对比、告警与每日摘要由 tools/audit_trend.py（SQLite 趋势库）处理
 
 set -e
 
@@ -18,204 +19,55 @@ echo ""
 
 # 运行完整审计
 echo "🔍 执行全面审计..."
-JSON_REPORT="$REPORT_DIR/audit_${TIMESTAMP}.json"
-MD_REPORT="$REPORT_DIR/audit_${TIMESTAMP}.md"
+JSON_REPORT="reports/audit_history/audit_${TIMESTAMP}.json"
+MD_REPORT="reports/audit_history/audit_${TIMESTAMP}.md"
+TREND_DB="reports/audit_history/audit_trend.sqlite3"
+DAILY_SUMMARY="reports/audit_history/daily_summary_${DATE_ONLY}.md"
 
 cd "$PROJECT_ROOT"
+# 有严重问题时审计返回非零，是否告警由趋势库根据阈值判断
 venv/bin/python tools/comprehensive_audit.py \
+    --project-root . \
     --output "$MD_REPORT" \
-    --json "$JSON_REPORT"
+    --json "$JSON_REPORT" || true
 
-# 提取关键指标
-if [ -f "$JSON_REPORT" ]; then
-    CRITICAL=$(python3 -c "import json; print(json.load(open('$JSON_REPORT'))['summary']['critical_issues'])")
-    HIGH=$(python3 -c "import json; print(json.load(open('$JSON_REPORT'))['summary']['high_issues'])")
-    MEDIUM=$(python3 -c "import json; print(json.load(open('$JSON_REPORT'))['summary']['medium_issues'])")
-    LOW=$(python3 -c "import json; print(json.load(open('$JSON_REPORT'))['summary']['low_issues'])")
-    TOTAL=$(python3 -c "import json; print(json.load(open('$JSON_REPORT'))['summary']['total_issues'])")
-    
-    echo ""
-    echo "📈 当前审计结果:"
-    echo "  🔴 Critical: $CRITICAL"
-    echo "  🟠 High:     $HIGH"
-    echo "  🟡 Medium:   $MEDIUM"
-    echo "  🟢 Low:      $LOW"
-    echo "  📝 Total:    $TOTAL"
-    echo ""
-    
-    # 检查是否有历史数据
-    LATEST_HISTORY="$REPORT_DIR/latest_metrics.txt"
-    if [ -f "$LATEST_HISTORY" ]; then
-        # 读取上次的数据
-        source "$LATEST_HISTORY"
-        
-        echo "📊 与上次审计对比:"
-        
-        # 计算差异
-        CRITICAL_DIFF=$((CRITICAL - PREV_CRITICAL))
-        HIGH_DIFF=$((HIGH - PREV_HIGH))
-        MEDIUM_DIFF=$((MEDIUM - PREV_MEDIUM))
-        LOW_DIFF=$((LOW - PREV_LOW))
-        TOTAL_DIFF=$((TOTAL - PREV_TOTAL))
-        
-        # 显示趋势
-        show_trend() {
-            local value=$1
-            local label=$2
-            if [ $value -lt 0 ]; then
-                echo "  ✅ $label: $value (改善)"
-            elif [ $value -gt 0 ]; then
-                echo "  ⚠️  $label: +$value (增加)"
-            else
-                echo "  ➡️  $label: 无变化"
-            fi
-        }
-        
-        show_trend $CRITICAL_DIFF "Critical"
-        show_trend $HIGH_DIFF "High"
-        show_trend $MEDIUM_DIFF "Medium"
-        show_trend $LOW_DIFF "Low"
-        show_trend $TOTAL_DIFF "Total"
-        echo ""
-        
-        # 生成趋势报告
-        TREND_FILE="$REPORT_DIR/trend_${DATE_ONLY}.txt"
-        cat >> "$TREND_FILE" << EOF
-$TIMESTAMP,$CRITICAL,$HIGH,$MEDIUM,$LOW,$TOTAL
-EOF
-    fi
-    
-    # 保存当前指标
-    cat > "$LATEST_HISTORY" << EOF
-PREV_TIMESTAMP="$TIMESTAMP"
-PREV_CRITICAL=$CRITICAL
-PREV_HIGH=$HIGH
-PREV_MEDIUM=$MEDIUM
-PREV_LOW=$LOW
-PREV_TOTAL=$TOTAL
-EOF
-    
-    # 生成趋势图表数据（CSV 格式）
-    TREND_CSV="$REPORT_DIR/audit_trend.csv"
-    if [ ! -f "$TREND_CSV" ]; then
-        echo "timestamp,critical,high,medium,low,total" > "$TREND_CSV"
-    fi
-    echo "$TIMESTAMP,$CRITICAL,$HIGH,$MEDIUM,$LOW,$TOTAL" >> "$TREND_CSV"
-    
-    # 检查是否需要告警
-    echo "🚨 检查告警条件..."
-    ALERT_TRIGGERED=0
-    ALERT_MESSAGE=""
-    
-    if [ $CRITICAL -gt 0 ]; then
-        ALERT_TRIGGERED=1
-        ALERT_MESSAGE="${ALERT_MESSAGE}\n⚠️  发现 $CRITICAL 个严重问题！请立即处理！"
-    fi
-    
-    if [ $HIGH -gt 50 ]; then
-        ALERT_TRIGGERED=1
-        ALERT_MESSAGE="${ALERT_MESSAGE}\n⚠️  High 级别问题超过 50 个（当前 $HIGH）"
-    fi
-    
-    if [ -f "$LATEST_HISTORY" ] && [ $TOTAL_DIFF -gt 20 ]; then
-        ALERT_TRIGGERED=1
-        ALERT_MESSAGE="${ALERT_MESSAGE}\n⚠️  问题总数增加超过 20 个（+$TOTAL_DIFF）"
-    fi
-    
-    if [ $ALERT_TRIGGERED -eq 1 ]; then
-        echo ""
-        echo "🚨 告警触发！"
-        echo -e "$ALERT_MESSAGE"
-        echo ""
-        
-        # 保存告警日志
-        ALERT_LOG="$REPORT_DIR/alerts.log"
-        echo "[$TIMESTAMP] ALERT TRIGGERED" >> "$ALERT_LOG"
-        echo -e "$ALERT_MESSAGE" >> "$ALERT_LOG"
-        echo "" >> "$ALERT_LOG"
-        
-        # 可以在这里集成通知系统（Slack、Email 等）
-        # 示例：
-        # if command -v mail &> /dev/null; then
-        #     echo -e "审计告警\n$ALERT_MESSAGE\n\n查看详情: $MD_REPORT" | \
-        #         mail -s "[Ansible Audit] 质量告警" admin@example.com
-        # fi
-        
-        echo "告警已记录到: $ALERT_LOG"
-    else
-        echo "  ✅ 无告警触发"
-    fi
-    
-    echo ""
-    
-    # 生成每日摘要
-    DAILY_SUMMARY="$REPORT_DIR/daily_summary_${DATE_ONLY}.md"
-    cat > "$DAILY_SUMMARY" << EOF
-# 每日审计摘要 - $DATE_ONLY
+if [ ! -f "$JSON_REPORT" ]; then
+    echo "❌ 审计失败：未生成报告文件"
+    exit 1
+fi
 
-## 最新审计 ($TIMESTAMP)
+# 首次使用趋势库时导入旧版 CSV 历史
+LEGACY_CSV="reports/audit_history/audit_trend.csv"
+if [ -f "$LEGACY_CSV" ] && [ ! -f "$TREND_DB" ]; then
+    venv/bin/python tools/audit_trend.py --db "$TREND_DB" import-csv "$LEGACY_CSV"
+fi
 
-### 问题统计
-- 🔴 Critical: $CRITICAL
-- 🟠 High: $HIGH
-- 🟡 Medium: $MEDIUM
-- 🟢 Low: $LOW
-- 📝 Total: $TOTAL
+# 导入报告并输出对比、告警和每日摘要；退出码：2 有严重问题，1 High 问题过多，0 正常
+# 告警阈值可通过 AUDIT_THRESHOLDS 指定 YAML 文件
+THRESHOLD_ARGS=()
+if [ -n "$AUDIT_THRESHOLDS" ]; then
+    THRESHOLD_ARGS=(--thresholds "$AUDIT_THRESHOLDS")
+fi
+echo ""
+STATUS=0
+venv/bin/python tools/audit_trend.py --db "$TREND_DB" "${THRESHOLD_ARGS[@]}" ingest "$JSON_REPORT" \
+    --markdown "$MD_REPORT" \
+    --daily-summary "$DAILY_SUMMARY" || STATUS=$?
 
-### 详细报告
-- [JSON 报告]($JSON_REPORT)
-- [Markdown 报告]($MD_REPORT)
+echo ""
+echo "📄 报告已生成:"
+echo "  - JSON: $JSON_REPORT"
+echo "  - Markdown: $MD_REPORT"
+echo "  - 每日摘要: $DAILY_SUMMARY"
+echo "  - 趋势库: $TREND_DB"
 
-### 质量评分
-EOF
-    
-    # 计算质量评分（满分 100）
-    QUALITY_SCORE=$((100 - CRITICAL * 5 - HIGH * 2 - MEDIUM * 1))
-    if [ $QUALITY_SCORE -lt 0 ]; then
-        QUALITY_SCORE=0
-    fi
-    
-    echo "**${QUALITY_SCORE}/100**" >> "$DAILY_SUMMARY"
-    echo "" >> "$DAILY_SUMMARY"
-    
-    if [ $QUALITY_SCORE -ge 90 ]; then
-        echo "🏆 **优秀** - 代码质量优秀，继续保持！" >> "$DAILY_SUMMARY"
-    elif [ $QUALITY_SCORE -ge 70 ]; then
-        echo "✅ **良好** - 代码质量良好，还有提升空间。" >> "$DAILY_SUMMARY"
-    elif [ $QUALITY_SCORE -ge 50 ]; then
-        echo "⚠️  **需要改进** - 建议优先处理 Critical 和 High 问题。" >> "$DAILY_SUMMARY"
-    else
-        echo "🚨 **严重** - 存在大量问题，需要立即采取行动！" >> "$DAILY_SUMMARY"
-    fi
-    
-    echo ""
-    echo "📄 报告已生成:"
-    echo "  - JSON: $JSON_REPORT"
-    echo "  - Markdown: $MD_REPORT"
-    echo "  - 每日摘要: $DAILY_SUMMARY"
-    echo "  - 趋势数据: $TREND_CSV"
-    
-    # 清理旧报告（保留最近 30 天）
-    echo ""
-    echo "🧹 清理旧报告..."
-    find "$REPORT_DIR" -name "audit_*.json" -mtime +30 -delete
-    find "$REPORT_DIR" -name "audit_*.md" -mtime +30 -delete
-    echo "  ✓ 已删除 30 天前的报告"
-    
-    echo ""
-    echo "✅ 审计监控完成！"
-    echo ""
-    echo "质量评分: ${QUALITY_SCORE}/100"
-    
-    # 根据评分返回退出码
-    if [ $CRITICAL -gt 0 ]; then
-        exit 2  # 有严重问题
-    elif [ $HIGH -gt 50 ]; then
-        exit 1  # 有大量高优先级问题
-    else
-        exit 0  # 正常
-    fi
-else
-    echo "❌ 审计失败：未生成报告文件"
-    exit 1
-fi
+# 保留策略：30 天内保留完整报告；更早的报告压缩去重归档，记录合并为每日摘要，
+# 180 天前的每日摘要合并为每周摘要，归档保留一年（可用 AUDIT_RETENTION_ARGS 调整）
+echo ""
+echo "🧹 应用保留策略..."
+venv/bin/python tools/audit_trend.py --db "$TREND_DB" retention \
+    --history-dir reports/audit_history $AUDIT_RETENTION_ARGS
+
+echo ""
+echo "✅ 审计监控完成！"
+exit $STATUS
@@ -15,20 +15,78 @@ Generates Markdown report and optional JSON export.
 from __future__ import annotations
 
 import argparse
+import importlib.util
 import json
-import re
+import os
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    from tools.audit_features import (
+        DEFAULT_FEATURE_CACHE,
+        FeatureCache,
+        PlaybookFeatures,
+        VarsFeatures,
+        WorkItem,
+        extract_unit,
+    )
+    from tools.pytest_results import (
+        DEFAULT_RESULT_CACHE,
+        PLUGIN_NAME,
+        RESULTS_OPTION,
+        ResultCache,
+        TestRunResults,
+        inputs_digest,
+        read_coverage_total,
+        read_results,
+    )
+except ImportError:  # running as a script puts tools/ on sys.path
+    from audit_features import (
+        DEFAULT_FEATURE_CACHE,
+        FeatureCache,
+        PlaybookFeatures,
+        VarsFeatures,
+        WorkItem,
+        extract_unit,
+    )
+    from pytest_results import (
+        DEFAULT_RESULT_CACHE,
+        PLUGIN_NAME,
+        RESULTS_OPTION,
+        ResultCache,
+        TestRunResults,
+        inputs_digest,
+        read_coverage_total,
+        read_results,
+    )
+
+# Repository that provides the tools package, put on PYTHONPATH so pytest can load the plugin
+TOOLS_ROOT = Path(__file__).resolve().parents[1]
+TEST_TIMEOUT = 60
 
 
 class AuditCollector:
     """Collects audit information from playbooks and related files."""
 
-    def __init__(self, root: Path):
+    def __init__(self, root: Path, test_timeout: float = TEST_TIMEOUT, rerun_tests: bool = False, jobs: int = 1):
         self.root = Path(root)
+        self.jobs = jobs
+        self.test_timeout = test_timeout
+        self.rerun_tests = rerun_tests
+        self.test_cache = ResultCache(self.root / DEFAULT_RESULT_CACHE)
+        self.test_results: Optional[TestRunResults] = None
+        self.tests_from_cache = False
+        # "complete", "partial (timed out)", or how pytest ended before its summary
+        self.tests_status = ""
+        self.feature_cache = FeatureCache(self.root / DEFAULT_FEATURE_CACHE, self.root)
+        self.vars_files: List[Path] = []
+        # Feature vector, or the read error message, per playbook and vars file
+        self.features: Dict[Path, Union[PlaybookFeatures, VarsFeatures, str]] = {}
         self.categories = {}
         self.issues = {
             "critical": [],
@@ -45,18 +103,26 @@ class AuditCollector:
             "vars_with_warning": 0,
             "total_vars_files": 0,
             "coverage_percentage": 0,
+            "tests_total": 0,
+            "tests_passed": 0,
+            "tests_failed": 0,
+            "tests_skipped": 0,
         }
 
-    def scan(self) -> None:
+    def scan(self, run_tests: bool = True) -> None:
         """Run the complete audit scan."""
         self._find_playbooks()
+        self._find_vars_files()
+        self._extract_features()
         self._analyze_playbooks()
         self._analyze_vars()
-        self._run_tests()
+        self.feature_cache.save()
+        if run_tests:
+            self._run_tests()
 
     def _find_playbooks(self) -> None:
-        """Find all playbook.yml files and their categories."""
-        playbooks = self.root.glob("*/*/playbook.yml")
+        """Find all playbook.yml files and their categories, in sorted order."""
+        playbooks = sorted(self.root.glob("*/*/playbook.yml"))
         for pb in playbooks:
             category = pb.parent.parent.name
             if category not in self.categories:
@@ -67,26 +133,69 @@ class AuditCollector:
             self.categories[category]["playbooks"].append(pb)
             self.stats["total_playbooks"] += 1
 
+    def _find_vars_files(self) -> None:
+        """Find all vars/example_vars.yml files, in sorted order."""
+        self.vars_files = sorted(self.root.glob("*/*/vars/example_vars.yml"))
+        self.stats["total_vars_files"] = len(self.vars_files)
+
+    def _extract_features(self) -> None:
+        """Look up cached feature vectors and extract the rest per category.
+
+        Each category's uncached files form one work unit. With ``jobs`` > 1 the
+        units run in a process pool; results are stored by path and the checks
+        later walk the files in sorted order, so the report does not depend on
+        which worker finishes first.
+        """
+        files = [(pb, "playbook") for data in self.categories.values() for pb in data["playbooks"]]
+        files += [(var_file, "vars") for var_file in self.vars_files]
+        units: Dict[str, List[WorkItem]] = {}
+        digests: Dict[Path, str] = {}
+        for path, kind in files:
+            try:
+                digest, data, cached = self.feature_cache.lookup(path, kind)
+            except OSError as e:
+                self.features[path] = str(e)
+                continue
+            if cached is not None:
+                self.features[path] = cached
+            else:
+                digests[path] = digest
+                category = path.relative_to(self.root).parts[0]
+                units.setdefault(category, []).append((str(path), kind, data))
+
+        if self.jobs > 1 and len(units) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(extract_unit, units.values()))
+        else:
+            results = [extract_unit(unit) for unit in units.values()]
+
+        for unit, unit_results in zip(units.values(), results):
+            for (name, _, _), features in zip(unit, unit_results):
+                path = Path(name)
+                self.features[path] = features
+                if not isinstance(features, str):
+                    self.feature_cache.store(path, digests[path], features)
+
     def _analyze_playbooks(self) -> None:
         """Analyze playbook structure and style."""
         for category, data in self.categories.items():
             for pb_path in data["playbooks"]:
-                try:
-                    content = pb_path.read_text(encoding="utf-8")
-                    self._check_playbook_style(pb_path, content)
-                except Exception as e:
+                features = self.features[pb_path]
+                if isinstance(features, str):
                     self.issues["medium"].append({
                         "file": str(pb_path),
-                        "issue": f"Failed to read playbook: {e}",
+                        "issue": f"Failed to read playbook: {features}",
                     })
+                    continue
+                self._check_playbook_style(pb_path, features)
 
-    def _check_playbook_style(self, pb_path: Path, content: str) -> None:
+    def _check_playbook_style(self, pb_path: Path, features: PlaybookFeatures) -> None:
         """Check individual playbook for style issues."""
         category = pb_path.parent.parent.name
         module = pb_path.parent.name
 
         # Check for gather_facts
-        if "gather_facts:" in content:
+        if features.gather_facts:
             self.stats["playbooks_with_gather_facts"] += 1
         else:
             self.issues["high"].append({
@@ -98,13 +207,13 @@ class AuditCollector:
             })
 
         # Check for check_mode
-        if "check_mode:" in content:
+        if features.check_mode:
             self.stats["playbooks_with_check_mode"] += 1
 
         # Check for no_log
-        if "no_log:" in content:
+        if features.no_log:
             self.stats["playbooks_with_no_log"] += 1
-        elif self._contains_sensitive_patterns(content):
+        elif features.sensitive:
             self.issues["high"].append({
                 "file": str(pb_path),
                 "issue": "Contains sensitive data patterns but no no_log protection",
@@ -114,11 +223,11 @@ class AuditCollector:
             })
 
         # Check for vault_ prefix usage
-        if "vault_" in content:
+        if features.vault_vars:
             self.stats["playbooks_with_vault_vars"] += 1
 
         # Check for FQCN usage
-        if not self._has_fqcn(content):
+        if not features.fqcn:
             self.issues["medium"].append({
                 "file": str(pb_path),
                 "issue": "Some tasks may not use FQCN (Fully Qualified Collection Name)",
@@ -128,7 +237,7 @@ class AuditCollector:
             })
 
         # Check for Chinese task names
-        if not self._has_chinese_names(content):
+        if not features.has_chinese_names:
             self.issues["low"].append({
                 "file": str(pb_path),
                 "issue": "Missing Chinese task names",
@@ -136,56 +245,25 @@ class AuditCollector:
                 "module": module,
             })
 
-    def _contains_sensitive_patterns(self, content: str) -> bool:
-        """Check if content contains sensitive data patterns."""
-        patterns = [
-            r"password\s*:",
-            r"token\s*:",
-            r"secret\s*:",
-            r"api_key\s*:",
-            r"credentials\s*:",
-            r"DATABASE_URL",
-            r"db_password",
-        ]
-        for pattern in patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
-
-    def _has_fqcn(self, content: str) -> bool:
-        """Check if content uses FQCN module calls."""
-        # Look for patterns like ansible.builtin.*, community.*, etc.
-        fqcn_pattern = r"ansible\.builtin\.|community\.|amazon\.|azure\.|google\."
-        return bool(re.search(fqcn_pattern, content))
-
-    def _has_chinese_names(self, content: str) -> bool:
-        """Check if content has Chinese task names."""
-        # Look for CJK Unicode characters in name fields
-        cjk_pattern = r"name:\s*[^#\n]*[\u4e00-\u9fff]"
-        matches = re.findall(cjk_pattern, content)
-        return len(matches) > 3  # At least some Chinese names
-
     def _analyze_vars(self) -> None:
         """Analyze vars/example_vars.yml files."""
-        vars_files = self.root.glob("*/*/vars/example_vars.yml")
-        for var_file in vars_files:
-            self.stats["total_vars_files"] += 1
-            try:
-                content = var_file.read_text(encoding="utf-8")
-                self._check_vars_style(var_file, content)
-            except Exception as e:
+        for var_file in self.vars_files:
+            features = self.features[var_file]
+            if isinstance(features, str):
                 self.issues["medium"].append({
                     "file": str(var_file),
-                    "issue": f"Failed to read vars file: {e}",
+                    "issue": f"Failed to read vars file: {features}",
                 })
+                continue
+            self._check_vars_style(var_file, features)
 
-    def _check_vars_style(self, var_file: Path, content: str) -> None:
+    def _check_vars_style(self, var_file: Path, features: VarsFeatures) -> None:
         """Check individual vars file for style issues."""
         category = var_file.parent.parent.parent.name
         module = var_file.parent.parent.name
 
         # Check for warning header
-        if "⚠️" in content or "⚠" in content:
+        if features.warning_header:
             self.stats["vars_with_warning"] += 1
         else:
             self.issues["high"].append({
@@ -197,7 +275,7 @@ class AuditCollector:
             })
 
         # Check for actual sensitive values (should not exist)
-        if self._has_actual_sensitive_values(content):
+        if features.sensitive_values:
             self.issues["critical"].append({
                 "file": str(var_file),
                 "issue": "Contains actual sensitive values instead of placeholders",
@@ -206,57 +284,111 @@ class AuditCollector:
                 "suggestion": "Replace all real passwords, tokens, etc. with placeholders or vault_ prefixed variables",
             })
 
-    def _has_actual_sensitive_values(self, content: str) -> bool:
-        """Check for suspicious patterns that look like real values."""
-        # This is a heuristic check - look for things that don't look like placeholders
-        suspicious_patterns = [
-            r"password:\s*(?!vault_|placeholder|example|test|demo)['\"]?[a-zA-Z0-9@#$%]{8,}['\"]?",
-            r"api_key:\s*(?!vault_|placeholder|example)['\"]?[A-Za-z0-9_-]{20,}['\"]?",
-            r"secret_key:\s*(?!vault_|placeholder)['\"]?.{20,}['\"]?",
-        ]
-        for pattern in suspicious_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
-
     def _run_tests(self) -> None:
-        """Run pytest and capture coverage results."""
-        try:
-            result = subprocess.run(
-                [
-                    sys.executable,
-                    "-m",
-                    "pytest",
-                    "--maxfail=1",
-                    "--disable-warnings",
-                    "--cov=.",
-                    "--cov-report=term-missing",
-                    "-q",
-                ],
-                cwd=self.root,
-                capture_output=True,
-                text=True,
-                timeout=60,
-            )
-
-            # Try to extract coverage percentage
-            if "--cov" in str(result.stdout) or "--cov" in str(result.stderr):
-                output = result.stdout + result.stderr
-                match = re.search(r"(\d+)%", output)
-                if match:
-                    self.stats["coverage_percentage"] = int(match.group(1))
-        except subprocess.TimeoutExpired:
-            self.issues["medium"].append({
-                "file": "pytest execution",
-                "issue": "Coverage tests timed out",
-            })
-        except Exception as e:
-            # Silently skip if pytest or coverage not available
-            if "cov" not in str(e).lower():
+        """Run pytest with the results plugin and read outcomes and coverage.
+
+        Outcomes are streamed to an NDJSON file by ``tools.pytest_results``, so a
+        run that hits the timeout still reports every test finished before it.
+        Coverage comes from pytest-cov's JSON report when pytest-cov is installed.
+        A complete run is cached under the digest of the test inputs and reused
+        until a test, tool source or content file changes, unless ``rerun_tests``.
+        """
+        with_coverage = importlib.util.find_spec("pytest_cov") is not None
+        key = inputs_digest(self.root, extra=(sys.version, f"coverage={with_coverage}"))
+        cached = None if self.rerun_tests else self.test_cache.load(key)
+        if cached is not None:
+            self.tests_from_cache = True
+            self._record_test_results(*cached, timed_out=False)
+            return
+
+        with tempfile.TemporaryDirectory() as tmp:
+            results_path = Path(tmp) / "results.ndjson"
+            coverage_path = Path(tmp) / "coverage.json"
+            command = [
+                sys.executable,
+                "-m",
+                "pytest",
+                "--disable-warnings",
+                "-q",
+                "-p",
+                PLUGIN_NAME,
+                f"{RESULTS_OPTION}={results_path}",
+            ]
+            if with_coverage:
+                command += ["--cov=.", f"--cov-report=json:{coverage_path}"]
+            pythonpath = [str(TOOLS_ROOT), os.environ.get("PYTHONPATH", "")]
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, pythonpath)))
+
+            timed_out = False
+            completed = None
+            try:
+                completed = subprocess.run(
+                    command,
+                    cwd=self.root,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.test_timeout,
+                    env=env,
+                )
+            except subprocess.TimeoutExpired:
+                timed_out = True
+            except OSError as e:
                 self.issues["low"].append({
                     "file": "pytest execution",
                     "issue": f"Could not run tests: {e}",
                 })
+                return
+
+            results = read_results(results_path)
+            coverage = read_coverage_total(coverage_path)
+            if results.complete and not timed_out:
+                self.test_cache.store(key, results_path, coverage)
+
+        self._record_test_results(results, coverage, timed_out, completed)
+
+    def _record_test_results(
+        self,
+        results: TestRunResults,
+        coverage: Optional[float],
+        timed_out: bool,
+        completed: Optional[subprocess.CompletedProcess] = None,
+    ) -> None:
+        """Fill test statistics and issues from a fresh or cached run."""
+        self.test_results = results
+        self.stats["tests_total"] = results.total
+        self.stats["tests_passed"] = results.outcomes["passed"]
+        self.stats["tests_failed"] = results.outcomes["failed"] + results.outcomes["error"]
+        self.stats["tests_skipped"] = results.outcomes["skipped"]
+        if coverage is not None:
+            self.stats["coverage_percentage"] = int(coverage)
+
+        if results.complete:
+            self.tests_status = "complete"
+        elif timed_out:
+            self.tests_status = "partial (timed out)"
+            self.issues["medium"].append({
+                "file": "pytest execution",
+                "issue": f"Tests timed out after {self.test_timeout}s; "
+                         f"kept partial results for {results.total} tests",
+            })
+        else:
+            # pytest ended without its summary: not installed, a crash or an interrupted session
+            returncode = completed.returncode if completed is not None else None
+            stderr = (completed.stderr or "").strip().splitlines() if completed is not None else []
+            self.tests_status = f"{'partial' if results.total else 'not run'} (pytest exited with code {returncode})"
+            self.issues["medium"].append({
+                "file": "pytest execution",
+                "issue": f"pytest exited with code {returncode} before finishing; "
+                         f"kept results for {results.total} tests",
+                "suggestion": stderr[-1] if stderr else "Run pytest directly to see why it stopped",
+            })
+        if results.failures or results.collect_errors:
+            failing = results.failures + results.collect_errors
+            self.issues["high"].append({
+                "file": failing[0],
+                "issue": f"{len(failing)} tests failed or could not be collected",
+                "suggestion": ", ".join(failing[:5]),
+            })
 
     def generate_report(self) -> str:
         """Generate Markdown report from audit results."""
@@ -304,6 +436,17 @@ class AuditCollector:
             "### 测试覆盖 (Test Coverage)",
             f"- Code coverage: {self.stats['coverage_percentage']}%",
         ]
+        if self.test_results is not None:
+            results = self.test_results
+            status = self.tests_status
+            if self.tests_from_cache:
+                status += ", cached"
+            lines.append(
+                f"- Tests: {self.stats['tests_passed']} passed, {self.stats['tests_failed']} failed, "
+                f"{self.stats['tests_skipped']} skipped ({status})"
+            )
+            for nodeid, seconds in results.slowest(3):
+                lines.append(f"  - Slow: `{nodeid}` {seconds:.2f}s")
         return "\n".join(lines)
 
     def _generate_issues_section(self) -> str:
@@ -404,7 +547,12 @@ class AuditCollector:
         return {
             "timestamp": datetime.now().isoformat(),
             "statistics": self.stats,
+            "tests": (
+                {**self.test_results.to_dict(), "status": self.tests_status, "cached": self.tests_from_cache}
+                if self.test_results else None
+            ),
             "issues": self.issues,
+            "feature_cache": self.feature_cache.report(),
             "categories": {
                 cat: {
                     "playbooks": [str(p) for p in data["playbooks"]],
@@ -442,6 +590,23 @@ def main() -> int:
         action="store_true",
         help="Skip pytest coverage collection",
     )
+    parser.add_argument(
+        "--test-timeout",
+        type=float,
+        default=TEST_TIMEOUT,
+        help=f"Seconds before the test run is stopped; finished results are kept (default: {TEST_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for per-category file scanning (default: 1)",
+    )
+    parser.add_argument(
+        "--rerun-tests",
+        action="store_true",
+        help="Run the tests even if no test input changed since the cached run",
+    )
 
     args = parser.parse_args()
 
@@ -449,14 +614,13 @@ def main() -> int:
     args.output.parent.mkdir(parents=True, exist_ok=True)
 
     # Run audit
-    collector = AuditCollector(args.root)
-    if not args.skip_tests:
-        collector.scan()
-    else:
-        # Run only file scanning, skip tests
-        collector._find_playbooks()
-        collector._analyze_playbooks()
-        collector._analyze_vars()
+    collector = AuditCollector(
+        args.root,
+        test_timeout=args.test_timeout,
+        rerun_tests=args.rerun_tests,
+        jobs=args.jobs,
+    )
+    collector.scan(run_tests=not args.skip_tests)
 
     # Write Markdown report
     report = collector.generate_report()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+审计规则引擎 - Audit Rule Engine
+规则声明自己关心的节点类型，引擎对每个已解析文件只遍历一次并分发给所有相关规则
+"""
+
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    from tools.handler_graph import HandlerGraph, file_scope
+    from tools.markdown_scan import MarkdownStructure, parse_markdown
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from handler_graph import HandlerGraph, file_scope
+    from markdown_scan import MarkdownStructure, parse_markdown
+
+# 引擎会分发的节点类型；included_* 来自 playbook 之外的任务文件（roles/*/tasks、handlers/main.yml）
+NODE_TYPES = ('play', 'task', 'handler', 'included_task', 'included_handler', 'vars_file', 'readme')
+
+# play 中包含任务列表的键（按遍历顺序）
+TASK_SECTIONS = ('tasks', 'pre_tasks', 'post_tasks')
+
+# 超出时间预算后，昂贵检查每 SAMPLE_EVERY 项只检查 1 项
+SAMPLE_EVERY = 10
+# 超出预算该倍数后，昂贵检查完全跳过
+HARD_LIMIT_FACTOR = 1.5
+
+CHINESE_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+@dataclass
+class FileContext:
+    """单个文件的检查上下文，规则通过它上报问题"""
+    path: Path
+    add_issue: Callable[..., None]
+    stats: Dict[str, int]
+    # 规则之间共享的单文件数据
+    facts: Dict[str, Any] = field(default_factory=dict)
+    # 整次审计共享的跨文件索引（如 handler 通知图）
+    shared: Dict[str, Any] = field(default_factory=dict)
+    # 由引擎在分发前设置，用于生成问题指纹
+    rule_id: str = ''
+    node_key: str = ''
+    node_type: str = ''
+    # 启用结果缓存时：只运行这些规则，并由 recorder 按规则分桶记录输出
+    rules: Optional[Set[str]] = None
+    recorder: Optional[Any] = None
+
+    def begin(self, rule_id: str):
+        """切换当前规则"""
+        self.rule_id = rule_id
+        if self.recorder is not None:
+            self.recorder.begin(rule_id)
+
+    def report(self, priority: str, description: str, suggestion: str, detail: str = '', **fields: Any):
+        """上报当前规则在当前节点上的问题，detail 用于区分同一节点上的多个问题
+
+        description 与 suggestion 是 str.format 模板，{path} 与 fields 在渲染报告时才填入。
+        """
+        key = f'{self.node_key}#{detail}' if detail else self.node_key
+        self.add_issue(priority, description, suggestion, self.rule_id, self.path, key, fields)
+
+
+@dataclass
+class Rule:
+    """一条审计规则"""
+    rule_id: str
+    node_types: Tuple[str, ...]
+    check: Callable[[Any, FileContext], None]
+    description: str = ''
+    # 昂贵规则在超出时间预算后改为抽样
+    expensive: bool = False
+    # 影响规则输出的其他函数或类，其源码计入规则版本（见 audit_cache.rule_version）
+    depends: Tuple[Any, ...] = ()
+
+
+class RuleRegistry:
+    """规则注册表，按节点类型索引规则"""
+
+    def __init__(self):
+        self.rules: List[Rule] = []
+        self._by_type: Dict[str, List[Rule]] = defaultdict(list)
+
+    def register(self, rule: Rule) -> Rule:
+        """注册规则，同一节点类型下按注册顺序执行"""
+        for node_type in rule.node_types:
+            if node_type not in NODE_TYPES:
+                raise ValueError(f'未知节点类型: {node_type}')
+        if any(existing.rule_id == rule.rule_id for existing in self.rules):
+            raise ValueError(f'规则 ID 重复: {rule.rule_id}')
+        self.rules.append(rule)
+        for node_type in rule.node_types:
+            self._by_type[node_type].append(rule)
+        return rule
+
+    def rule(self, rule_id: str, *node_types: str, description: str = '', expensive: bool = False,
+             depends: Tuple[Any, ...] = ()):
+        """以装饰器方式注册规则"""
+        def decorator(check: Callable[[Any, FileContext], None]):
+            self.register(Rule(rule_id, node_types, check,
+                               description or (check.__doc__ or '').strip(), expensive, depends))
+            return check
+        return decorator
+
+    def for_type(self, node_type: str) -> List[Rule]:
+        """返回关心该节点类型的规则"""
+        return self._by_type.get(node_type, [])
+
+
+class TimeBudget:
+    """审计的整体时间预算
+
+    未超出预算时所有检查照常执行；超出后昂贵检查改为抽样，
+    超出 HARD_LIMIT_FACTOR 倍后完全跳过，被跳过的项目按检查名计数。
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, sample_every: int = SAMPLE_EVERY,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_seconds = max_seconds
+        self.sample_every = sample_every
+        self.clock = clock
+        self.started = clock()
+        self.skipped: Dict[str, int] = defaultdict(int)
+        self.sampled: Dict[str, int] = defaultdict(int)
+        # 因单条规则超出预算而停用的规则
+        self.disabled_rules: List[str] = []
+        self._seen: Dict[str, int] = defaultdict(int)
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def exhausted(self) -> bool:
+        return self.max_seconds is not None and self.elapsed() >= self.max_seconds
+
+    def allow(self, check: str) -> bool:
+        """昂贵检查处理每一项之前调用，返回是否执行"""
+        if not self.exhausted():
+            return True
+        if self.elapsed() >= self.max_seconds * HARD_LIMIT_FACTOR:
+            self.skipped[check] += 1
+            return False
+        self._seen[check] += 1
+        if (self._seen[check] - 1) % self.sample_every == 0:
+            self.sampled[check] += 1
+            return True
+        self.skipped[check] += 1
+        return False
+
+    @property
+    def partial(self) -> bool:
+        """是否有检查被跳过"""
+        return bool(self.skipped)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'max_seconds': self.max_seconds,
+            'elapsed_seconds': round(self.elapsed(), 3),
+            'skipped': dict(self.skipped),
+            'sampled': dict(self.sampled),
+            'disabled_rules': list(self.disabled_rules),
+        }
+
+
+class RuleEngine:
+    """对每个文件只遍历一次，并记录每条规则的累计耗时
+
+    rule_budget 为单条规则的累计耗时上限（秒），超出后该规则在本次审计中停用。
+    """
+
+    def __init__(self, registry: 'RuleRegistry', budget: Optional[TimeBudget] = None,
+                 rule_budget: Optional[float] = None):
+        self.registry = registry
+        self.budget = budget or TimeBudget()
+        self.rule_budget = rule_budget
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def dispatch(self, node_type: str, node: Any, ctx: FileContext, key: str = ''):
+        """把节点交给所有关心该类型的规则"""
+        ctx.node_key = key
+        ctx.node_type = node_type
+        for rule in self.registry.for_type(node_type):
+            if ctx.rules is not None and rule.rule_id not in ctx.rules:
+                continue
+            if rule.rule_id in self.budget.disabled_rules:
+                self.budget.skipped[rule.rule_id] += 1
+                continue
+            if rule.expensive and not self.budget.allow(rule.rule_id):
+                continue
+            ctx.begin(rule.rule_id)
+            started = time.perf_counter()
+            rule.check(node, ctx)
+            self.timings[rule.rule_id] += time.perf_counter() - started
+            self.calls[rule.rule_id] += 1
+            if self.rule_budget is not None and self.timings[rule.rule_id] > self.rule_budget:
+                self.budget.disabled_rules.append(rule.rule_id)
+
+    def visit_playbook(self, data: List[Any], ctx: FileContext):
+        """遍历 playbook：play → 任务 → handler"""
+        for play_key, play in node_keys('play', data):
+            self.dispatch('play', play, ctx, play_key)
+            for section in TASK_SECTIONS:
+                for key, task in node_keys(section, play.get(section) or []):
+                    self.dispatch('task', task, ctx, f'{play_key}/{key}')
+            for key, handler in node_keys('handlers', play.get('handlers') or []):
+                self.dispatch('handler', handler, ctx, f'{play_key}/{key}')
+
+    def visit_tasks_file(self, data: List[Any], ctx: FileContext, handlers: bool = False):
+        """遍历 playbook 之外的任务文件或 handlers 文件"""
+        node_type, section = ('included_handler', 'handlers') if handlers else ('included_task', 'tasks')
+        for key, task in node_keys(section, data):
+            self.dispatch(node_type, task, ctx, key)
+
+    def visit_vars_file(self, content: str, ctx: FileContext):
+        """分发变量文件文本"""
+        self.dispatch('vars_file', content, ctx)
+
+    def visit_readme(self, structure: MarkdownStructure, ctx: FileContext):
+        """分发 README 结构（标题、段落、代码块、词频等由 markdown_scan 单次扫描得到）"""
+        self.dispatch('readme', structure, ctx)
+
+    def timing_report(self) -> Dict[str, Dict[str, float]]:
+        """按耗时降序返回每条规则的耗时与调用次数"""
+        return {
+            rule_id: {'seconds': round(seconds, 6), 'calls': self.calls[rule_id]}
+            for rule_id, seconds in sorted(self.timings.items(), key=lambda item: -item[1])
+        }
+
+
+def node_key(section: str, node: Dict, index: int) -> str:
+    """节点在文件内的稳定标识：优先用名称，没有名称时退回到位置"""
+    name = node.get('name')
+    return f'{section}[{name}]' if isinstance(name, str) and name else f'{section}[{index}]'
+
+
+def node_keys(section: str, nodes: List[Any]) -> Iterator[Tuple[str, Dict]]:
+    """依次产出列表中的映射节点及其键；同名节点从第二个起追加出现序号（@2、@3…），保证键在列表内唯一"""
+    seen: Dict[str, int] = defaultdict(int)
+    for index, node in enumerate(nodes):
+        if not isinstance(node, dict):
+            continue
+        key = node_key(section, node, index)
+        seen[key] += 1
+        yield (key if seen[key] == 1 else f'{key}@{seen[key]}'), node
+
+
+def iter_strings(node: Any) -> Iterator[str]:
+    """依次产出嵌套结构中的键和标量值（字符串形式）"""
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                yield str(key)
+                stack.append(value)
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif item is not None:
+            yield str(item)
+
+
+DEFAULT_RULES = RuleRegistry()
+
+
+@DEFAULT_RULES.rule('gather-facts', 'play')
+def check_gather_facts(play: Dict, ctx: FileContext):
+    """play 必须显式声明 gather_facts"""
+    if 'gather_facts' not in play:
+        ctx.report('medium',
+                   '缺少 gather_facts 声明: {path}',
+                   '添加 gather_facts: true 或 gather_facts: false')
+    else:
+        ctx.stats['has_gather_facts'] += 1
+
+
+# 任务中不是模块名的键
+TASK_KEYWORDS = {'name', 'when', 'with_items', 'loop', 'register',
+                 'notify', 'tags', 'become', 'become_user', 'vars',
+                 'block', 'rescue', 'always', 'include', 'import_tasks',
+                 'include_tasks', 'import_playbook'}
+
+# 允许不使用 FQCN 的常用内置模块
+COMMON_BUILTINS = {'debug', 'set_fact', 'assert', 'fail',
+                   'meta', 'pause', 'wait_for', 'include_vars'}
+
+
+@DEFAULT_RULES.rule('task-fqcn', 'task')
+def check_task_fqcn(task: Dict, ctx: FileContext):
+    """任务应使用 FQCN 模块名"""
+    for key in task.keys():
+        if key in TASK_KEYWORDS:
+            continue
+        # 检查是否是 FQCN 格式 (namespace.collection.module)
+        if key.count('.') < 2 and not key.startswith('ansible.builtin.'):
+            if key not in COMMON_BUILTINS:
+                ctx.report('low',
+                           '模块未使用 FQCN: {module} in {path}',
+                           '使用完全限定名，如 ansible.builtin.{module}',
+                           detail=key, module=key)
+                ctx.stats['non_fqcn_modules'] += 1
+            else:
+                ctx.stats['fqcn_modules'] += 1
+        else:
+            ctx.stats['fqcn_modules'] += 1
+
+
+@DEFAULT_RULES.rule('task-chinese-name', 'task')
+def check_task_chinese(task: Dict, ctx: FileContext):
+    """任务名称应使用中文"""
+    if 'name' in task:
+        name = task['name']
+        if not CHINESE_PATTERN.search(name):
+            ctx.report('low',
+                       '任务名称不是中文: "{name}" in {path}',
+                       '使用中文任务名称', name=name)
+            ctx.stats['non_chinese_tasks'] += 1
+        else:
+            ctx.stats['chinese_tasks'] += 1
+
+
+SENSITIVE_KEYWORDS = ('password', 'passwd', 'secret', 'token', 'key',
+                      'vault', 'credential', 'api_key')
+
+
+@DEFAULT_RULES.rule('task-no-log', 'task')
+def check_task_no_log(task: Dict, ctx: FileContext):
+    """含敏感信息的任务应使用 no_log"""
+    if task.get('no_log'):
+        return
+    # 逐个检查键和值，命中即停止，避免把整个任务转成字符串
+    for text in iter_strings(task):
+        text = text.lower()
+        if any(keyword in text for keyword in SENSITIVE_KEYWORDS):
+            ctx.report('high',
+                       '敏感操作未使用 no_log: {path}',
+                       '为包含敏感信息的任务添加 no_log: true')
+            ctx.stats['missing_no_log'] += 1
+            return
+
+
+@DEFAULT_RULES.rule('handler-chinese-name', 'handler')
+def check_handler_chinese(handler: Dict, ctx: FileContext):
+    """handler 名称应使用中文"""
+    if 'name' in handler:
+        name = handler['name']
+        if not CHINESE_PATTERN.search(name):
+            ctx.report('medium',
+                       'Handler 名称不是中文: "{name}" in {path}',
+                       '使用中文 handler 名称', name=name)
+
+
+@DEFAULT_RULES.rule('handler-graph', 'play', 'task', 'handler', 'included_task', 'included_handler',
+                    depends=(HandlerGraph,))
+def collect_handler_graph(node: Dict, ctx: FileContext):
+    """收集 notify 与 handler 关系，所有文件遍历完后由审计统一分析"""
+    graph = ctx.shared.get('handler_graph')
+    if graph is None:
+        return
+    if ctx.node_type == 'play':
+        ctx.facts['scope'] = f'play:{ctx.path.as_posix()}::{ctx.node_key}'
+        graph.add_play(ctx.facts['scope'], node)
+        return
+    scope = ctx.facts['scope'] if ctx.node_type in ('task', 'handler') else file_scope(ctx.path)
+    if ctx.node_type in ('handler', 'included_handler'):
+        graph.add_handler(scope, node, ctx.path, ctx.node_key)
+    else:
+        graph.add_task(scope, node, ctx.path, ctx.node_key)
+
+
+VARS_WARNING_PATTERN = re.compile(r'⚠️.*本文件仅为示例.*占位符.*Ansible Vault.*环境变量', re.DOTALL)
+
+
+@DEFAULT_RULES.rule('vars-warning-header', 'vars_file')
+def check_vars_warning(content: str, ctx: FileContext):
+    """示例变量文件必须包含警告头"""
+    if not VARS_WARNING_PATTERN.search(content):
+        ctx.report('medium',
+                   '变量文件缺少警告头: {path}',
+                   '添加警告: ⚠️ 本文件仅为示例，占位符必须使用 Ansible Vault 或环境变量替换')
+        ctx.stats['vars_missing_warning'] += 1
+    else:
+        ctx.stats['vars_has_warning'] += 1
+
+
+# README 中允许出现的技术词汇
+TECH_WORDS = {'ansible', 'playbook', 'yaml', 'python', 'linux',
+              'ubuntu', 'centos', 'rhel', 'sudo', 'root', 'user',
+              'group', 'file', 'directory', 'service', 'systemd',
+              'nginx', 'apache', 'mysql', 'postgresql', 'mongodb',
+              'docker', 'kubernetes', 'vault', 'inventory', 'role',
+              'task', 'handler', 'variable', 'template', 'module',
+              'collection', 'galaxy', 'github', 'gitlab', 'aws',
+              'azure', 'gcp', 'openstack', 'vmware', 'libvirt'}
+
+
+@DEFAULT_RULES.rule('readme-language', 'readme', expensive=True, depends=(parse_markdown,))
+def check_readme_language(structure: MarkdownStructure, ctx: FileContext):
+    """README 说明文字应使用中文"""
+    # latin_words 只统计正文行，已排除代码块、标题、列表和命令
+    non_tech_english = sum(count for word, count in structure.latin_words.items()
+                           if word not in TECH_WORDS)
+
+    if non_tech_english > 10:
+        ctx.report('low',
+                   'README 可能包含英文内容: {path}',
+                   '检查并翻译为中文 (发现 {count} 个非技术英文词汇)', count=non_tech_english)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+审计结果输出 - Audit Sinks
+问题产生时立即写出为 NDJSON 或 SARIF，不需要在内存中保留完整报告
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+# 审计优先级对应的 SARIF 级别
+SARIF_LEVELS = {
+    'critical': 'error',
+    'high': 'error',
+    'medium': 'warning',
+    'low': 'note',
+}
+
+TOOL_NAME = 'comprehensive_audit'
+
+
+class IssueSink:
+    """问题输出的基类，add_issue 每产生一个问题调用一次 emit"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def emit(self, priority: str, issue: Dict[str, Any], baseline_state: Optional[str] = None):
+        raise NotImplementedError
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NdjsonSink(IssueSink):
+    """每个问题一行 JSON"""
+
+    def emit(self, priority: str, issue: Dict[str, Any], baseline_state: Optional[str] = None):
+        record = {'priority': priority, **issue}
+        if baseline_state:
+            record['baseline_state'] = baseline_state
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write('\n')
+        self.count += 1
+
+
+class SarifSink(IssueSink):
+    """SARIF 2.1.0 日志，results 数组边产生边写入
+
+    规则列表要等所有问题产生后才能确定，因此 tool 对象写在 results 之后，
+    JSON 对象中的键顺序不影响 SARIF 解析。
+    """
+
+    def __init__(self, path: Union[str, Path], rule_descriptions: Optional[Dict[str, str]] = None):
+        super().__init__(path)
+        self.rule_descriptions = rule_descriptions or {}
+        self.rule_ids: Dict[str, None] = {}
+        self.file.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "{SARIF_VERSION}", '
+                        '"runs": [{"results": [\n')
+
+    def emit(self, priority: str, issue: Dict[str, Any], baseline_state: Optional[str] = None):
+        self.rule_ids.setdefault(issue['rule_id'], None)
+        message = issue['description']
+        if issue['suggestion']:
+            message = f"{message}\n修复建议: {issue['suggestion']}"
+        result: Dict[str, Any] = {
+            'ruleId': issue['rule_id'],
+            'level': SARIF_LEVELS[priority],
+            'message': {'text': message},
+            'partialFingerprints': {'auditFingerprint/v1': issue['fingerprint']},
+            'properties': {'priority': priority, 'key': issue['key']},
+        }
+        if issue['path']:
+            result['locations'] = [
+                {'physicalLocation': {'artifactLocation': {'uri': issue['path']}}}
+            ]
+        if baseline_state:
+            result['baselineState'] = baseline_state
+        if self.count:
+            self.file.write(',\n')
+        self.file.write(json.dumps(result, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        rules = [
+            {'id': rule_id, 'shortDescription': {'text': self.rule_descriptions.get(rule_id, rule_id)}}
+            for rule_id in self.rule_ids
+        ]
+        tool = {'driver': {'name': TOOL_NAME, 'rules': rules}}
+        self.file.write(f'\n], "tool": {json.dumps(tool, ensure_ascii=False)}}}]}}\n')
+        super().close()
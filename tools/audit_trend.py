@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+"""
+审计趋势库 - Audit Trend Store
+把 comprehensive_audit.py 的 JSON 报告导入 SQLite（只解析一次），按严重级别和规则记录问题数，
+通过索引查询回答与上次的差异、移动平均和告警，告警阈值可配置。
+保留策略：近期保留每次审计的完整记录，更早的合并为每日、再合并为每周摘要；旧报告压缩去重归档
+"""
+
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import yaml
+
+try:
+    from tools.audit_archive import ReportArchive
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from audit_archive import ReportArchive
+
+# 默认趋势库（与监控报告放在同一目录）
+DEFAULT_DB = 'reports/audit_history/audit_trend.sqlite3'
+
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL UNIQUE,
+    critical INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    medium INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    json_report TEXT NOT NULL DEFAULT '',
+    md_report TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS rule_counts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    rule_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, rule_id, severity)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rule_counts_by_rule ON rule_counts (rule_id, run_id);
+CREATE TABLE IF NOT EXISTS alerts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_by_run ON alerts (run_id);
+CREATE TABLE IF NOT EXISTS summaries (
+    period TEXT NOT NULL,
+    start TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    critical REAL NOT NULL,
+    high REAL NOT NULL,
+    medium REAL NOT NULL,
+    low REAL NOT NULL,
+    total REAL NOT NULL,
+    max_total INTEGER NOT NULL,
+    PRIMARY KEY (period, start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summary_rule_counts (
+    period TEXT NOT NULL,
+    start TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    count REAL NOT NULL,
+    PRIMARY KEY (period, start, rule_id)
+) WITHOUT ROWID;
+'''
+
+RUN_COLUMNS = 'id, timestamp, critical, high, medium, low, total, json_report, md_report'
+SUMMARY_COLUMNS = 'period, start, runs, critical, high, medium, low, total, max_total'
+
+# 报告文件名中的日期：audit_20250101_090000.json、daily_summary_20250101.md
+REPORT_DATE = re.compile(r'_(\d{8})(?:_\d{6})?\.(?:json|md)$')
+
+
+@dataclass
+class Thresholds:
+    """告警阈值，None 表示不检查该项"""
+    critical: Optional[int] = 0  # Critical 问题数超过该值
+    high: Optional[int] = 50  # High 问题数超过该值
+    total_increase: Optional[int] = 20  # 问题总数比上次增加超过该值
+    rule_increase: Optional[int] = None  # 单条规则比上次增加超过该值
+    average_window: int = 7  # 移动平均包含的历史次数
+    average_increase: Optional[float] = None  # 问题总数超过移动平均的比例，如 0.2 表示 20%
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'Thresholds':
+        """从 YAML/JSON 文件读取阈值，未给出的项使用默认值"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        known = {field.name for field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f'未知的告警阈值: {", ".join(sorted(unknown))}')
+        return cls(**data)
+
+
+@dataclass(frozen=True)
+class Run:
+    """一次审计的各级别问题数"""
+    id: int
+    timestamp: str
+    critical: int
+    high: int
+    medium: int
+    low: int
+    total: int
+    json_report: str = ''
+    md_report: str = ''
+
+    @property
+    def quality_score(self) -> int:
+        """质量评分（满分 100）"""
+        return max(0, 100 - self.critical * 5 - self.high * 2 - self.medium)
+
+    def counts(self) -> Dict[str, int]:
+        return {severity: getattr(self, severity) for severity in SEVERITIES + ('total',)}
+
+
+@dataclass(frozen=True)
+class Summary:
+    """一个周期（day/week，或单次审计 run）内各级别问题数的平均值"""
+    period: str
+    start: str
+    runs: int
+    critical: float
+    high: float
+    medium: float
+    low: float
+    total: float
+    max_total: int
+
+    def counts(self) -> Dict[str, float]:
+        return {severity: getattr(self, severity) for severity in SEVERITIES + ('total',)}
+
+
+@dataclass
+class RetentionPolicy:
+    """历史数据保留策略"""
+    full_days: int = 30  # 保留完整审计记录和原始报告的天数，更早的合并为每日摘要并归档报告
+    daily_days: int = 180  # 保留每日摘要的天数，更早的合并为每周摘要
+    archive_days: Optional[int] = 365  # 归档报告的保留天数，None 表示永久保留
+
+
+def week_start(day: date) -> date:
+    """所在周的周一"""
+    return day - timedelta(days=day.weekday())
+
+
+def report_date(name: str) -> Optional[date]:
+    match = REPORT_DATE.search(name)
+    return datetime.strptime(match.group(1), '%Y%m%d').date() if match else None
+
+
+def report_rule_counts(report: Dict[str, Any]) -> Counter:
+    """报告中每个 (规则, 级别) 的问题数
+
+    摘要模式的报告不含问题列表，此时使用 aggregates.by_rule，级别记为空字符串。
+    """
+    counts: Counter = Counter()
+    for severity in SEVERITIES:
+        for issue in report.get('issues', {}).get(severity, []):
+            counts[(issue.get('rule_id', 'general'), severity)] += 1
+    if not counts:
+        for rule_id, count in report.get('aggregates', {}).get('by_rule', {}).items():
+            counts[(rule_id, '')] = count
+    return counts
+
+
+class TrendStore:
+    """审计趋势库，所有查询都按 timestamp 或 (rule_id, run_id) 索引进行"""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_DB):
+        self.path = Path(path)
+        if str(path) != ':memory:':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'TrendStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self, row: Optional[Tuple]) -> Optional[Run]:
+        return Run(*row) if row else None
+
+    def add_run(self, timestamp: str, counts: Dict[str, int], rule_counts: Optional[Counter] = None,
+                json_report: str = '', md_report: str = '') -> Run:
+        """记录一次审计；同一时间戳已存在时返回已有记录（重复导入无副作用）"""
+        existing = self.run_at(timestamp)
+        if existing:
+            return existing
+        total = counts.get('total', sum(counts.get(severity, 0) for severity in SEVERITIES))
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (timestamp, critical, high, medium, low, total, json_report, md_report) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (timestamp, *(counts.get(severity, 0) for severity in SEVERITIES), total,
+                 json_report, md_report),
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                'INSERT INTO rule_counts (run_id, rule_id, severity, count) VALUES (?, ?, ?, ?)',
+                ((run_id, rule_id, severity, count) for (rule_id, severity), count in (rule_counts or {}).items()),
+            )
+        return self.run_at(timestamp)
+
+    def ingest(self, report: Dict[str, Any], json_report: str = '', md_report: str = '',
+               timestamp: Optional[str] = None) -> Run:
+        """导入一份已解析的审计报告"""
+        summary = report['summary']
+        counts = {severity: summary[f'{severity}_issues'] for severity in SEVERITIES}
+        counts['total'] = summary['total_issues']
+        timestamp = timestamp or report.get('audit_date') or datetime.now().isoformat()
+        return self.add_run(timestamp, counts, report_rule_counts(report), json_report, md_report)
+
+    def ingest_file(self, path: Union[str, Path], md_report: str = '') -> Run:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        return self.ingest(report, json_report=str(path), md_report=md_report)
+
+    def import_csv(self, path: Union[str, Path]) -> int:
+        """导入旧版 audit_monitor.sh 的 audit_trend.csv，返回新增的记录数"""
+        added = 0
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                timestamp = datetime.strptime(row['timestamp'], '%Y%m%d_%H%M%S').isoformat()
+                if self.run_at(timestamp):
+                    continue
+                self.add_run(timestamp, {key: int(row[key]) for key in SEVERITIES + ('total',)})
+                added += 1
+        return added
+
+    def run_at(self, timestamp: str) -> Optional[Run]:
+        row = self.conn.execute(f'SELECT {RUN_COLUMNS} FROM runs WHERE timestamp = ?', (timestamp,)).fetchone()
+        return self._run(row)
+
+    def latest(self) -> Optional[Run]:
+        row = self.conn.execute(f'SELECT {RUN_COLUMNS} FROM runs ORDER BY timestamp DESC LIMIT 1').fetchone()
+        return self._run(row)
+
+    def previous(self, run: Run) -> Optional[Run]:
+        row = self.conn.execute(
+            f'SELECT {RUN_COLUMNS} FROM runs WHERE timestamp < ? ORDER BY timestamp DESC LIMIT 1',
+            (run.timestamp,),
+        ).fetchone()
+        return self._run(row)
+
+    def runs(self, limit: int = 30) -> List[Run]:
+        """最近 limit 次审计，按时间先后排列"""
+        rows = self.conn.execute(
+            f'SELECT {RUN_COLUMNS} FROM runs ORDER BY timestamp DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [Run(*row) for row in reversed(rows)]
+
+    def delta(self, run: Run) -> Optional[Dict[str, int]]:
+        """与上一次审计相比各级别的变化，没有上一次时返回 None"""
+        previous = self.previous(run)
+        if previous is None:
+            return None
+        before = previous.counts()
+        return {key: value - before[key] for key, value in run.counts().items()}
+
+    def average_before(self, run: Run, window: int) -> Optional[float]:
+        """run 之前最近 window 次审计的问题总数平均值"""
+        row = self.conn.execute(
+            'SELECT AVG(total), COUNT(*) FROM '
+            '(SELECT total FROM runs WHERE timestamp < ? ORDER BY timestamp DESC LIMIT ?)',
+            (run.timestamp, window),
+        ).fetchone()
+        return row[0] if row[1] else None
+
+    def moving_averages(self, window: int = 7, limit: int = 30) -> List[Tuple[Run, float]]:
+        """最近 limit 次审计及各自（含本次）最近 window 次的问题总数移动平均"""
+        # 只取计算所需的最近 limit + window - 1 行，再在其上开窗
+        rows = self.conn.execute(
+            f'SELECT {RUN_COLUMNS}, AVG(total) OVER '
+            f'(ORDER BY timestamp ROWS BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW) '
+            f'FROM (SELECT * FROM runs ORDER BY timestamp DESC LIMIT ?) ORDER BY timestamp',
+            (limit + window - 1,),
+        ).fetchall()
+        return [(Run(*row[:-1]), row[-1]) for row in rows[-limit:]]
+
+    def rule_deltas(self, run: Run) -> Dict[str, int]:
+        """各规则与上一次审计相比的变化（只列出有变化的规则，按变化量降序）"""
+        previous = self.previous(run)
+        current = self.rule_totals(run.id)
+        before = self.rule_totals(previous.id) if previous else {}
+        deltas = {rule_id: current.get(rule_id, 0) - before.get(rule_id, 0)
+                  for rule_id in current.keys() | before.keys()}
+        return dict(sorted(((k, v) for k, v in deltas.items() if v), key=lambda item: (-item[1], item[0])))
+
+    def rule_totals(self, run_id: int) -> Dict[str, int]:
+        rows = self.conn.execute(
+            'SELECT rule_id, SUM(count) FROM rule_counts WHERE run_id = ? GROUP BY rule_id', (run_id,)
+        )
+        return dict(rows.fetchall())
+
+    def rule_history(self, rule_id: str, limit: int = 30) -> List[Tuple[str, int]]:
+        """某条规则最近 limit 次审计的问题数 (时间戳, 数量)，未出现时为 0"""
+        rows = self.conn.execute(
+            'SELECT r.timestamp, COALESCE(SUM(c.count), 0) FROM '
+            '(SELECT id, timestamp FROM runs ORDER BY timestamp DESC LIMIT ?) r '
+            'LEFT JOIN rule_counts c ON c.rule_id = ? AND c.run_id = r.id '
+            'GROUP BY r.id ORDER BY r.timestamp',
+            (limit, rule_id),
+        )
+        return rows.fetchall()
+
+    def _merge_summary(self, period: str, start: str,
+                       items: List[Tuple[int, Dict[str, float], int, Dict[str, float]]]):
+        """把若干 (次数, 各级别平均值, 最大总数, 各规则平均值) 按次数加权合并进一个周期摘要"""
+        existing = self.conn.execute(
+            f'SELECT {SUMMARY_COLUMNS} FROM summaries WHERE period = ? AND start = ?', (period, start)
+        ).fetchone()
+        if existing:
+            summary = Summary(*existing)
+            items = items + [(summary.runs, summary.counts(), summary.max_total,
+                              self.summary_rule_counts(period, start))]
+        runs = sum(item[0] for item in items)
+        counts = {key: sum(weight * values[key] for weight, values, _, _ in items) / runs
+                  for key in SEVERITIES + ('total',)}
+        rules: Dict[str, float] = defaultdict(float)
+        for weight, _, _, rule_counts in items:
+            for rule_id, count in rule_counts.items():
+                rules[rule_id] += weight * count / runs
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO summaries ({SUMMARY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (period, start, runs, *(counts[key] for key in SEVERITIES + ('total',)),
+             max(item[2] for item in items)),
+        )
+        self.conn.execute('DELETE FROM summary_rule_counts WHERE period = ? AND start = ?', (period, start))
+        self.conn.executemany(
+            'INSERT INTO summary_rule_counts (period, start, rule_id, count) VALUES (?, ?, ?, ?)',
+            ((period, start, rule_id, count) for rule_id, count in rules.items()),
+        )
+
+    def summary_rule_counts(self, period: str, start: str) -> Dict[str, float]:
+        rows = self.conn.execute(
+            'SELECT rule_id, count FROM summary_rule_counts WHERE period = ? AND start = ?', (period, start)
+        )
+        return dict(rows.fetchall())
+
+    def downsample_runs(self, before: str) -> int:
+        """把 before（YYYY-MM-DD）之前的完整记录合并为每日摘要并删除，返回合并的审计次数"""
+        rows = self.conn.execute(
+            f'SELECT {RUN_COLUMNS} FROM runs WHERE timestamp < ? ORDER BY timestamp', (before,)
+        ).fetchall()
+        by_day: Dict[str, List[Run]] = defaultdict(list)
+        for row in rows:
+            by_day[row[1][:10]].append(Run(*row))
+        with self.conn:
+            for day, runs in by_day.items():
+                self._merge_summary('day', day, [
+                    (1, run.counts(), run.total, self.rule_totals(run.id)) for run in runs
+                ])
+            self.conn.execute('DELETE FROM runs WHERE timestamp < ?', (before,))
+        return len(rows)
+
+    def downsample_days(self, before: str) -> int:
+        """把 before 之前的每日摘要按周合并并删除，返回合并的天数"""
+        rows = self.conn.execute(
+            f'SELECT {SUMMARY_COLUMNS} FROM summaries WHERE period = ? AND start < ? ORDER BY start',
+            ('day', before),
+        ).fetchall()
+        by_week: Dict[str, List[Summary]] = defaultdict(list)
+        for row in rows:
+            day = Summary(*row)
+            by_week[week_start(date.fromisoformat(day.start)).isoformat()].append(day)
+        with self.conn:
+            for week, days in by_week.items():
+                self._merge_summary('week', week, [
+                    (day.runs, day.counts(), day.max_total, self.summary_rule_counts('day', day.start))
+                    for day in days
+                ])
+            self.conn.execute('DELETE FROM summaries WHERE period = ? AND start < ?', ('day', before))
+            self.conn.execute('DELETE FROM summary_rule_counts WHERE period = ? AND start < ?', ('day', before))
+        return len(rows)
+
+    def history(self) -> List[Summary]:
+        """全部历史（每周摘要、每日摘要、完整记录），按时间排列，用于趋势图"""
+        points = [Summary(*row) for row in self.conn.execute(
+            f'SELECT {SUMMARY_COLUMNS} FROM summaries ORDER BY start')]
+        points += [Summary('run', timestamp, 1, *counts, counts[-1]) for timestamp, *counts in self.conn.execute(
+            'SELECT timestamp, critical, high, medium, low, total FROM runs ORDER BY timestamp')]
+        return sorted(points, key=lambda point: point.start)
+
+    def check_alerts(self, run: Run, thresholds: Thresholds) -> List[str]:
+        """按阈值检查告警，返回告警消息"""
+        messages = []
+        if thresholds.critical is not None and run.critical > thresholds.critical:
+            messages.append(f'发现 {run.critical} 个严重问题！请立即处理！')
+        if thresholds.high is not None and run.high > thresholds.high:
+            messages.append(f'High 级别问题超过 {thresholds.high} 个（当前 {run.high}）')
+        delta = self.delta(run)
+        if delta and thresholds.total_increase is not None and delta['total'] > thresholds.total_increase:
+            messages.append(f'问题总数增加超过 {thresholds.total_increase} 个（+{delta["total"]}）')
+        if delta and thresholds.rule_increase is not None:
+            for rule_id, change in self.rule_deltas(run).items():
+                if change > thresholds.rule_increase:
+                    messages.append(f'规则 {rule_id} 的问题增加 {change} 个')
+        if thresholds.average_increase is not None:
+            average = self.average_before(run, thresholds.average_window)
+            if average and run.total > average * (1 + thresholds.average_increase):
+                messages.append(f'问题总数 {run.total} 超过最近 {thresholds.average_window} 次平均值 '
+                                f'{average:.1f} 的 {thresholds.average_increase:.0%} 以上')
+        return messages
+
+    def record_alerts(self, run: Run, messages: List[str]):
+        with self.conn:
+            self.conn.execute('DELETE FROM alerts WHERE run_id = ?', (run.id,))
+            self.conn.executemany('INSERT INTO alerts (run_id, message) VALUES (?, ?)',
+                                  ((run.id, message) for message in messages))
+
+    def recent_alerts(self, limit: int = 20) -> Iterator[Tuple[str, str]]:
+        rows = self.conn.execute(
+            'SELECT r.timestamp, a.message FROM alerts a JOIN runs r ON r.id = a.run_id '
+            'ORDER BY r.timestamp DESC LIMIT ?', (limit,)
+        )
+        yield from rows
+
+
+def apply_retention(store: TrendStore, history_dir: Union[str, Path], policy: RetentionPolicy,
+                    archive: Optional[ReportArchive] = None, today: Optional[date] = None) -> Dict[str, int]:
+    """按保留策略归档旧报告、合并旧记录，返回各步骤处理的数量"""
+    history_dir = Path(history_dir)
+    today = today or date.today()
+    archive = archive or ReportArchive(history_dir / 'archive')
+    full_cutoff = today - timedelta(days=policy.full_days)
+
+    archived = 0
+    for path in sorted(history_dir.glob('*_*.*')):
+        day = report_date(path.name)
+        if day and day < full_cutoff:
+            archive.add(path)
+            path.unlink()
+            archived += 1
+
+    expired = 0
+    if policy.archive_days is not None:
+        archive_cutoff = today - timedelta(days=policy.archive_days)
+        for name in archive.names():
+            day = report_date(name)
+            if day and day < archive_cutoff:
+                archive.remove(name)
+                expired += 1
+
+    stats = {
+        'archived_reports': archived,
+        'expired_reports': expired,
+        'removed_chunks': archive.gc() if expired else 0,
+        'downsampled_runs': store.downsample_runs(full_cutoff.isoformat()),
+        'downsampled_days': store.downsample_days(
+            week_start(today - timedelta(days=policy.daily_days)).isoformat()),
+    }
+    if stats['downsampled_runs'] or stats['downsampled_days']:
+        store.conn.execute('VACUUM')  # 释放删除记录占用的空间
+    return stats
+
+
+def quality_verdict(score: int) -> str:
+    if score >= 90:
+        return '🏆 **优秀** - 代码质量优秀，继续保持！'
+    if score >= 70:
+        return '✅ **良好** - 代码质量良好，还有提升空间。'
+    if score >= 50:
+        return '⚠️  **需要改进** - 建议优先处理 Critical 和 High 问题。'
+    return '🚨 **严重** - 存在大量问题，需要立即采取行动！'
+
+
+def format_daily_summary(run: Run) -> str:
+    """每日审计摘要 Markdown"""
+    day = run.timestamp[:10].replace('-', '')
+    return '\n'.join([
+        f'# 每日审计摘要 - {day}',
+        '',
+        f'## 最新审计 ({run.timestamp})',
+        '',
+        '### 问题统计',
+        f'- 🔴 Critical: {run.critical}',
+        f'- 🟠 High: {run.high}',
+        f'- 🟡 Medium: {run.medium}',
+        f'- 🟢 Low: {run.low}',
+        f'- 📝 Total: {run.total}',
+        '',
+        '### 详细报告',
+        *([f'- [JSON 报告]({run.json_report})'] if run.json_report else []),
+        *([f'- [Markdown 报告]({run.md_report})'] if run.md_report else []),
+        '',
+        '### 质量评分',
+        f'**{run.quality_score}/100**',
+        '',
+        quality_verdict(run.quality_score),
+        '',
+    ])
+
+
+def show_trend(label: str, value: int):
+    if value < 0:
+        print(f'  ✅ {label}: {value} (改善)')
+    elif value > 0:
+        print(f'  ⚠️  {label}: +{value} (增加)')
+    else:
+        print(f'  ➡️  {label}: 无变化')
+
+
+def exit_status(run: Run, thresholds: Thresholds) -> int:
+    """2 表示有严重问题，1 表示 High 问题超过阈值，0 表示正常"""
+    if thresholds.critical is not None and run.critical > thresholds.critical:
+        return 2
+    if thresholds.high is not None and run.high > thresholds.high:
+        return 1
+    return 0
+
+
+def cmd_ingest(store: TrendStore, args, thresholds: Thresholds) -> int:
+    run = store.ingest_file(args.report, md_report=args.markdown or '')
+    print('📈 当前审计结果:')
+    print(f'  🔴 Critical: {run.critical}')
+    print(f'  🟠 High:     {run.high}')
+    print(f'  🟡 Medium:   {run.medium}')
+    print(f'  🟢 Low:      {run.low}')
+    print(f'  📝 Total:    {run.total}')
+    print()
+
+    delta = store.delta(run)
+    if delta is not None:
+        print('📊 与上次审计对比:')
+        for key in SEVERITIES + ('total',):
+            show_trend(key.capitalize(), delta[key])
+        changed = list(store.rule_deltas(run).items())[:5]
+        if changed:
+            print('  变化最大的规则: ' + ', '.join(f'{rule_id} {change:+d}' for rule_id, change in changed))
+        print()
+
+    print('🚨 检查告警条件...')
+    messages = store.check_alerts(run, thresholds)
+    store.record_alerts(run, messages)
+    if messages:
+        print('🚨 告警触发！')
+        for message in messages:
+            print(f'⚠️  {message}')
+    else:
+        print('  ✅ 无告警触发')
+    print()
+
+    if args.daily_summary:
+        Path(args.daily_summary).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.daily_summary).write_text(format_daily_summary(run), encoding='utf-8')
+        print(f'📄 每日摘要: {args.daily_summary}')
+    print(f'质量评分: {run.quality_score}/100')
+    return exit_status(run, thresholds)
+
+
+def cmd_trend(store: TrendStore, args, thresholds: Thresholds) -> int:
+    window = args.window or thresholds.average_window
+    print(f'{"时间":<26} {"Critical":>8} {"High":>6} {"Medium":>7} {"Low":>6} {"Total":>6} {"移动平均":>8}')
+    for run, average in store.moving_averages(window, args.limit):
+        print(f'{run.timestamp:<26} {run.critical:>8} {run.high:>6} {run.medium:>7} {run.low:>6} '
+              f'{run.total:>6} {average:>8.1f}')
+    return 0
+
+
+def cmd_rules(store: TrendStore, args, thresholds: Thresholds) -> int:
+    if args.rule:
+        for timestamp, count in store.rule_history(args.rule, args.limit):
+            print(f'{timestamp:<26} {count:>6}')
+        return 0
+    run = store.latest()
+    if run is None:
+        print('趋势库中没有审计记录')
+        return 0
+    for rule_id, change in list(store.rule_deltas(run).items())[:args.limit]:
+        print(f'{change:+6d}  {rule_id}')
+    return 0
+
+
+def cmd_alerts(store: TrendStore, args, thresholds: Thresholds) -> int:
+    for timestamp, message in store.recent_alerts(args.limit):
+        print(f'[{timestamp}] {message}')
+    return 0
+
+
+def cmd_history(store: TrendStore, args, thresholds: Thresholds) -> int:
+    labels = {'week': '周', 'day': '日', 'run': '次'}
+    print(f'{"周期":<4} {"开始":<26} {"次数":>4} {"Critical":>8} {"High":>7} {"Medium":>7} {"Low":>7} {"Total":>7}')
+    for point in store.history():
+        print(f'{labels[point.period]:<4} {point.start:<26} {point.runs:>4} {point.critical:>8.1f} '
+              f'{point.high:>7.1f} {point.medium:>7.1f} {point.low:>7.1f} {point.total:>7.1f}')
+    return 0
+
+
+def cmd_retention(store: TrendStore, args, thresholds: Thresholds) -> int:
+    policy = RetentionPolicy(
+        full_days=args.full_days,
+        daily_days=args.daily_days,
+        archive_days=None if args.keep_archives else args.archive_days,
+    )
+    stats = apply_retention(store, args.history_dir or Path(args.db).parent, policy)
+    print(f'🗜️  归档报告 {stats["archived_reports"]} 份，过期删除 {stats["expired_reports"]} 份'
+          f'（清理 {stats["removed_chunks"]} 个块）')
+    print(f'📉 合并为每日摘要 {stats["downsampled_runs"]} 次审计，合并为每周摘要 {stats["downsampled_days"]} 天')
+    return 0
+
+
+def cmd_import_csv(store: TrendStore, args, thresholds: Thresholds) -> int:
+    print(f'已导入 {store.import_csv(args.csv)} 条历史记录')
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='审计趋势库：导入审计报告并查询趋势与告警')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'趋势库路径 (默认: {DEFAULT_DB})')
+    parser.add_argument('--thresholds', help='告警阈值文件 (YAML/JSON)，未给出的项使用默认值')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='导入一份 JSON 审计报告，输出对比与告警')
+    ingest.add_argument('report', help='comprehensive_audit.py 生成的 JSON 报告')
+    ingest.add_argument('--markdown', help='对应的 Markdown 报告路径（记录在摘要中）')
+    ingest.add_argument('--daily-summary', help='写出每日摘要 Markdown 的路径')
+    ingest.set_defaults(handler=cmd_ingest)
+
+    trend = commands.add_parser('trend', help='最近的审计结果及问题总数移动平均')
+    trend.add_argument('--limit', type=int, default=30, help='显示的审计次数')
+    trend.add_argument('--window', type=int, help='移动平均窗口（默认取阈值文件中的 average_window）')
+    trend.set_defaults(handler=cmd_trend)
+
+    rules = commands.add_parser('rules', help='最近一次审计中各规则的变化，或某条规则的历史')
+    rules.add_argument('--rule', help='显示该规则的历史问题数')
+    rules.add_argument('--limit', type=int, default=20)
+    rules.set_defaults(handler=cmd_rules)
+
+    alerts = commands.add_parser('alerts', help='最近的告警')
+    alerts.add_argument('--limit', type=int, default=20)
+    alerts.set_defaults(handler=cmd_alerts)
+
+    history = commands.add_parser('history', help='全部历史：每周摘要、每日摘要与近期完整记录')
+    history.set_defaults(handler=cmd_history)
+
+    defaults = RetentionPolicy()
+    retention = commands.add_parser('retention', help='归档旧报告并把旧记录合并为每日/每周摘要')
+    retention.add_argument('--history-dir', help='监控报告目录（默认: 趋势库所在目录）')
+    retention.add_argument('--full-days', type=int, default=defaults.full_days,
+                           help=f'保留完整记录与原始报告的天数 (默认: {defaults.full_days})')
+    retention.add_argument('--daily-days', type=int, default=defaults.daily_days,
+                           help=f'保留每日摘要的天数 (默认: {defaults.daily_days})')
+    retention.add_argument('--archive-days', type=int, default=defaults.archive_days,
+                           help=f'归档报告的保留天数 (默认: {defaults.archive_days})')
+    retention.add_argument('--keep-archives', action='store_true', help='永久保留归档报告')
+    retention.set_defaults(handler=cmd_retention)
+
+    import_csv = commands.add_parser('import-csv', help='导入旧版 audit_trend.csv')
+    import_csv.add_argument('csv')
+    import_csv.set_defaults(handler=cmd_import_csv)
+
+    args = parser.parse_args(argv)
+    thresholds = Thresholds.load(args.thresholds) if args.thresholds else Thresholds()
+    with TrendStore(args.db) as store:
+        return args.handler(store, args, thresholds)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
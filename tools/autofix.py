@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+自动修复 - Audit Autofix
+按审计规则 ID 选择修复器，修复器在 yaml.compose 得到的节点上定位问题，只替换对应的源码片段，
+注释、缩进与引号风格保持不变。文件在多个进程中并行处理，只备份实际修改的文件，--dry-run 输出 diff
+"""
+
+import argparse
+import difflib
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import yaml
+
+try:
+    from tools.audit_rules import COMMON_BUILTINS, SENSITIVE_KEYWORDS, TASK_KEYWORDS, TASK_SECTIONS, \
+        VARS_WARNING_PATTERN
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from audit_rules import COMMON_BUILTINS, SENSITIVE_KEYWORDS, TASK_KEYWORDS, TASK_SECTIONS, \
+        VARS_WARNING_PATTERN
+
+# 与审计相同的目标文件：(glob 模式, 文件类型)
+TARGET_PATTERNS = (
+    ('playbook.yml', 'playbook'),
+    ('roles/*/tasks/*.yml', 'tasks'),
+    ('handlers/main.yml', 'tasks'),
+    ('vars/example_vars.yml', 'vars'),
+)
+
+# 少于该数量的文件不启动进程池
+PARALLEL_MIN_FILES = 8
+
+# 单个修复器在一个文件上最多重复的轮数（语法修复每轮只能处理一处解析错误）
+MAX_PASSES = 100
+
+# 可以安全改写为 ansible.builtin.<模块> 的内置模块；其他短名可能属于别的 collection，不自动改写
+BUILTIN_MODULES = {
+    'add_host', 'apt', 'apt_key', 'apt_repository', 'assemble', 'async_status', 'blockinfile',
+    'command', 'copy', 'cron', 'deb822_repository', 'debconf', 'dnf', 'dpkg_selections', 'expect',
+    'fetch', 'file', 'find', 'get_url', 'getent', 'git', 'group', 'group_by', 'hostname',
+    'import_role', 'include_role', 'iptables', 'known_hosts', 'lineinfile', 'package',
+    'package_facts', 'ping', 'pip', 'raw', 'reboot', 'replace', 'rpm_key', 'script', 'service',
+    'service_facts', 'setup', 'shell', 'slurp', 'stat', 'subversion', 'systemd', 'systemd_service',
+    'sysvinit', 'tempfile', 'template', 'unarchive', 'uri', 'user', 'validate_argument_spec',
+    'wait_for_connection', 'yum_repository',
+} - TASK_KEYWORDS - COMMON_BUILTINS
+
+# 任务中可以嵌套任务列表的键
+BLOCK_SECTIONS = ('block', 'rescue', 'always')
+
+VARS_WARNING_HEADER = (
+    '# ⚠️ 警告：本文件仅为示例配置\n'
+    '# ⚠️ 占位符必须使用 Ansible Vault 或环境变量替换\n'
+    '# ⚠️ 请勿在生产环境中直接使用这些示例值\n'
+    '\n'
+)
+
+# 整个值是未加引号的 Jinja 表达式时，YAML 会把它解析成嵌套的流式映射
+JINJA_PATTERN = re.compile(r'^\{\{.*\}\}$')
+# 解析错误所在行形如 "key: {{ ... }}..." 或 "- {{ ... }}..."：(前缀, 值, 行尾空白或注释)
+JINJA_LINE_PATTERN = re.compile(r'^(\s*(?:-\s+)?[\w.-]+:\s+|\s*-\s+)(\{\{.*?)(\s+#.*|\s*)$')
+
+
+class Parsed(NamedTuple):
+    """一轮修复开始时的解析结果；解析失败时 documents 为空，error 为解析错误"""
+    documents: List[yaml.Node]
+    error: Optional[yaml.YAMLError] = None
+
+
+class Edit(NamedTuple):
+    """一处源码片段替换：把 text[start:end] 换成 replacement"""
+    start: int
+    end: int
+    replacement: str
+    message: str
+
+
+@dataclass
+class Fixer:
+    """一个修复器，rule_id 与它修复的审计规则一致"""
+    rule_id: str
+    kinds: Tuple[str, ...]
+    fix: Callable[[str, Parsed], List[Edit]]
+    description: str = ''
+    # 不带 --rule 运行时是否启用；会改变运行行为的修复需要显式选择
+    default: bool = True
+
+
+FIXERS: Dict[str, Fixer] = {}
+
+
+def fixer(rule_id: str, *kinds: str, description: str = '', default: bool = True):
+    """注册修复器的装饰器，注册顺序即执行顺序"""
+    def decorator(fix: Callable[[str, Parsed], List[Edit]]):
+        FIXERS[rule_id] = Fixer(rule_id, kinds, fix, description, default)
+        return fix
+    return decorator
+
+
+def parse(text: str) -> Parsed:
+    """解析为节点树，每个节点保留源码位置"""
+    try:
+        return Parsed([node for node in yaml.compose_all(text, Loader=yaml.SafeLoader) if node is not None])
+    except yaml.YAMLError as error:
+        return Parsed([], error)
+
+
+def apply_edits(text: str, edits: Sequence[Edit]) -> str:
+    """从后往前替换，与已应用片段重叠的修改被丢弃，下一轮重新计算"""
+    applied_start = len(text) + 1
+    for edit in sorted(edits, key=lambda edit: edit.start, reverse=True):
+        if edit.end > applied_start:
+            continue
+        text = text[:edit.start] + edit.replacement + text[edit.end:]
+        applied_start = edit.start
+    return text
+
+
+def _get(node: yaml.Node, key: str) -> Optional[yaml.Node]:
+    if isinstance(node, yaml.MappingNode):
+        for key_node, value in node.value:
+            if isinstance(key_node, yaml.ScalarNode) and key_node.value == key:
+                return value
+    return None
+
+
+def _task_list(node: Optional[yaml.Node]) -> Iterator[yaml.MappingNode]:
+    """任务列表中的任务，包括 block/rescue/always 中嵌套的任务"""
+    if not isinstance(node, yaml.SequenceNode):
+        return
+    for item in node.value:
+        if isinstance(item, yaml.MappingNode):
+            yield item
+            for section in BLOCK_SECTIONS:
+                yield from _task_list(_get(item, section))
+
+
+def iter_tasks(documents: List[yaml.Node]) -> Iterator[yaml.MappingNode]:
+    """playbook 中各 play 的任务与 handler；任务文件的顶层列表即任务"""
+    for document in documents:
+        if not isinstance(document, yaml.SequenceNode):
+            continue
+        plays = [item for item in document.value
+                 if isinstance(item, yaml.MappingNode)
+                 and any(_get(item, key) is not None for key in ('hosts', 'import_playbook'))]
+        if not plays:
+            yield from _task_list(document)
+        for play in plays:
+            for section in TASK_SECTIONS + ('handlers',):
+                yield from _task_list(_get(play, section))
+
+
+def _iter_values(node: yaml.Node) -> Iterator[yaml.Node]:
+    """深度优先产出所有映射值与序列元素"""
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, yaml.MappingNode):
+            children = [value for _, value in item.value]
+        elif isinstance(item, yaml.SequenceNode):
+            children = list(item.value)
+        else:
+            continue
+        stack.extend(reversed(children))
+        yield from children
+
+
+def _quote(value: str) -> str:
+    if '"' not in value and '\\' not in value:
+        return f'"{value}"'
+    return "'" + value.replace("'", "''") + "'"
+
+
+@fixer('yaml-syntax', 'playbook', 'tasks', 'vars', description='为未加引号的 Jinja 表达式值加引号')
+def fix_unquoted_templates(text: str, parsed: Parsed) -> List[Edit]:
+    """key: {{ var }} 能解析但被当作映射，key: {{ var }}/x 无法解析；两种情况都给整个值加引号"""
+    if parsed.error is not None:
+        # 解析失败：只修复出错行上以 Jinja 表达式开头的值，块标量等其他位置不受影响
+        if not isinstance(parsed.error, yaml.MarkedYAMLError):
+            return []
+        marks = [mark for mark in (parsed.error.problem_mark, parsed.error.context_mark) if mark is not None]
+        lines = text.splitlines(keepends=True)
+        for mark in marks:
+            if mark.line >= len(lines):
+                continue
+            line = lines[mark.line]
+            match = JINJA_LINE_PATTERN.match(line.rstrip('\r\n'))
+            if match:
+                start = sum(len(previous) for previous in lines[:mark.line]) + match.start(2)
+                value = match.group(2)
+                return [Edit(start, start + len(value), _quote(value), f'第 {mark.line + 1} 行: {value}')]
+        return []
+
+    edits = []
+    for document in parsed.documents:
+        for node in _iter_values(document):
+            if not (isinstance(node, yaml.MappingNode) and node.flow_style):
+                continue
+            value = text[node.start_mark.index:node.end_mark.index]
+            if JINJA_PATTERN.match(value) and '\n' not in value:
+                edits.append(Edit(node.start_mark.index, node.end_mark.index, _quote(value),
+                                  f'第 {node.start_mark.line + 1} 行: {value}'))
+    return edits
+
+
+@fixer('vars-warning-header', 'vars', description='在示例变量文件开头添加警告头')
+def fix_vars_warning(text: str, parsed: Parsed) -> List[Edit]:
+    if VARS_WARNING_PATTERN.search(text):
+        return []
+    # 保留开头的 --- 分隔符
+    start = 0
+    if text.startswith('---'):
+        newline = text.find('\n')
+        start = len(text) if newline < 0 else newline + 1
+    return [Edit(start, start, VARS_WARNING_HEADER, '添加警告头')]
+
+
+@fixer('task-fqcn', 'playbook', 'tasks', description='把内置模块短名改为 ansible.builtin.<模块>')
+def fix_task_fqcn(text: str, parsed: Parsed) -> List[Edit]:
+    edits = []
+    for task in iter_tasks(parsed.documents):
+        for key, _ in task.value:
+            if isinstance(key, yaml.ScalarNode) and key.style is None and key.value in BUILTIN_MODULES:
+                edits.append(Edit(key.start_mark.index, key.end_mark.index, f'ansible.builtin.{key.value}',
+                                  f'第 {key.start_mark.line + 1} 行: {key.value}'))
+    return edits
+
+
+def _node_strings(node: yaml.Node) -> Iterator[str]:
+    """节点树中所有标量（含键）的源码值"""
+    if isinstance(node, yaml.ScalarNode):
+        yield node.value
+    elif isinstance(node, yaml.MappingNode):
+        for key, value in node.value:
+            yield from _node_strings(key)
+            yield from _node_strings(value)
+    elif isinstance(node, yaml.SequenceNode):
+        for item in node.value:
+            yield from _node_strings(item)
+
+
+@fixer('task-no-log', 'playbook', 'tasks', description='为含敏感信息的任务添加 no_log: true', default=False)
+def fix_task_no_log(text: str, parsed: Parsed) -> List[Edit]:
+    """在任务第一个键所在行之后插入 no_log: true；已显式设置 no_log 的任务不改动"""
+    edits = []
+    for task in iter_tasks(parsed.documents):
+        if task.flow_style or not task.value or _get(task, 'no_log') is not None:
+            continue
+        if not any(keyword in value.lower() for value in _node_strings(task) for keyword in SENSITIVE_KEYWORDS):
+            continue
+        first_key, first_value = task.value[0]
+        if first_value.start_mark.line != first_value.end_mark.line or isinstance(first_value, yaml.CollectionNode):
+            continue  # 第一个值跨行时无法确定插入位置
+        newline = text.find('\n', first_value.end_mark.index)
+        indent = ' ' * first_key.start_mark.column
+        if newline < 0:
+            edits.append(Edit(len(text), len(text), f'\n{indent}no_log: true\n', f'第 {first_key.start_mark.line + 1} 行'))
+        else:
+            edits.append(Edit(newline + 1, newline + 1, f'{indent}no_log: true\n', f'第 {first_key.start_mark.line + 1} 行'))
+    return edits
+
+
+@dataclass
+class FileResult:
+    """单个文件的修复结果"""
+    path: str
+    fixed: Optional[str] = None
+    fixes: Dict[str, List[str]] = field(default_factory=dict)
+    error: str = ''
+    diff: str = ''
+
+
+def file_kind(path: Union[str, Path]) -> Optional[str]:
+    path = Path(path)
+    for pattern, kind in TARGET_PATTERNS:
+        if path.match(pattern):
+            return kind
+    return None
+
+
+def fix_text(text: str, kind: str, rule_ids: Sequence[str]) -> Tuple[str, Dict[str, List[str]], str]:
+    """依次运行适用的修复器，返回 (修复后文本, 每条规则的修复说明, 仍无法解析时的错误)"""
+    fixes: Dict[str, List[str]] = {}
+    for rule_id in rule_ids:
+        selected = FIXERS[rule_id]
+        if kind not in selected.kinds:
+            continue
+        for _ in range(MAX_PASSES):
+            edits = selected.fix(text, parse(text))
+            if not edits:
+                break
+            text = apply_edits(text, edits)
+            fixes.setdefault(rule_id, []).extend(edit.message for edit in edits)
+
+    error = parse(text).error if kind != 'vars' else None
+    return text, fixes, f'YAML 仍无法解析: {str(error).splitlines()[0]}' if error else ''
+
+
+def fix_file(root: Union[str, Path], path: str, rule_ids: Sequence[str], want_diff: bool = False) -> FileResult:
+    """修复一个文件（只计算结果，不写盘）"""
+    result = FileResult(path)
+    try:
+        original = (Path(root) / path).read_bytes().decode('utf-8')
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = f'读取失败: {e}'
+        return result
+    fixed, result.fixes, result.error = fix_text(original, file_kind(path) or 'playbook', rule_ids)
+    if fixed != original:
+        result.fixed = fixed
+        if want_diff:
+            result.diff = ''.join(difflib.unified_diff(
+                original.splitlines(keepends=True), fixed.splitlines(keepends=True),
+                fromfile=f'a/{path}', tofile=f'b/{path}'))
+    return result
+
+
+def _fix_item(item: Tuple[str, str, Tuple[str, ...], bool]) -> FileResult:
+    return fix_file(*item)
+
+
+def find_targets(root: Union[str, Path]) -> List[str]:
+    """审计会检查的 YAML 文件（跳过 venv 与隐藏目录，如 .git 与备份目录）"""
+    root = Path(root)
+    paths = set()
+    for pattern, _ in TARGET_PATTERNS:
+        for path in root.rglob(pattern):
+            relative = path.relative_to(root)
+            if not any(part == 'venv' or part.startswith('.') for part in relative.parts[:-1]):
+                paths.add(relative.as_posix())
+    return sorted(paths)
+
+
+def fix_files(root: Union[str, Path], paths: Sequence[str], rule_ids: Sequence[str],
+              jobs: int = 1, want_diff: bool = False) -> List[FileResult]:
+    """并行修复给定文件，结果顺序与输入一致"""
+    items = [(str(root), path, tuple(rule_ids), want_diff) for path in paths]
+    if jobs > 1 and len(items) >= PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(_fix_item, items, chunksize=max(1, len(items) // (jobs * 4))))
+    return [_fix_item(item) for item in items]
+
+
+def write_result(root: Union[str, Path], result: FileResult, backup_dir: Optional[Path]):
+    """先备份原文件（保留相对路径），再原子替换"""
+    target = Path(root) / result.path
+    if backup_dir is not None:
+        backup = backup_dir / result.path
+        backup.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(target, backup)
+    temp = target.with_name(f'.{target.name}.autofix')
+    temp.write_bytes(result.fixed.encode('utf-8'))
+    shutil.copymode(target, temp)
+    temp.replace(target)
+
+
+def write_report(path: Path, root: Path, results: List[FileResult], rule_ids: Sequence[str],
+                 backup_dir: Optional[Path], dry_run: bool):
+    """写出文本修复报告"""
+    changed = [result for result in results if result.fixed is not None]
+    counts = {rule_id: sum(len(result.fixes.get(rule_id, [])) for result in results) for rule_id in rule_ids}
+    lines = [
+        '自动修复报告',
+        '=============',
+        f'执行时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}',
+        f'项目路径: {root}',
+        f'备份路径: {backup_dir if backup_dir and changed else "无"}',
+        f'模式: {"仅预览（--dry-run）" if dry_run else "已写入"}',
+        '',
+        '修复统计:',
+        '---------',
+        f'- 检查文件: {len(results)}，修改文件: {len(changed)}',
+    ]
+    lines += [f'- {rule_id}: {count} 处' for rule_id, count in counts.items()]
+    errors = [result for result in results if result.error]
+    if errors:
+        lines += ['', '未能修复:', '---------']
+        lines += [f'- {result.path}: {result.error}' for result in errors]
+    lines += ['', '修改的文件:', '-----------']
+    lines += [f'- {result.path} ({", ".join(sorted(result.fixes))})' for result in changed] or ['- 无']
+    if backup_dir and changed and not dry_run:
+        lines += ['', '回滚:', '-----', f'  cp -r {backup_dir}/. {root}/']
+    lines += [
+        '',
+        '下一步:',
+        '-------',
+        '1. 重新运行审计: python3 tools/comprehensive_audit.py --project-root .',
+        '2. 手动处理缺少 gather_facts 的 playbook（审计规则 gather-facts）',
+        '3. 检查硬编码密码: python3 tools/secret_scanner.py .',
+        '',
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='按审计规则自动修复常见问题')
+    parser.add_argument('paths', nargs='*', help='要修复的文件（相对项目根目录，默认: 审计检查的全部 YAML 文件）')
+    parser.add_argument('--project-root', default='.', help='项目根目录 (默认: 当前目录)')
+    parser.add_argument('--rule', action='append', dest='rules', metavar='RULE_ID',
+                        help='只运行指定规则的修复器，可重复（默认: 全部默认启用的修复器）')
+    parser.add_argument('--list-rules', action='store_true', help='列出可用的修复器')
+    parser.add_argument('--dry-run', action='store_true', help='只输出 diff，不修改文件')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='并行进程数 (默认: CPU 核数)')
+    parser.add_argument('--backup-dir', help='备份目录 (默认: <项目根目录>/.audit_backup_<时间>)')
+    parser.add_argument('--no-backup', action='store_true', help='不备份被修改的文件')
+    parser.add_argument('--report', help='写出文本修复报告')
+    args = parser.parse_args(argv)
+
+    if args.list_rules:
+        for rule in FIXERS.values():
+            print(f'{rule.rule_id:22} {"默认" if rule.default else "可选"}  {rule.description}')
+        return 0
+
+    rule_ids = args.rules or [rule_id for rule_id, rule in FIXERS.items() if rule.default]
+    unknown = [rule_id for rule_id in rule_ids if rule_id not in FIXERS]
+    if unknown:
+        parser.error(f'没有对应的修复器: {", ".join(unknown)}（可用: {", ".join(FIXERS)}）')
+    # 按注册顺序执行，语法修复总在结构化修复之前
+    rule_ids = [rule_id for rule_id in FIXERS if rule_id in rule_ids]
+
+    root = Path(args.project_root)
+    paths = args.paths or find_targets(root)
+    backup_dir = None
+    if not args.no_backup:
+        backup_dir = Path(args.backup_dir) if args.backup_dir else \
+            root / f'.audit_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+
+    print(f'🔧 自动修复: {root}')
+    print(f'   规则: {", ".join(rule_ids)}')
+    print()
+    results = fix_files(root, paths, rule_ids, args.jobs, want_diff=args.dry_run)
+
+    changed = 0
+    for result in results:
+        if result.fixed is not None:
+            changed += 1
+            if args.dry_run:
+                sys.stdout.write(result.diff)
+            else:
+                write_result(root, result, backup_dir)
+                summary = ', '.join(f'{rule_id} ×{len(messages)}' for rule_id, messages in result.fixes.items())
+                print(f'  ✓ 已修复: {result.path} ({summary})')
+        if result.error:
+            print(f'  ❌ {result.path}: {result.error}')
+
+    print()
+    print(f'📊 检查 {len(results)} 个文件，{"将修改" if args.dry_run else "修改了"} {changed} 个')
+    for rule_id in rule_ids:
+        count = sum(len(result.fixes.get(rule_id, [])) for result in results)
+        print(f'   {rule_id}: {count} 处')
+    if backup_dir and changed and not args.dry_run:
+        print(f'📦 备份目录: {backup_dir}')
+    if args.report:
+        write_report(Path(args.report), root, results, rule_ids, backup_dir, args.dry_run)
+        print(f'📄 详细报告: {args.report}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
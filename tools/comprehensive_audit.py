@@ -10,21 +10,90 @@ import yaml
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 from collections import defaultdict
 from datetime import datetime
 
+try:
+    from tools.audit_baseline import DEFAULT_BASELINE, Baseline, fingerprint, is_hidden_path, normalize_path
+    from tools.audit_cache import (DEFAULT_CACHE, FindingCache, RuleRecorder, content_hash, file_hash,
+                                   rule_version, source_version)
+    from tools.audit_rules import DEFAULT_RULES, FileContext, RuleEngine, TimeBudget, node_key, node_keys
+    from tools.audit_sinks import IssueSink, NdjsonSink, SarifSink
+    from tools.handler_graph import HandlerGraph
+    from tools.issue_store import PRIORITIES, IssueStore, format_issue
+    from tools.markdown_scan import parse_markdown
+    from tools.secret_scanner import EntropyDetector, SecretScanner, iter_scan_targets
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from audit_baseline import DEFAULT_BASELINE, Baseline, fingerprint, is_hidden_path, normalize_path
+    from audit_cache import (DEFAULT_CACHE, FindingCache, RuleRecorder, content_hash, file_hash,
+                             rule_version, source_version)
+    from audit_rules import DEFAULT_RULES, FileContext, RuleEngine, TimeBudget, node_key, node_keys
+    from audit_sinks import IssueSink, NdjsonSink, SarifSink
+    from handler_graph import HandlerGraph
+    from issue_store import PRIORITIES, IssueStore, format_issue
+    from markdown_scan import parse_markdown
+    from secret_scanner import EntropyDetector, SecretScanner, iter_scan_targets
+
+# 密钥扫描结果类型对应的问题描述
+SECRET_MESSAGES = {
+    'password': '可能存在硬编码密码',
+    'api_key': '可能存在硬编码 API Key',
+    'secret': '可能存在硬编码 Secret',
+    'token': '可能存在硬编码 Token',
+    'private_key': '可能存在硬编码私钥',
+    'high_entropy': '可能存在高熵密钥',
+}
+
+# 置信度不低于该值的高熵字面量按 high 级别报告，其余为 medium
+ENTROPY_HIGH_CONFIDENCE = 0.85
+
+# 各类文件分发的节点类型，决定结果缓存中需要检查版本的规则
+PLAYBOOK_NODES = ('play', 'task', 'handler')
+TASKS_FILE_NODES = ('included_task',)
+HANDLERS_FILE_NODES = ('included_handler',)
+VARS_FILE_NODES = ('vars_file',)
+README_NODES = ('readme',)
+
+# 密钥扫描在结果缓存中作为一条伪规则
+SECRETS_CACHE_ID = 'secrets'
+
+# 被 --rule-budget 停用时 handler 图不完整的检查（收集通知关系的规则）
+HANDLER_GRAPH_INPUTS = ('handler-graph',)
+
+
+def cache_engine_version() -> str:
+    """节点遍历、节点键与单文件检查流程的版本，变化时整个结果缓存失效"""
+    return source_version(RuleEngine, FileContext, node_key, node_keys, ComprehensiveAuditor.visit_cached,
+                          ComprehensiveAuditor._visit_playbook, ComprehensiveAuditor._visit_tasks_file)
+
+
 class ComprehensiveAuditor:
     """全面审计工具"""
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, baseline: Optional[Baseline] = None,
+                 new_only: bool = False, sinks: Optional[List[IssueSink]] = None,
+                 keep_issues: bool = True, max_seconds: Optional[float] = None,
+                 rule_budget: Optional[float] = None, cache: Optional[FindingCache] = None,
+                 update_baseline: bool = False):
         self.project_root = Path(project_root)
-        self.issues = {
-            'critical': [],
-            'high': [],
-            'medium': [],
-            'low': []
-        }
+        # 超出时间预算后，结构检查照常完成，playbook 解析、密钥扫描等昂贵检查改为抽样或跳过
+        self.budget = TimeBudget(max_seconds)
+        self.rule_budget = rule_budget
+        # 基线中的已知问题在 new_only 模式下不计入报告
+        self.baseline = baseline
+        self.new_only = new_only
+        # 问题产生时立即写入各个输出；keep_issues 为 False 时不在内存中保留问题列表
+        self.sinks = list(sinks or [])
+        self.keep_issues = keep_issues
+        # 路径、规则 ID 与消息模板驻留存储，消息在渲染时才格式化
+        self.store = IssueStore(keep=keep_issues)
+        self.counts = dict.fromkeys(PRIORITIES, 0)
+        self.suppressed = dict.fromkeys(PRIORITIES, 0)
+        # 本次再次出现的基线问题指纹（不超过基线大小），用于统计已修复问题
+        self.seen_known: Set[str] = set()
+        # 只有更新基线时才记录本次所有问题的 (优先级, 规则 ID, 路径, 节点键)
+        self.baseline_entries: Optional[Dict[str, Tuple[str, str, str, str]]] = {} if update_baseline else None
         self.stats = defaultdict(int)
         self.module_categories = [
             'system', 'files', 'network', 'database', 'applications',
@@ -32,6 +101,14 @@ class ComprehensiveAuditor:
             'virtualization', 'version_control', 'advanced', 'network_protocols',
             'commands'
         ]
+        self.rule_engine = RuleEngine(DEFAULT_RULES, self.budget, rule_budget)
+        # 跨文件索引，在文件内容检查的单次遍历中建立
+        self.handler_graph = HandlerGraph()
+        self.shared = {'handler_graph': self.handler_graph}
+        self.secret_scanner = SecretScanner(entropy=EntropyDetector())
+        # 单文件检查结果缓存；仓库级汇总（元数据、重复、覆盖率、handler 图分析）每次重新计算
+        self.finding_cache = cache
+        self._rule_versions: Dict[Tuple[str, ...], Dict[str, str]] = {}
         
     def run_audit(self) -> Dict[str, Any]:
         """运行完整审计流程"""
@@ -81,7 +158,8 @@ class ComprehensiveAuditor:
             category_path = self.project_root / category
             if not category_path.exists():
                 self.add_issue('high', f'缺失模块分类目录: {category}/', 
-                             f'创建目录: mkdir -p {category}')
+                             f'创建目录: mkdir -p {category}',
+                             'missing-category', key=category)
                 continue
             
             self.stats[f'category_{category}'] = 1
@@ -97,7 +175,8 @@ class ComprehensiveAuditor:
             dir_path = self.project_root / dir_name
             if not dir_path.exists():
                 self.add_issue('critical', f'缺失关键目录: {dir_name}/', 
-                             f'创建目录: mkdir -p {dir_name}')
+                             f'创建目录: mkdir -p {dir_name}',
+                             'missing-directory', key=dir_name)
             else:
                 self.stats[f'dir_{dir_name}'] = 1
     
@@ -118,252 +197,243 @@ class ComprehensiveAuditor:
             if not full_path.exists():
                 self.add_issue(priority, 
                              f'模块 {category}/{module_name} 缺失文件: {file_path}',
-                             f'创建文件: {full_path}')
+                             f'创建文件: {full_path}',
+                             'module-missing-file', full_path)
             else:
                 self.stats[f'has_{file_path.replace("/", "_")}'] += 1
     
     def check_file_contents(self):
-        """B. 检查文件内容"""
+        """B. 检查文件内容
+
+        playbook 与任务文件的结构检查不受时间预算限制，预算只对 README 语言与密钥扫描抽样。
+        """
         # 查找所有 playbook.yml 文件
-        for playbook_path in self.project_root.rglob('playbook.yml'):
+        for playbook_path in self._find_files('playbook.yml'):
             self.check_playbook_content(playbook_path)
         
+        # role 任务文件与 handlers 文件参与 notify/handler 关系分析
+        for tasks_file in self._find_files('roles/*/tasks/*.yml'):
+            self.check_tasks_file(tasks_file)
+        for handlers_file in self._find_files('handlers/main.yml'):
+            self.check_tasks_file(handlers_file, handlers=True)
+        
         # 检查所有变量文件
-        for vars_file in self.project_root.rglob('vars/example_vars.yml'):
+        for vars_file in self._find_files('vars/example_vars.yml'):
             self.check_vars_file(vars_file)
         
         # 检查所有 README
-        for readme in self.project_root.rglob('README.md'):
+        for readme in self._find_files('README.md'):
             self.check_readme_content(readme)
     
+    def _find_files(self, pattern: str) -> Iterator[Path]:
+        """项目中匹配的文件，跳过 .git、.pytest_cache 等隐藏目录"""
+        for path in self.project_root.rglob(pattern):
+            if not is_hidden_path(path.relative_to(self.project_root).as_posix()):
+                yield path
+    
+    def _context(self, path: Path) -> FileContext:
+        return FileContext(path=path, add_issue=self.add_issue, stats=self.stats, shared=self.shared)
+    
     def check_playbook_content(self, playbook_path: Path):
         """检查单个 playbook 内容"""
         self.stats['total_playbooks'] += 1
         
         try:
-            with open(playbook_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # YAML 语法检查
-            try:
-                data = yaml.safe_load(content)
-            except yaml.YAMLError as e:
-                self.add_issue('critical', 
-                             f'YAML 语法错误: {playbook_path}',
-                             f'修复 YAML 语法错误: {str(e)}')
-                return
-            
-            if not data or not isinstance(data, list):
-                self.add_issue('high', f'Playbook 格式错误: {playbook_path}',
-                             'Playbook 应该是一个列表')
-                return
-            
-            for play in data:
-                if not isinstance(play, dict):
-                    continue
-                
-                # 检查 gather_facts
-                if 'gather_facts' not in play:
-                    self.add_issue('medium', 
-                                 f'缺少 gather_facts 声明: {playbook_path}',
-                                 '添加 gather_facts: true 或 gather_facts: false')
-                else:
-                    self.stats['has_gather_facts'] += 1
-                
-                # 检查任务中的模块是否使用 FQCN
-                tasks = play.get('tasks', []) + play.get('pre_tasks', []) + play.get('post_tasks', [])
-                for task in tasks:
-                    if isinstance(task, dict):
-                        self.check_task_fqcn(task, playbook_path)
-                        self.check_task_chinese(task, playbook_path)
-                        self.check_task_no_log(task, playbook_path)
-                
-                # 检查 handlers
-                handlers = play.get('handlers', [])
-                for handler in handlers:
-                    if isinstance(handler, dict):
-                        self.check_handler_chinese(handler, playbook_path)
+            content = playbook_path.read_bytes()
+            self.visit_cached(playbook_path, content, self.rule_versions(PLAYBOOK_NODES),
+                              lambda ctx: self._visit_playbook(playbook_path, content, ctx))
                         
         except Exception as e:
             self.add_issue('high', f'读取文件失败: {playbook_path}',
-                         f'错误: {str(e)}')
-    
-    def check_task_fqcn(self, task: Dict, playbook_path: Path):
-        """检查任务是否使用 FQCN"""
-        # 获取模块名（跳过特殊键）
-        special_keys = {'name', 'when', 'with_items', 'loop', 'register', 
-                       'notify', 'tags', 'become', 'become_user', 'vars',
-                       'block', 'rescue', 'always', 'include', 'import_tasks',
-                       'include_tasks', 'import_playbook'}
-        
-        for key in task.keys():
-            if key not in special_keys:
-                # 检查是否是 FQCN 格式 (namespace.collection.module)
-                if key.count('.') < 2 and not key.startswith('ansible.builtin.'):
-                    # 一些内置模块可能不使用 FQCN
-                    common_builtins = {'debug', 'set_fact', 'assert', 'fail', 
-                                      'meta', 'pause', 'wait_for', 'include_vars'}
-                    if key not in common_builtins:
-                        self.add_issue('low', 
-                                     f'模块未使用 FQCN: {key} in {playbook_path}',
-                                     f'使用完全限定名，如 ansible.builtin.{key}')
-                        self.stats['non_fqcn_modules'] += 1
-                    else:
-                        self.stats['fqcn_modules'] += 1
-                else:
-                    self.stats['fqcn_modules'] += 1
-    
-    def check_task_chinese(self, task: Dict, playbook_path: Path):
-        """检查任务名称是否为中文"""
-        if 'name' in task:
-            name = task['name']
-            # 检查是否包含中文字符
-            if not re.search(r'[\u4e00-\u9fff]', name):
-                self.add_issue('low', 
-                             f'任务名称不是中文: "{name}" in {playbook_path}',
-                             '使用中文任务名称')
-                self.stats['non_chinese_tasks'] += 1
-            else:
-                self.stats['chinese_tasks'] += 1
+                         f'错误: {str(e)}',
+                         'read-error', playbook_path)
     
-    def check_task_no_log(self, task: Dict, playbook_path: Path):
-        """检查敏感操作是否使用 no_log"""
-        sensitive_keywords = ['password', 'passwd', 'secret', 'token', 'key', 
-                            'vault', 'credential', 'api_key']
+    def _visit_playbook(self, playbook_path: Path, content: bytes, ctx: FileContext) -> bool:
+        # YAML 语法检查
+        try:
+            data = yaml.safe_load(content.decode('utf-8'))
+        except yaml.YAMLError as e:
+            self.add_issue('critical', 
+                         f'YAML 语法错误: {playbook_path}',
+                         f'修复 YAML 语法错误: {str(e)}',
+                         'yaml-syntax', playbook_path)
+            return False
         
-        task_str = str(task).lower()
-        has_sensitive = any(kw in task_str for kw in sensitive_keywords)
+        if not data or not isinstance(data, list):
+            self.add_issue('high', f'Playbook 格式错误: {playbook_path}',
+                         'Playbook 应该是一个列表',
+                         'playbook-format', playbook_path)
+            return False
         
-        if has_sensitive and not task.get('no_log'):
-            self.add_issue('high', 
-                         f'敏感操作未使用 no_log: {playbook_path}',
-                         '为包含敏感信息的任务添加 no_log: true')
-            self.stats['missing_no_log'] += 1
-    
-    def check_handler_chinese(self, handler: Dict, playbook_path: Path):
-        """检查 handler 名称是否为中文"""
-        if 'name' in handler:
-            name = handler['name']
-            if not re.search(r'[\u4e00-\u9fff]', name):
-                self.add_issue('medium', 
-                             f'Handler 名称不是中文: "{name}" in {playbook_path}',
-                             '使用中文 handler 名称')
+        # play、任务与 handler 规则在一次遍历中完成
+        self.rule_engine.visit_playbook(data, ctx)
+        return True
+    
+    def check_tasks_file(self, tasks_path: Path, handlers: bool = False):
+        """检查 role 任务文件或 handlers 文件"""
+        self.stats['total_task_files'] += 1
+        
+        try:
+            content = tasks_path.read_bytes()
+        except OSError as e:
+            self.add_issue('high', f'读取文件失败: {tasks_path}',
+                         f'错误: {str(e)}',
+                         'read-error', tasks_path)
+            return
+        
+        node_types = HANDLERS_FILE_NODES if handlers else TASKS_FILE_NODES
+        self.visit_cached(tasks_path, content, self.rule_versions(node_types),
+                          lambda ctx: self._visit_tasks_file(tasks_path, content, ctx, handlers))
+    
+    def _visit_tasks_file(self, tasks_path: Path, content: bytes, ctx: FileContext, handlers: bool) -> bool:
+        try:
+            data = yaml.safe_load(content.decode('utf-8'))
+        except yaml.YAMLError as e:
+            self.add_issue('critical', 
+                         f'YAML 语法错误: {tasks_path}',
+                         f'修复 YAML 语法错误: {str(e)}',
+                         'yaml-syntax', tasks_path)
+            return False
+        
+        if isinstance(data, list):
+            self.rule_engine.visit_tasks_file(data, ctx, handlers)
+        return True
     
     def check_vars_file(self, vars_path: Path):
         """检查变量文件"""
         self.stats['total_vars_files'] += 1
         
         try:
-            with open(vars_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 检查警告头
-            warning_pattern = r'⚠️.*本文件仅为示例.*占位符.*Ansible Vault.*环境变量'
-            if not re.search(warning_pattern, content, re.DOTALL):
-                self.add_issue('medium', 
-                             f'变量文件缺少警告头: {vars_path}',
-                             '添加警告: ⚠️ 本文件仅为示例，占位符必须使用 Ansible Vault 或环境变量替换')
-                self.stats['vars_missing_warning'] += 1
-            else:
-                self.stats['vars_has_warning'] += 1
+            content = vars_path.read_bytes()
+            self.visit_cached(vars_path, content, self.rule_versions(VARS_FILE_NODES),
+                              lambda ctx: self.rule_engine.visit_vars_file(content.decode('utf-8'), ctx))
                 
         except Exception as e:
             self.add_issue('medium', f'读取变量文件失败: {vars_path}',
-                         f'错误: {str(e)}')
+                         f'错误: {str(e)}',
+                         'read-error', vars_path)
     
     def check_readme_content(self, readme_path: Path):
         """检查 README 内容"""
         self.stats['total_readmes'] += 1
         
         try:
-            with open(readme_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 检查是否包含英文内容（简单检测）
-            # 排除代码块和命令
-            lines = content.split('\n')
-            text_lines = [l for l in lines if not l.strip().startswith('```') 
-                         and not l.strip().startswith('#') 
-                         and not l.strip().startswith('-')
-                         and not l.strip().startswith('`')]
-            
-            text_content = ' '.join(text_lines)
-            # 检查是否有大量英文单词（可能是英文混用）
-            english_words = re.findall(r'\b[a-zA-Z]{4,}\b', text_content)
-            # 排除常见技术词汇
-            tech_words = {'ansible', 'playbook', 'yaml', 'python', 'linux', 
-                         'ubuntu', 'centos', 'rhel', 'sudo', 'root', 'user',
-                         'group', 'file', 'directory', 'service', 'systemd',
-                         'nginx', 'apache', 'mysql', 'postgresql', 'mongodb',
-                         'docker', 'kubernetes', 'vault', 'inventory', 'role',
-                         'task', 'handler', 'variable', 'template', 'module',
-                         'collection', 'galaxy', 'github', 'gitlab', 'aws',
-                         'azure', 'gcp', 'openstack', 'vmware', 'libvirt'}
-            
-            non_tech_english = [w for w in english_words 
-                              if w.lower() not in tech_words]
-            
-            if len(non_tech_english) > 10:
-                self.add_issue('low', 
-                             f'README 可能包含英文内容: {readme_path}',
-                             f'检查并翻译为中文 (发现 {len(non_tech_english)} 个非技术英文词汇)')
+            content = readme_path.read_bytes()
+            # 从已读取的内容解析，每个 README 只读取一次
+            self.visit_cached(readme_path, content, self.rule_versions(README_NODES),
+                              lambda ctx: self.rule_engine.visit_readme(
+                                  parse_markdown(content.decode('utf-8'), str(readme_path)), ctx))
                              
         except Exception as e:
             self.add_issue('low', f'读取 README 失败: {readme_path}',
-                         f'错误: {str(e)}')
+                         f'错误: {str(e)}',
+                         'read-error', readme_path)
+    
+    def rule_versions(self, node_types: Tuple[str, ...]) -> Dict[str, str]:
+        """关心这些节点类型的规则及其版本哈希（按注册顺序），密钥扫描是一条伪规则"""
+        versions = self._rule_versions.get(node_types)
+        if versions is None:
+            if node_types == (SECRETS_CACHE_ID,):
+                versions = {SECRETS_CACHE_ID: source_version(SecretScanner, EntropyDetector,
+                                                             ComprehensiveAuditor._report_secrets)}
+            else:
+                versions = {}
+                for node_type in node_types:
+                    for rule in DEFAULT_RULES.for_type(node_type):
+                        if rule.rule_id not in versions:
+                            versions[rule.rule_id] = rule_version(rule)
+            self._rule_versions[node_types] = versions
+        return versions
+    
+    def visit_cached(self, path: Path, content: Optional[bytes], versions: Dict[str, str],
+                     visit: Callable[[FileContext], Optional[bool]]):
+        """运行单文件检查；启用结果缓存时只运行内容或版本变化的规则，其余规则重放缓存输出
+
+        visit 解析文件并分发节点，解析失败时返回 False，此时不写入缓存。
+        content 为 None 时由 visit 自行读取文件，缓存所需的内容哈希按块读取计算。
+        所有规则都命中缓存时 visit 不会被调用，文件也不会被解析。
+        """
+        if self.finding_cache is None:
+            visit(self._context(path))
+            return
+        
+        digest = content_hash(content) if content is not None else file_hash(path)
+        records, stale = self.finding_cache.lookup(path, digest, versions)
+        if stale:
+            recorder = RuleRecorder()
+            ctx = FileContext(path=path, add_issue=recorder.add_issue, stats=recorder.stats,
+                              shared=self.shared, rules=stale, recorder=recorder)
+            skipped = sum(self.budget.skipped.values())
+            self.handler_graph.journal = recorder
+            try:
+                parsed = visit(ctx)
+            finally:
+                self.handler_graph.journal = None
+            fresh = recorder.records(stale)
+            records.update(fresh)
+            # 解析失败或有规则因时间预算被跳过时结果不完整，不写入缓存
+            if parsed is not False and sum(self.budget.skipped.values()) == skipped:
+                self.finding_cache.store(path, digest, versions, fresh)
+        
+        # 按规则注册顺序重放，缓存命中与否输出顺序相同
+        for rule_id in versions:
+            record = records[rule_id]
+            for priority, description, suggestion, issue_rule_id, key, fields in record['issues']:
+                self.add_issue(priority, description, suggestion, issue_rule_id, path, key, fields)
+            for name, delta in record['stats'].items():
+                self.stats[name] += delta
+            # 新运行规则的 handler 图事件在运行时已直接写入
+            if record['events'] and rule_id not in stale:
+                self.handler_graph.replay(record['events'])
     
     def check_security(self):
         """C. 安全性检查"""
-        # 检查所有 YAML 文件中的硬编码敏感信息
-        for yml_file in self.project_root.rglob('*.yml'):
-            if 'venv' in str(yml_file) or '.git' in str(yml_file):
-                continue
-            self.check_hardcoded_secrets(yml_file)
+        # 检查 YAML、Jinja 模板、inventory 与 group_vars/host_vars 中的硬编码敏感信息
+        for file_path in iter_scan_targets(self.project_root):
+            if self.budget.allow('secrets'):
+                self.check_hardcoded_secrets(file_path)
     
     def check_hardcoded_secrets(self, file_path: Path):
         """检查硬编码的密码和密钥"""
+        # 文件不读入内存：缓存命中时只按块计算哈希，未命中时由 scan_file 扫描（大文件使用 mmap）
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 检查可疑的硬编码模式
-            suspicious_patterns = [
-                (r'password:\s*["\']?[a-zA-Z0-9!@#$%^&*()_+\-=\[\]{};:,.<>?]{8,}["\']?',
-                 '可能存在硬编码密码'),
-                (r'api[_-]?key:\s*["\']?[a-zA-Z0-9]{20,}["\']?',
-                 '可能存在硬编码 API Key'),
-                (r'secret:\s*["\']?[a-zA-Z0-9]{16,}["\']?',
-                 '可能存在硬编码 Secret'),
-                (r'token:\s*["\']?[a-zA-Z0-9]{20,}["\']?',
-                 '可能存在硬编码 Token'),
-            ]
-            
-            for pattern, msg in suspicious_patterns:
-                matches = re.finditer(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    matched_text = match.group()
-                    # 排除明显的占位符和 vault_ 前缀
-                    if ('vault_' in matched_text.lower() or 
-                        'your_' in matched_text.lower() or
-                        'example' in matched_text.lower() or
-                        'placeholder' in matched_text.lower() or
-                        '***' in matched_text or
-                        'xxx' in matched_text.lower()):
-                        continue
-                    
-                    self.add_issue('critical', 
-                                 f'{msg}: {file_path}',
-                                 f'使用 vault_ 前缀或 Ansible Vault 加密: {matched_text}')
-                    self.stats['potential_hardcoded_secrets'] += 1
-                    
-        except Exception as e:
-            pass  # 跳过无法读取的文件
+            self.visit_cached(file_path, None, self.rule_versions((SECRETS_CACHE_ID,)),
+                              lambda ctx: self._report_secrets(file_path, ctx))
+        except OSError:
+            return  # 跳过无法读取的文件
+    
+    def _report_secrets(self, file_path: Path, ctx: FileContext):
+        ctx.begin(SECRETS_CACHE_ID)
+        truncated = self.secret_scanner.entropy.truncated
+        findings = self.secret_scanner.scan_file(file_path)
+        # 超出字节预算的文件只检查了开头部分
+        if self.secret_scanner.entropy.truncated > truncated:
+            ctx.stats['entropy_budget_truncated'] += 1
+        
+        for finding in findings:
+            if finding.kind == 'high_entropy':
+                # 熵检测是启发式的，按置信度分级
+                priority = 'high' if finding.confidence >= ENTROPY_HIGH_CONFIDENCE else 'medium'
+                ctx.add_issue(priority, 
+                            SECRET_MESSAGES[finding.kind] + ' (置信度 {confidence:.2f}): {path}',
+                            '使用 vault_ 前缀或 Ansible Vault 加密: {text} (第 {line} 行)',
+                            'secret-high-entropy', file_path, finding.text,
+                            {'confidence': finding.confidence, 'text': finding.text, 'line': finding.line})
+                ctx.stats['high_entropy_literals'] += 1
+                continue
+            ctx.add_issue('critical', 
+                        SECRET_MESSAGES[finding.kind] + ': {path}',
+                        '使用 vault_ 前缀或 Ansible Vault 加密: {text}',
+                        f'secret-{finding.kind.replace("_", "-")}', file_path, finding.key,
+                        {'text': finding.text})
+            ctx.stats['potential_hardcoded_secrets'] += 1
     
     def check_test_coverage(self):
         """D. 测试覆盖检查"""
         tests_dir = self.project_root / 'tests'
         if not tests_dir.exists():
-            self.add_issue('high', '缺少 tests 目录', '创建 tests 目录并添加测试')
+            self.add_issue('high', '缺少 tests 目录', '创建 tests 目录并添加测试',
+                           'missing-directory', key='tests')
             return
         
         # 统计测试文件
@@ -378,7 +448,8 @@ class ComprehensiveAuditor:
                 if not test_file.exists():
                     self.add_issue('medium', 
                                  f'分类 {category} 缺少测试文件',
-                                 f'创建 tests/test_{category}.py')
+                                 f'创建 tests/test_{category}.py',
+                                 'category-missing-tests', test_file)
     
     def check_metadata_consistency(self):
         """E. 元数据一致性"""
@@ -387,7 +458,8 @@ class ComprehensiveAuditor:
         if not metadata_file.exists():
             self.add_issue('critical', 
                          '缺少 metadata/modules.yaml 文件',
-                         '创建元数据文件')
+                         '创建元数据文件',
+                         'metadata-missing', metadata_file)
             return
         
         try:
@@ -397,7 +469,8 @@ class ComprehensiveAuditor:
             if not metadata:
                 self.add_issue('critical', 
                              'metadata/modules.yaml 为空',
-                             '填充元数据内容')
+                             '填充元数据内容',
+                             'metadata-empty', metadata_file)
                 return
             
             # 获取实际存在的模块
@@ -425,12 +498,14 @@ class ComprehensiveAuditor:
             for module in missing_in_metadata:
                 self.add_issue('medium', 
                              f'模块未在元数据中注册: {module}',
-                             f'在 metadata/modules.yaml 中添加该模块')
+                             f'在 metadata/modules.yaml 中添加该模块',
+                             'metadata-unregistered', metadata_file, module)
             
             for module in extra_in_metadata:
                 self.add_issue('low', 
                              f'元数据中的模块不存在: {module}',
-                             f'从 metadata/modules.yaml 中移除或创建该模块')
+                             f'从 metadata/modules.yaml 中移除或创建该模块',
+                             'metadata-orphan', metadata_file, module)
             
             self.stats['metadata_modules'] = len(metadata_modules)
             self.stats['actual_modules'] = len(actual_modules)
@@ -438,7 +513,8 @@ class ComprehensiveAuditor:
         except Exception as e:
             self.add_issue('high', 
                          f'读取元数据文件失败: {str(e)}',
-                         '检查并修复元数据文件格式')
+                         '检查并修复元数据文件格式',
+                         'read-error', metadata_file)
     
     def check_documentation(self):
         """F. 文档导航检查"""
@@ -447,7 +523,8 @@ class ComprehensiveAuditor:
         if not root_readme.exists():
             self.add_issue('critical', 
                          '缺少根目录 README.md',
-                         '创建根目录 README.md')
+                         '创建根目录 README.md',
+                         'docs-missing-readme', root_readme)
             return
         
         try:
@@ -461,7 +538,8 @@ class ComprehensiveAuditor:
                     if f'{category}/' not in content and f'{category}' not in content:
                         self.add_issue('low', 
                                      f'根 README 未提及分类: {category}',
-                                     f'在 README.md 中添加 {category} 分类的导航链接')
+                                     f'在 README.md 中添加 {category} 分类的导航链接',
+                                     'docs-category-link', root_readme, category)
             
             # 检查每个分类的 README
             for category in self.module_categories:
@@ -471,12 +549,14 @@ class ComprehensiveAuditor:
                     if category_path.exists() and any(category_path.iterdir()):
                         self.add_issue('medium', 
                                      f'分类缺少 README: {category}/README.md',
-                                     f'创建 {category}/README.md')
+                                     f'创建 {category}/README.md',
+                                     'docs-missing-readme', category_readme)
                         
         except Exception as e:
             self.add_issue('high', 
                          f'读取根 README 失败: {str(e)}',
-                         '检查根 README.md 文件')
+                         '检查根 README.md 文件',
+                         'read-error', root_readme)
     
     def check_dependencies(self):
         """G. 依赖和需求检查"""
@@ -485,7 +565,8 @@ class ComprehensiveAuditor:
         if not requirements_txt.exists():
             self.add_issue('high', 
                          '缺少 requirements.txt',
-                         '创建 requirements.txt 列出 Python 依赖')
+                         '创建 requirements.txt 列出 Python 依赖',
+                         'deps-missing-file', requirements_txt)
         else:
             self.stats['has_requirements_txt'] = 1
             try:
@@ -494,14 +575,16 @@ class ComprehensiveAuditor:
                     self.stats['python_dependencies'] = len([l for l in lines 
                                                              if l.strip() and not l.startswith('#')])
             except Exception as e:
-                self.add_issue('medium', f'读取 requirements.txt 失败: {str(e)}', '')
+                self.add_issue('medium', f'读取 requirements.txt 失败: {str(e)}', '',
+                               'read-error', requirements_txt)
         
         # 检查 collections/requirements.yml
         collections_req = self.project_root / 'collections' / 'requirements.yml'
         if not collections_req.exists():
             self.add_issue('high', 
                          '缺少 collections/requirements.yml',
-                         '创建 collections/requirements.yml 列出 Ansible Collections')
+                         '创建 collections/requirements.yml 列出 Ansible Collections',
+                         'deps-missing-file', collections_req)
         else:
             self.stats['has_collections_requirements'] = 1
             try:
@@ -510,7 +593,8 @@ class ComprehensiveAuditor:
                     if isinstance(collections, dict) and 'collections' in collections:
                         self.stats['ansible_collections'] = len(collections['collections'])
             except Exception as e:
-                self.add_issue('medium', f'读取 collections/requirements.yml 失败: {str(e)}', '')
+                self.add_issue('medium', f'读取 collections/requirements.yml 失败: {str(e)}', '',
+                               'read-error', collections_req)
     
     def check_redundancy(self):
         """H. 冗余和矛盾检查"""
@@ -529,43 +613,94 @@ class ComprehensiveAuditor:
             if len(locations) > 1:
                 self.add_issue('medium', 
                              f'模块名称重复: {module_name}',
-                             f'检查这些位置: {", ".join(locations)}')
+                             f'检查这些位置: {", ".join(locations)}',
+                             'duplicate-module-name', key=module_name)
                 self.stats['duplicate_module_names'] += 1
         
-        # 检查重复的 handler
-        self.check_duplicate_handlers()
+        # notify/handler 关系（索引在文件内容检查时已建立）
+        self.check_handler_graph()
     
-    def check_duplicate_handlers(self):
-        """检查重复定义的 handler"""
-        handlers = defaultdict(list)
-        
-        for playbook_path in self.project_root.rglob('playbook.yml'):
-            try:
-                with open(playbook_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                
-                if isinstance(data, list):
-                    for play in data:
-                        if isinstance(play, dict) and 'handlers' in play:
-                            for handler in play['handlers']:
-                                if isinstance(handler, dict) and 'name' in handler:
-                                    handler_name = handler['name']
-                                    handlers[handler_name].append(str(playbook_path))
-            except:
-                pass
-        
-        for handler_name, locations in handlers.items():
-            if len(locations) > 1:
+    def check_handler_graph(self):
+        """检查 notify 与 handler 的对应关系以及重复的 handler 名称
+
+        收集通知关系的规则被单规则预算停用时 handler 图不完整，缺失与未被通知的判断会产生误报，
+        此时只报告 fan-out 与重复名称。
+        """
+        incomplete = any(self.budget.skipped.get(check) for check in HANDLER_GRAPH_INPUTS)
+        for kind, node, count in self.handler_graph.analyze():
+            if incomplete and kind in ('missing', 'unreachable'):
+                self.budget.skipped['handler-analysis'] += 1
+                continue
+            if kind == 'missing':
+                self.add_issue('high', 
+                             'notify 找不到对应的 handler: "{target}" in {path}',
+                             '添加名为 "{target}" 的 handler，或在 handler 上声明 listen: "{target}"',
+                             'notify-missing-handler', node.path, f'{node.key}#{node.target}',
+                             {'target': node.target})
+                self.stats['notify_missing_handler'] += 1
+            elif kind == 'unreachable':
                 self.add_issue('low', 
-                             f'Handler 名称重复: {handler_name}',
-                             f'出现在 {len(locations)} 个文件中')
+                             'Handler 从未被通知: "{handler}" in {path}',
+                             '删除该 handler，或在相应任务中添加 notify',
+                             'handler-unreachable', node.path, node.key,
+                             {'handler': node.name or '/'.join(node.listen)})
+                self.stats['unreachable_handlers'] += 1
+            else:
+                self.add_issue('low', 
+                             'Handler 在同一 play 中被 {count} 个任务通知: "{handler}" in {path}',
+                             '考虑合并相关配置任务，或用 listen 主题分组通知',
+                             'handler-fan-out', node.path, node.key,
+                             {'count': count, 'handler': node.name})
+        
+        for handler_name, locations in self.handler_graph.duplicate_names().items():
+            self.add_issue('low', 
+                         f'Handler 名称重复: {handler_name}',
+                         f'出现在 {len(locations)} 个文件中',
+                         'duplicate-handler', key=handler_name)
     
-    def add_issue(self, priority: str, description: str, suggestion: str):
-        """添加问题到对应优先级列表"""
-        self.issues[priority].append({
-            'description': description,
-            'suggestion': suggestion
-        })
+    @property
+    def issues(self) -> Dict[str, List[Dict[str, str]]]:
+        """按优先级列出已格式化的问题"""
+        return self.store.as_dict()
+    
+    def add_issue(self, priority: str, description: str, suggestion: str,
+                  rule_id: str = 'general', path: Optional[Path] = None, key: str = '',
+                  fields: Optional[Dict[str, Any]] = None):
+        """添加问题到对应优先级列表
+
+        rule_id、path 与 key 组成问题指纹，描述文字变化不影响基线匹配。
+        fields 不为 None 时 description 与 suggestion 是 str.format 模板，
+        渲染时填入 fields 和 {path}，同类问题共用一份模板。
+        """
+        raw_path = '' if path is None else str(path)
+        path = normalize_path(path, self.project_root)
+        issue_fingerprint = fingerprint(rule_id, path, key)
+        baseline_state = None
+        if self.baseline_entries is not None:
+            self.baseline_entries[issue_fingerprint] = (priority, rule_id, path, key)
+        if self.baseline is not None:
+            if issue_fingerprint in self.baseline:
+                self.seen_known.add(issue_fingerprint)
+                self.suppressed[priority] += 1
+                if self.new_only:
+                    return
+                baseline_state = 'unchanged'
+            else:
+                baseline_state = 'new'
+        
+        self.store.add(priority, description, suggestion, rule_id,
+                       path, raw_path, key, issue_fingerprint, fields)
+        self.counts[priority] += 1
+        if self.sinks:
+            issue = format_issue(description, suggestion, rule_id, path, raw_path, key, issue_fingerprint, fields)
+            for sink in self.sinks:
+                sink.emit(priority, issue, baseline_state)
+    
+    def save_baseline(self, path: Path) -> int:
+        """把本次发现的全部问题（包括被抑制的）写入基线文件，需以 update_baseline=True 创建审计器"""
+        if self.baseline_entries is None:
+            raise ValueError('审计器未记录基线条目，请以 update_baseline=True 创建')
+        return Baseline.save(path, ((fp, *entry) for fp, entry in self.baseline_entries.items()))
     
     def generate_report(self) -> Dict[str, Any]:
         """生成审计报告"""
@@ -573,15 +708,40 @@ class ComprehensiveAuditor:
             'audit_date': datetime.now().isoformat(),
             'project_root': str(self.project_root),
             'summary': {
-                'total_issues': sum(len(issues) for issues in self.issues.values()),
-                'critical_issues': len(self.issues['critical']),
-                'high_issues': len(self.issues['high']),
-                'medium_issues': len(self.issues['medium']),
-                'low_issues': len(self.issues['low'])
+                'total_issues': sum(self.counts.values()),
+                'critical_issues': self.counts['critical'],
+                'high_issues': self.counts['high'],
+                'medium_issues': self.counts['medium'],
+                'low_issues': self.counts['low']
             },
             'issues': self.issues,
-            'statistics': dict(self.stats)
+            # 按规则与路径汇总，便于定位噪声最多的规则
+            'aggregates': self.store.aggregates(),
+            'statistics': dict(self.stats),
+            'rule_timings': self.rule_engine.timing_report()
         }
+        if self.finding_cache is not None:
+            # 命中与未命中均按 (文件, 规则) 计数
+            report['cache'] = self.finding_cache.report()
+        if self.budget.max_seconds is not None or self.rule_budget is not None:
+            report['budget'] = self.budget.report()
+            # 有检查被跳过时报告不完整，问题数只是下限
+            report['summary']['partial'] = self.budget.partial
+        if not self.keep_issues:
+            # 摘要模式：问题只写入流式输出
+            del report['issues']
+            report['summary']['summary_only'] = True
+        if self.baseline is not None:
+            report['summary']['new_only'] = self.new_only
+            report['baseline'] = {
+                'known_issues': len(self.baseline),
+                'suppressed': dict(self.suppressed),
+                'new': {
+                    priority: count - (0 if self.new_only else self.suppressed[priority])
+                    for priority, count in self.counts.items()
+                },
+                'fixed': self.baseline.fixed(self.seen_known)
+            }
         
         return report
     
@@ -591,6 +751,10 @@ class ComprehensiveAuditor:
         md.append("# 全面审计报告 - Comprehensive Audit Report\n")
         md.append(f"**审计日期**: {report['audit_date']}\n")
         md.append(f"**项目路径**: {report['project_root']}\n")
+        if report['summary'].get('partial'):
+            skipped = report['budget']['skipped']
+            md.append(f"\n> ⚠️ **部分审计**: 超出时间预算，以下检查被跳过或抽样: "
+                      f"{', '.join(f'{check} ({count} 项)' for check, count in skipped.items())}\n")
         md.append("\n---\n")
         
         # 执行摘要
@@ -602,6 +766,13 @@ class ComprehensiveAuditor:
         md.append(f"  - 🟡 Medium: {summary['medium_issues']}\n")
         md.append(f"  - 🟢 Low: {summary['low_issues']}\n")
         
+        baseline = report.get('baseline')
+        if baseline:
+            suppressed = sum(baseline['suppressed'].values())
+            scope = '仅列出新问题' if summary.get('new_only') else '列出全部问题'
+            md.append(f"- **基线**: 已知 {baseline['known_issues']} 项，本次命中 {suppressed} 项，"
+                      f"新增 {sum(baseline['new'].values())} 项，已修复 {baseline['fixed']} 项（{scope}）\n")
+        
         # 统计信息
         md.append("\n## 📈 统计信息 (Statistics)\n")
         stats = report['statistics']
@@ -623,6 +794,7 @@ class ComprehensiveAuditor:
         md.append("\n### 安全性指标\n")
         md.append(f"- 缺少 no_log 的敏感操作: {stats.get('missing_no_log', 0)}\n")
         md.append(f"- 潜在硬编码密钥: {stats.get('potential_hardcoded_secrets', 0)}\n")
+        md.append(f"- 高熵字面量: {stats.get('high_entropy_literals', 0)}\n")
         md.append(f"- 包含警告头的变量文件: {stats.get('vars_has_warning', 0)}\n")
         md.append(f"- 缺少警告头的变量文件: {stats.get('vars_missing_warning', 0)}\n")
         
@@ -644,17 +816,28 @@ class ComprehensiveAuditor:
         
         for priority in ['critical', 'high', 'medium', 'low']:
             label, key = priority_labels[priority]
-            issues = report['issues'][key]
+            issues = self.store.records[key]
             
             if not issues:
                 continue
             
             md.append(f"\n### {label} 优先级问题 ({len(issues)} 项)\n")
             
-            for i, issue in enumerate(issues, 1):
-                md.append(f"\n#### {i}. {issue['description']}\n")
-                if issue['suggestion']:
-                    md.append(f"**修复建议**: {issue['suggestion']}\n")
+            # 同一规则、同一描述模板的重复问题合并为一项，按路径列出
+            for i, group in enumerate(self.store.groups(key), 1):
+                if len(group.records) == 1:
+                    md.append(f"\n#### {i}. {group.title}\n")
+                else:
+                    md.append(f"\n#### {i}. {group.title} ({len(group.records)} 项，`{group.rule_id}`)\n")
+                if group.suggestion:
+                    md.append(f"**修复建议**: {group.suggestion}\n")
+                if len(group.records) > 1:
+                    md.append("\n")
+                    for path, count, details in self.store.group_details(group):
+                        line = f"- `{path}` ({count})"
+                        if details:
+                            line += f": {', '.join(details)}"
+                        md.append(line + "\n")
         
         # 优化建议
         md.append("\n## 💡 优化建议 (Optimization Recommendations)\n")
@@ -771,24 +954,82 @@ def main():
                        help='输出报告路径')
     parser.add_argument('--json', default='reports/comprehensive_audit.json',
                        help='JSON 报告路径')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                       help=f'基线文件路径，用于抑制已知问题 (默认: {DEFAULT_BASELINE})')
+    parser.add_argument('--new-only', action='store_true',
+                       help='报告和退出码只统计基线之外的新问题')
+    parser.add_argument('--update-baseline', action='store_true',
+                       help='把本次发现的全部问题写入基线文件')
+    parser.add_argument('--ndjson', help='边审计边写出 NDJSON 问题流的路径')
+    parser.add_argument('--sarif', help='边审计边写出 SARIF 2.1.0 日志的路径')
+    parser.add_argument('--summary-only', action='store_true',
+                       help='不保留问题列表、不生成 Markdown，只写 JSON 摘要（用于 CI 门禁）')
+    parser.add_argument('--max-seconds', type=float,
+                       help='整体时间预算（秒），超出后昂贵检查改为抽样并在报告中标记为部分结果')
+    parser.add_argument('--rule-budget', type=float,
+                       help='单条规则的累计耗时上限（秒），超出后停用该规则')
+    parser.add_argument('--cache', default=DEFAULT_CACHE,
+                       help=f'单文件检查结果缓存路径 (默认: {DEFAULT_CACHE})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='不读取也不写入结果缓存，所有文件重新检查')
     
     args = parser.parse_args()
     
+    baseline_path = None
+    if args.baseline or args.new_only or args.update_baseline:
+        baseline_path = Path(args.project_root) / (args.baseline or DEFAULT_BASELINE)
+    
+    sinks = []
+    if args.ndjson:
+        sinks.append(NdjsonSink(Path(args.project_root) / args.ndjson))
+    if args.sarif:
+        rule_descriptions = {rule.rule_id: rule.description for rule in DEFAULT_RULES.rules}
+        sinks.append(SarifSink(Path(args.project_root) / args.sarif, rule_descriptions))
+    
+    cache = None
+    if not args.no_cache:
+        cache = FindingCache(Path(args.project_root) / args.cache, args.project_root, cache_engine_version())
+    
     # 运行审计
-    auditor = ComprehensiveAuditor(args.project_root)
-    report = auditor.run_audit()
+    auditor = ComprehensiveAuditor(
+        args.project_root,
+        baseline=Baseline.load(baseline_path) if baseline_path else None,
+        new_only=args.new_only,
+        sinks=sinks,
+        keep_issues=not args.summary_only,
+        max_seconds=args.max_seconds,
+        rule_budget=args.rule_budget,
+        cache=cache,
+        update_baseline=args.update_baseline
+    )
+    try:
+        report = auditor.run_audit()
+    finally:
+        for sink in sinks:
+            sink.close()
     
-    # 生成 Markdown 报告
-    markdown_report = auditor.format_report_markdown(report)
+    if cache is not None:
+        cache.save()
     
-    # 保存报告
-    output_path = Path(args.project_root) / args.output
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    for sink in sinks:
+        print(f"\n✅ 已流式写出 {sink.count} 个问题: {sink.path}")
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(markdown_report)
+    if args.update_baseline:
+        count = auditor.save_baseline(baseline_path)
+        print(f"\n✅ 基线已更新: {baseline_path} ({count} 项)")
     
-    print(f"\n✅ Markdown 报告已保存: {output_path}")
+    if not args.summary_only:
+        # 生成 Markdown 报告
+        markdown_report = auditor.format_report_markdown(report)
+        
+        # 保存报告
+        output_path = Path(args.project_root) / args.output
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(markdown_report)
+        
+        print(f"\n✅ Markdown 报告已保存: {output_path}")
     
     # 保存 JSON 报告
     if args.json:
@@ -809,8 +1050,24 @@ def main():
     print(f"🟡 Medium:   {report['summary']['medium_issues']}")
     print(f"🟢 Low:      {report['summary']['low_issues']}")
     print(f"📝 Total:    {report['summary']['total_issues']}")
+    if 'baseline' in report:
+        suppressed = sum(report['baseline']['suppressed'].values())
+        print(f"📌 基线抑制: {suppressed}，新增: {sum(report['baseline']['new'].values())}，"
+              f"已修复: {report['baseline']['fixed']}")
+    if 'cache' in report:
+        print(f"💾 结果缓存: 命中 {report['cache']['hits']}，重新检查 {report['cache']['misses']}")
+    if report['summary'].get('partial'):
+        budget = report['budget']
+        print(f"⚠️  部分审计: 用时 {budget['elapsed_seconds']}s，跳过 {budget['skipped']}")
     print("=" * 80)
     
+    # 打印耗时最多的规则
+    slowest = list(report['rule_timings'].items())[:5]
+    if slowest:
+        print("⏱️  规则耗时 (前 5):")
+        for rule_id, timing in slowest:
+            print(f"   {rule_id}: {timing['seconds']:.3f}s / {timing['calls']} 次")
+    
     # 如果有严重问题，返回非零退出码
     if report['summary']['critical_issues'] > 0:
         return 1
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Handler 通知图 - Notify/Handler Graph
+在规则引擎的单次遍历中收集 notify 与 handler（含 listen），跨 playbook、handlers/main.yml 和 role 解析通知关系
+"""
+
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# 任务中嵌套任务列表的键
+BLOCK_SECTIONS = ('block', 'rescue', 'always')
+
+# 引入 role 的模块
+ROLE_MODULES = ('include_role', 'import_role',
+                'ansible.builtin.include_role', 'ansible.builtin.import_role')
+
+# 引入任务文件的键（handlers 段中用于引入 handlers/main.yml）
+INCLUDE_KEYS = ('import_tasks', 'include_tasks',
+                'ansible.builtin.import_tasks', 'ansible.builtin.include_tasks')
+
+# 同一 play 中通知同一 handler 的任务数达到该值时报告
+FAN_OUT_THRESHOLD = 5
+
+
+@dataclass
+class HandlerNode:
+    """一个 handler 定义"""
+    name: str
+    listen: Tuple[str, ...]
+    path: Path
+    key: str
+
+
+@dataclass
+class Notification:
+    """任务或 handler 发出的一次通知"""
+    target: str
+    path: Path
+    key: str
+
+
+def iter_block_tasks(task: Dict) -> Iterator[Dict]:
+    """产出任务本身以及 block/rescue/always 中嵌套的所有任务"""
+    stack = [task]
+    while stack:
+        item = stack.pop()
+        yield item
+        for section in BLOCK_SECTIONS:
+            nested = item.get(section)
+            if isinstance(nested, list):
+                stack.extend(child for child in reversed(nested) if isinstance(child, dict))
+
+
+def as_names(value: Any) -> List[str]:
+    """notify/listen 可以是字符串或字符串列表"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return []
+
+
+def role_name(entry: Any) -> Optional[str]:
+    """play 的 roles 列表项或 include_role 参数中的 role 名"""
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict):
+        name = entry.get('role') or entry.get('name')
+        return name if isinstance(name, str) else None
+    return None
+
+
+def file_scope(path: Path) -> str:
+    """任务文件所属作用域：role 内的文件共享 role 作用域，其余文件各自独立"""
+    parts = path.parts
+    for index in range(len(parts) - 2, 0, -1):
+        if parts[index - 1] == 'roles':
+            return 'role:' + Path(*parts[:index + 1]).as_posix()
+    return f'file:{path.as_posix()}'
+
+
+class HandlerGraph:
+    """跨文件的 notify → handler 索引
+
+    每个 play 是一个作用域；role 与独立的 handlers 文件也各自是作用域，
+    play 通过 roles、include_role 或 import_tasks 与它们相连。
+    通知在自身作用域及相连作用域内查找 handler 名称或 listen 主题。
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, List[HandlerNode]] = defaultdict(list)
+        self.notifications: Dict[str, List[Notification]] = defaultdict(list)
+        self.links: Dict[str, Set[str]] = defaultdict(set)
+        # 按名称引用、分析时再解析的 role
+        self.role_links: Dict[str, Set[str]] = defaultdict(set)
+        # 不为 None 时记录每次变更（可 JSON 序列化的事件），供结果缓存重放
+        self.journal: Optional[Any] = None
+
+    def add_handler(self, scope: str, handler: Dict, path: Path, key: str):
+        name = handler.get('name')
+        listen = tuple(as_names(handler.get('listen')))
+        if isinstance(name, str) or listen:
+            self._add_handler_node(scope, name if isinstance(name, str) else '', listen, path, key)
+        self.add_task(scope, handler, path, key)
+
+    def add_task(self, scope: str, task: Dict, path: Path, key: str):
+        """记录任务（含嵌套 block）的通知以及引入的 role 和任务文件"""
+        for item in iter_block_tasks(task):
+            for target in as_names(item.get('notify')):
+                # 含 Jinja 表达式的通知目标无法静态解析
+                if '{{' not in target:
+                    self._add_notification(scope, target, path, key)
+            for module in ROLE_MODULES:
+                name = role_name(item.get(module))
+                if name:
+                    self._add_role_link(scope, name)
+            for include in INCLUDE_KEYS:
+                target = item.get(include)
+                if isinstance(target, dict):
+                    target = target.get('file')
+                if isinstance(target, str) and '{{' not in target:
+                    self.link(scope, file_scope(Path(os.path.normpath(path.parent / target))))
+
+    def add_play(self, scope: str, play: Dict):
+        """记录 play 的 roles 列表"""
+        roles = play.get('roles')
+        for entry in roles if isinstance(roles, list) else []:
+            name = role_name(entry)
+            if name:
+                self._add_role_link(scope, name)
+
+    def link(self, scope: str, other: str):
+        self._record('link', scope, other)
+        self.links[scope].add(other)
+        self.links[other].add(scope)
+
+    def _add_handler_node(self, scope: str, name: str, listen: Tuple[str, ...], path: Path, key: str):
+        self._record('handler', scope, name, list(listen), str(path), key)
+        self.handlers[scope].append(HandlerNode(name, listen, path, key))
+
+    def _add_notification(self, scope: str, target: str, path: Path, key: str):
+        self._record('notify', scope, target, str(path), key)
+        self.notifications[scope].append(Notification(target, path, key))
+
+    def _add_role_link(self, scope: str, name: str):
+        self._record('role', scope, name)
+        self.role_links[scope].add(name)
+
+    def _record(self, *event: Any):
+        if self.journal is not None:
+            self.journal.append(list(event))
+
+    def replay(self, events: List[List[Any]]):
+        """重放 journal 记录的事件，结果与重新遍历对应文件相同"""
+        for kind, scope, *args in events:
+            if kind == 'handler':
+                name, listen, path, key = args
+                self._add_handler_node(scope, name, tuple(listen), Path(path), key)
+            elif kind == 'notify':
+                target, path, key = args
+                self._add_notification(scope, target, Path(path), key)
+            elif kind == 'role':
+                self._add_role_link(scope, args[0])
+            elif kind == 'link':
+                self.link(scope, args[0])
+
+    def _resolve_roles(self):
+        roles_by_name: Dict[str, List[str]] = defaultdict(list)
+        for scope in list(self.handlers) + list(self.notifications):
+            if scope.startswith('role:'):
+                roles_by_name[scope.rsplit('/', 1)[-1]].append(scope)
+        for scope, names in self.role_links.items():
+            for name in names:
+                for role_scope in roles_by_name.get(name.rsplit('.', 1)[-1], []):
+                    self.link(scope, role_scope)
+
+    def _visible(self, scope: str) -> Iterator[HandlerNode]:
+        yield from self.handlers.get(scope, [])
+        for other in self.links.get(scope, ()):
+            yield from self.handlers.get(other, [])
+
+    def _closed(self, scope: str) -> bool:
+        """play 作用域，或被某个 play 引用的 role/handlers 文件
+
+        未被任何已审计 play 引用的 role 可能由仓库中其他 playbook 使用，
+        其缺失或未使用的 handler 无法判断，不予报告。
+        """
+        return scope.startswith('play:') or any(other.startswith('play:') for other in self.links.get(scope, ()))
+
+    def analyze(self) -> Iterator[Tuple[str, Any, Any]]:
+        """产出 ('missing', 通知, None)、('unreachable', handler, None)、('fan-out', handler, 任务数)"""
+        self._resolve_roles()
+        notified: Set[int] = set()
+        for scope, notifications in self.notifications.items():
+            visible = list(self._visible(scope))
+            fan_out: Dict[int, Set[str]] = defaultdict(set)
+            closed = self._closed(scope)
+            for notification in notifications:
+                matches = [handler for handler in visible
+                           if notification.target == handler.name or notification.target in handler.listen]
+                if not matches and closed:
+                    yield 'missing', notification, None
+                for handler in matches:
+                    notified.add(id(handler))
+                    fan_out[id(handler)].add(f'{notification.path}\0{notification.key}')
+            for handler in visible:
+                count = len(fan_out.get(id(handler), ()))
+                if count >= FAN_OUT_THRESHOLD:
+                    yield 'fan-out', handler, count
+        for scope, handlers in self.handlers.items():
+            if not self._closed(scope):
+                continue
+            for handler in handlers:
+                if id(handler) not in notified:
+                    yield 'unreachable', handler, None
+
+    def duplicate_names(self) -> Dict[str, List[Path]]:
+        """在多处定义的 handler 名称及其所在文件"""
+        locations: Dict[str, List[Path]] = defaultdict(list)
+        for handlers in self.handlers.values():
+            for handler in handlers:
+                if handler.name:
+                    locations[handler.name].append(handler.path)
+        return {name: paths for name, paths in locations.items() if len(paths) > 1}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+审计问题存储 - Issue Store
+路径、规则 ID 与消息模板只保存一份，问题记录为紧凑元组；消息在渲染时才格式化，
+并按规则与路径计数，供 Markdown 报告合并重复问题
+"""
+
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+PRIORITIES = ('critical', 'high', 'medium', 'low')
+
+# Markdown 分组中每个路径最多列出的细节数
+MAX_GROUP_DETAILS = 10
+
+
+class IssueRecord(NamedTuple):
+    """一条问题；rule、path、raw_path、description、suggestion 为字符串表下标"""
+    rule: int
+    path: int
+    raw_path: int
+    key: str
+    description: int
+    suggestion: int
+    # None 表示 description/suggestion 是已格式化的文字，否则为模板字段 ((名称, 值), ...)
+    fields: Optional[Tuple[Tuple[str, Any], ...]]
+    fingerprint: str
+
+
+def format_issue(description: str, suggestion: str, rule_id: str, path: str, raw_path: str, key: str,
+                 fingerprint: str, fields: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """问题的完整字典（与 JSON 报告、流式输出中的格式相同）；fields 不为 None 时渲染模板"""
+    if fields is not None:
+        description = description.format(path=raw_path, **fields)
+        suggestion = suggestion.format(path=raw_path, **fields)
+    return {
+        'description': description,
+        'suggestion': suggestion,
+        'rule_id': rule_id,
+        'path': path,
+        'key': key,
+        'fingerprint': fingerprint,
+    }
+
+
+class _Field:
+    """分组标题中的模板字段，忽略格式说明符，渲染为 <名称>"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __format__(self, spec: str) -> str:
+        return f'<{self.name}>'
+
+
+class _Placeholder(dict):
+    def __missing__(self, name: str) -> _Field:
+        return _Field(name)
+
+
+class IssueGroup(NamedTuple):
+    """同一规则、同一描述模板的问题"""
+    rule_id: str
+    title: str
+    suggestion: str
+    records: List[IssueRecord]
+
+
+class IssueStore:
+    """按优先级保存问题，字符串统一驻留在 strings 表中
+
+    keep 为 False 时只计数、不保存记录也不驻留字符串（摘要模式）。
+    """
+
+    def __init__(self, keep: bool = True):
+        self.keep = keep
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.records: Dict[str, List[IssueRecord]] = {priority: [] for priority in PRIORITIES}
+        # 按规则 ID 和规范化路径计数，规则数与文件数有限
+        self.rule_counts: Counter = Counter()
+        self.path_counts: Counter = Counter()
+
+    def intern(self, text: str) -> int:
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def add(self, priority: str, description: str, suggestion: str, rule_id: str,
+            path: str, raw_path: str, key: str, fingerprint: str,
+            fields: Optional[Dict[str, Any]] = None) -> Optional[IssueRecord]:
+        """计数并保存一条问题，path 为规范化路径，raw_path 用于填入模板中的 {path}
+
+        不保存记录时返回 None。
+        """
+        self.rule_counts[rule_id] += 1
+        self.path_counts[path] += 1
+        if not self.keep:
+            return None
+        record = IssueRecord(
+            self.intern(rule_id), self.intern(path), self.intern(raw_path), key,
+            self.intern(description), self.intern(suggestion),
+            None if fields is None else tuple(fields.items()), fingerprint,
+        )
+        self.records[priority].append(record)
+        return record
+
+    def _render(self, record: IssueRecord, template: int) -> str:
+        text = self.strings[template]
+        if record.fields is None:
+            return text
+        return text.format(path=self.strings[record.raw_path], **dict(record.fields))
+
+    def format(self, record: IssueRecord) -> Dict[str, str]:
+        """已保存问题的完整字典"""
+        return format_issue(
+            self.strings[record.description], self.strings[record.suggestion], self.strings[record.rule],
+            self.strings[record.path], self.strings[record.raw_path], record.key, record.fingerprint,
+            None if record.fields is None else dict(record.fields),
+        )
+
+    def issues(self, priority: str) -> Iterator[Dict[str, str]]:
+        for record in self.records[priority]:
+            yield self.format(record)
+
+    def as_dict(self) -> Dict[str, List[Dict[str, str]]]:
+        return {priority: list(self.issues(priority)) for priority in PRIORITIES}
+
+    def aggregates(self) -> Dict[str, Dict[str, int]]:
+        """按规则和路径统计的问题数（降序）"""
+        return {
+            'by_rule': dict(self.rule_counts.most_common()),
+            'by_path': {path or '(项目)': count for path, count in self.path_counts.most_common()},
+        }
+
+    def groups(self, priority: str) -> List[IssueGroup]:
+        """按 (规则, 描述模板) 分组，保持首次出现的顺序"""
+        grouped: Dict[Tuple[int, int], List[IssueRecord]] = OrderedDict()
+        for record in self.records[priority]:
+            grouped.setdefault((record.rule, record.description), []).append(record)
+        result = []
+        for (rule, _), records in grouped.items():
+            first = records[0]
+            if len(records) == 1 or first.fields is None:
+                title, suggestion = self._render(first, first.description), self._render(first, first.suggestion)
+            else:
+                title = self.strings[first.description].format_map(_Placeholder())
+                suggestion = self.strings[first.suggestion].format_map(_Placeholder())
+            result.append(IssueGroup(self.strings[rule], title, suggestion, records))
+        return result
+
+    def group_details(self, group: IssueGroup) -> Iterator[Tuple[str, int, List[str]]]:
+        """分组内按路径产出 (路径, 问题数, 细节)
+
+        细节为模板字段值或节点键，相同的值合并并注明次数，最多列出 MAX_GROUP_DETAILS 个。
+        """
+        by_path: Dict[int, Counter] = OrderedDict()
+        for record in group.records:
+            values = [str(value) for _, value in record.fields or ()]
+            by_path.setdefault(record.path, Counter())['/'.join(values) if values else record.key] += 1
+        for path, details in by_path.items():
+            listed = [detail if count == 1 else f'{detail} ×{count}'
+                      for detail, count in list(details.items())[:MAX_GROUP_DETAILS] if detail]
+            if len(details) > MAX_GROUP_DETAILS:
+                listed.append('…')
+            yield self.strings[path] or '(项目)', sum(details.values()), listed
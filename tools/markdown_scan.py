@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Single-pass Markdown structure extraction shared by the index builder and the audit.
+
+Each README is read once and scanned line by line into a ``MarkdownStructure``
+record: title, first paragraph, headings, fenced code-block spans, CJK and
+Latin word counts, and local links. Records are cached by path, size and
+modification time, so the module index, the audit and the tests all reuse the
+same scan.
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+FENCE = "```"
+CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+# Latin words of four letters or more; shorter words are mostly articles and units
+LATIN_WORD_PATTERN = re.compile(r"\b[a-zA-Z]{4,}\b")
+LINK_PATTERN = re.compile(r"\[[^\]]*\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)")
+EXTERNAL_LINK_PATTERN = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|//|#)", re.IGNORECASE)
+# Lines that are not prose for the word counts: headings, list items and inline code
+NON_PROSE_PREFIXES = ("#", "-", "`")
+
+
+def strip_markdown(text: str) -> str:
+    """Remove minimal Markdown syntax for summaries."""
+    text = re.sub(r"`([^`]*)`", r"\1", text)
+    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)
+    text = re.sub(r"\*([^*]+)\*", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)
+    text = text.replace("<br>", " ").replace("<br/>", " ")
+    return text.strip()
+
+
+@dataclass(frozen=True)
+class MarkdownStructure:
+    """Structure of one Markdown document."""
+
+    path: str
+    title: str
+    summary: str
+    # (level, text, line number)
+    headings: Tuple[Tuple[int, str, int], ...]
+    # (opening fence line, closing fence line); unclosed blocks end at the last line
+    code_blocks: Tuple[Tuple[int, int], ...]
+    cjk_chars: int
+    # Latin words in prose lines, lower-cased, with their counts
+    latin_words: Dict[str, int] = field(hash=False)
+    local_links: Tuple[str, ...]
+
+    @property
+    def latin_word_count(self) -> int:
+        return sum(self.latin_words.values())
+
+
+def parse_markdown(text: str, path: str = "") -> MarkdownStructure:
+    """Scan Markdown text in one pass."""
+    title = ""
+    headings: List[Tuple[int, str, int]] = []
+    code_blocks: List[Tuple[int, int]] = []
+    summary_lines: List[str] = []
+    summary_done = False
+    cjk_chars = 0
+    latin_words: Counter = Counter()
+    local_links: List[str] = []
+    fence_start = 0
+    line_number = 0
+
+    for line_number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if line.startswith(FENCE):
+            if fence_start:
+                code_blocks.append((fence_start, line_number))
+                fence_start = 0
+            else:
+                fence_start = line_number
+            if summary_lines:
+                summary_done = True
+            continue
+        if fence_start:
+            continue
+
+        if line.startswith("#"):
+            level = len(line) - len(line.lstrip("#"))
+            heading = strip_markdown(line.lstrip("# "))
+            headings.append((level, heading, line_number))
+            if not title and heading:
+                title = heading
+        elif line and not summary_done:
+            # The summary is the first paragraph of text; block quotes count as text
+            cleaned = strip_markdown(line.lstrip("> ") if line.startswith(">") else line)
+            if cleaned:
+                summary_lines.append(cleaned)
+        elif not line and summary_lines:
+            summary_done = True
+
+        for target in LINK_PATTERN.findall(line):
+            if not EXTERNAL_LINK_PATTERN.match(target):
+                local_links.append(target.split("#", 1)[0])
+
+        if line and not line.startswith(NON_PROSE_PREFIXES):
+            cjk_chars += len(CJK_PATTERN.findall(line))
+            latin_words.update(word.lower() for word in LATIN_WORD_PATTERN.findall(line))
+
+    if fence_start:
+        code_blocks.append((fence_start, line_number))
+
+    return MarkdownStructure(
+        path=path,
+        title=title,
+        summary=re.sub(r"\s+", " ", " ".join(summary_lines)).strip(),
+        headings=tuple(headings),
+        code_blocks=tuple(code_blocks),
+        cjk_chars=cjk_chars,
+        latin_words=dict(latin_words),
+        local_links=tuple(local_links),
+    )
+
+
+class MarkdownScanner:
+    """Scan Markdown files, caching records until the file changes."""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Tuple[int, int], MarkdownStructure]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self, path: Path) -> Optional[MarkdownStructure]:
+        """Return the structure of a file, or ``None`` if it does not exist."""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path.resolve())
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(key)
+        if cached and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        structure = parse_markdown(path.read_text(encoding="utf-8"), str(path))
+        self._cache[key] = (version, structure)
+        return structure
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+DEFAULT_SCANNER = MarkdownScanner()
+
+
+def scan_markdown(path: Path) -> Optional[MarkdownStructure]:
+    """Scan a file with the shared cached scanner."""
+    return DEFAULT_SCANNER.scan(path)
@@ -11,15 +11,19 @@ This script:
 from __future__ import annotations
 
 import argparse
+import fnmatch
+import gzip
 import json
 import re
 import subprocess
 import sys
+import time
 from collections import defaultdict
-from dataclasses import asdict, dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
 
 import yaml
 
@@ -29,6 +33,9 @@ DEFAULT_MODULES = ROOT / "metadata" / "modules.yaml"
 DEFAULT_JSON_OUTPUT = ROOT / "reports" / "module_diff.json"
 DEFAULT_MD_OUTPUT = ROOT / "reports" / "module_diff.md"
 DEFAULT_CACHE = ROOT / ".cache" / "ansible_doc_cache.json"
+DEFAULT_LAST_RUN = ROOT / ".cache" / "module_diff_last.ndjson"
+DEFAULT_CATALOGUE = ROOT / "metadata" / "ansible_doc_catalogue.json.gz"
+CATALOGUE_FORMAT_VERSION = 1
 
 CATEGORY_EXCLUDES = {
     ".git",
@@ -45,8 +52,17 @@ CATEGORY_EXCLUDES = {
     "__pycache__",
 }
 
+# Records are slotted to keep full-catalogue runs small; ``slots=True`` needs
+# Python 3.10+, older interpreters fall back to regular dataclasses.
+RECORD_OPTIONS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+def _record_to_dict(record: Any) -> Dict[str, Any]:
+    """Shallow field copy of a record (avoids the deep copy done by ``asdict``)."""
+    return {f.name: getattr(record, f.name) for f in fields(record)}
+
+
+@dataclass(**RECORD_OPTIONS)
 class ModuleInfo:
     """Information about an Ansible module."""
 
@@ -55,6 +71,12 @@ class ModuleInfo:
     description: str = ""
     category: str = ""
     priority: str = "P2"
+
+    def __post_init__(self) -> None:
+        # Thousands of modules share a handful of collection/category names.
+        self.collection = sys.intern(self.collection)
+        self.category = sys.intern(self.category)
+        self.priority = sys.intern(self.priority)
     
     @property
     def full_name(self) -> str:
@@ -62,7 +84,7 @@ class ModuleInfo:
         return f"{self.collection}.{self.name}" if self.collection else self.name
 
 
-@dataclass
+@dataclass(**RECORD_OPTIONS)
 class ModuleCoverage:
     """Coverage information for a module."""
 
@@ -75,8 +97,13 @@ class ModuleCoverage:
     in_filesystem: bool = False
     notes: str = ""
 
+    def __post_init__(self) -> None:
+        self.status = sys.intern(self.status)
+        self.category = sys.intern(self.category)
+        self.priority = sys.intern(self.priority)
 
-@dataclass
+
+@dataclass(**RECORD_OPTIONS)
 class CategoryStats:
     """Statistics for a category."""
 
@@ -88,8 +115,11 @@ class CategoryStats:
     coverage_percentage: float = 0.0
     priority_breakdown: Dict[str, int] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        self.category = sys.intern(self.category)
 
-@dataclass
+
+@dataclass(**RECORD_OPTIONS)
 class DiffReport:
     """Complete diff report."""
 
@@ -103,6 +133,268 @@ class DiffReport:
     coverage_details: List[ModuleCoverage]
     duplicates: List[Dict[str, Any]]
     inconsistencies: List[Dict[str, Any]]
+    phase_timings: Dict[str, float] = field(default_factory=dict)
+
+
+# Load phases (in start order), then the wall time of the load and the analysis.
+PHASE_ORDER = ("ansible_doc", "priorities", "metadata", "filesystem", "load_wall", "analysis")
+
+# Large report sections that are streamed record by record.
+STREAMED_SECTIONS = ("categories", "coverage_details", "duplicates", "inconsistencies")
+NDJSON_RECORD_TYPES = {
+    "categories": "category",
+    "coverage_details": "coverage",
+    "duplicates": "duplicate",
+    "inconsistencies": "inconsistency",
+}
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _section_items(report: DiffReport, section: str) -> Iterator[Any]:
+    """Yield plain dicts for one streamed section of a report."""
+    if section == "categories":
+        for stats in report.categories.values():
+            yield _record_to_dict(stats)
+    elif section == "coverage_details":
+        for coverage in report.coverage_details:
+            yield _record_to_dict(coverage)
+    else:
+        yield from getattr(report, section)
+
+
+def iter_json_report(report: DiffReport) -> Iterator[str]:
+    """Yield a JSON document chunk by chunk, one record per line.
+
+    Header statistics come first; the large sections are written one
+    record per line so the file can be grepped or streamed.
+    """
+    yield "{\n"
+    names = [f.name for f in fields(report)]
+    for position, name in enumerate(names):
+        separator = ",\n" if position < len(names) - 1 else "\n"
+        if name not in STREAMED_SECTIONS:
+            yield f"  {_dump(name)}: {_dump(getattr(report, name))}{separator}"
+            continue
+        
+        keyed = name == "categories"
+        yield f"  {_dump(name)}: " + ("{" if keyed else "[")
+        first = True
+        for item in _section_items(report, name):
+            prefix = "\n    " if first else ",\n    "
+            if keyed:
+                yield f"{prefix}{_dump(item['category'])}: {_dump(item)}"
+            else:
+                yield f"{prefix}{_dump(item)}"
+            first = False
+        closing = "}" if keyed else "]"
+        yield (closing if first else f"\n  {closing}") + separator
+    yield "}\n"
+
+
+def iter_ndjson_report(report: DiffReport) -> Iterator[str]:
+    """Yield NDJSON lines: a summary record followed by one line per record."""
+    summary: Dict[str, Any] = {"type": "summary"}
+    for f in fields(report):
+        if f.name not in STREAMED_SECTIONS:
+            summary[f.name] = getattr(report, f.name)
+    yield _dump(summary) + "\n"
+    
+    for section in STREAMED_SECTIONS:
+        record_type = NDJSON_RECORD_TYPES[section]
+        for item in _section_items(report, section):
+            yield _dump({"type": record_type, **item}) + "\n"
+
+
+def _split_module_name(full_name: str) -> ModuleInfo:
+    parts = full_name.split(".")
+    if len(parts) >= 3:
+        return ModuleInfo(name=parts[-1], collection=".".join(parts[:-1]))
+    return ModuleInfo(name=full_name)
+
+
+def write_catalogue(
+    modules: Dict[str, ModuleInfo],
+    path: Path,
+    ansible_core: str = "",
+    generated_at: str = "",
+) -> None:
+    """Write a gzipped module catalogue snapshot.
+
+    Rows are ``[fqcn, description]`` sorted by name, and ``collections``
+    maps each collection to its ``[start, end)`` row range so a loader can
+    decode only the collections it needs.
+    """
+    rows = sorted(
+        (info.full_name, info.collection, info.description) for info in modules.values()
+    )
+    collections: Dict[str, List[int]] = {}
+    for index, (_, collection, _) in enumerate(rows):
+        if collection in collections:
+            collections[collection][1] = index + 1
+        else:
+            collections[collection] = [index, index + 1]
+    
+    catalogue = {
+        "format_version": CATALOGUE_FORMAT_VERSION,
+        "ansible_core": ansible_core,
+        "generated_at": generated_at or datetime.now(timezone.utc).isoformat(),
+        "collections": collections,
+        "modules": [[full_name, description] for full_name, _, description in rows],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the compressed bytes reproducible for identical content
+    with gzip.GzipFile(path, "wb", mtime=0) as raw:
+        raw.write(json.dumps(catalogue, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def read_catalogue(path: Path) -> Optional[Dict[str, Any]]:
+    """Read a catalogue snapshot, or return None if it is missing or unsupported."""
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            catalogue = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read module catalogue {path}: {e}")
+        return None
+    if catalogue.get("format_version") != CATALOGUE_FORMAT_VERSION:
+        print(
+            f"Warning: Unsupported catalogue format {catalogue.get('format_version')!r} "
+            f"in {path}"
+        )
+        return None
+    return catalogue
+
+
+def catalogue_modules(
+    catalogue: Dict[str, Any],
+    collections: Optional[List[str]] = None,
+) -> Dict[str, ModuleInfo]:
+    """Build ModuleInfo records from a catalogue, optionally for some collections only.
+
+    Collection names match exactly, by namespace (``community`` selects
+    ``community.general``) or by a module prefix (``community.general.ini``
+    selects ``community.general``).
+    """
+    rows = catalogue["modules"]
+    selected = []
+    for collection, (start, end) in catalogue["collections"].items():
+        if collections is None or any(
+            collection == token
+            or collection.startswith(token + ".")
+            or token.startswith(collection + ".")
+            for token in collections
+        ):
+            selected.append((start, end))
+    
+    modules: Dict[str, ModuleInfo] = {}
+    for start, end in sorted(selected):
+        for full_name, description in rows[start:end]:
+            info = _split_module_name(full_name)
+            info.description = description
+            modules[full_name] = info
+    return modules
+
+
+def load_catalogue(path: Path, collections: Optional[List[str]] = None) -> Dict[str, ModuleInfo]:
+    """Load modules from a catalogue snapshot (empty if it cannot be read)."""
+    catalogue = read_catalogue(path)
+    if catalogue is None:
+        return {}
+    return catalogue_modules(catalogue, collections)
+
+
+class _RuleNode:
+    """One segment level of the priority rule trie."""
+
+    __slots__ = ("literal", "globs", "rest", "rule")
+
+    def __init__(self) -> None:
+        self.literal: Dict[str, _RuleNode] = {}
+        self.globs: List[Any] = []  # (compiled segment pattern, node)
+        self.rest: Optional[_RuleNode] = None  # a bare "*" segment
+        self.rule: Optional[Any] = None  # (specificity, order, priority)
+
+
+class PriorityRules:
+    """Module priority rules compiled into a segment trie.
+
+    Keys are split on ".". A bare ``*`` segment matches one or more whole
+    segments (``community.aws.*``, ``*.mysql_*``); other segments may use
+    shell-style globs within the segment (``mysql_*``). When several rules
+    match, the most specific one wins: exact names first, then the rule
+    with the most literal segments, then the most literal characters.
+    """
+
+    def __init__(self, rules: Dict[str, str]):
+        self.exact: Dict[str, str] = {}
+        self._root = _RuleNode()
+        self._cache: Dict[str, Optional[str]] = {}
+        for order, (pattern, priority) in enumerate(rules.items()):
+            pattern = str(pattern)
+            if not any(char in pattern for char in "*?["):
+                self.exact[pattern] = priority
+            else:
+                self._insert(pattern, priority, order)
+
+    def _insert(self, pattern: str, priority: str, order: int) -> None:
+        node = self._root
+        literal_segments = 0
+        literal_chars = 0
+        for segment in pattern.split("."):
+            if segment == "*":
+                if node.rest is None:
+                    node.rest = _RuleNode()
+                node = node.rest
+                continue
+            if any(char in segment for char in "*?["):
+                literal_chars += sum(1 for char in segment if char not in "*?[]")
+                for existing, child in node.globs:
+                    if existing.pattern == fnmatch.translate(segment):
+                        node = child
+                        break
+                else:
+                    child = _RuleNode()
+                    node.globs.append((re.compile(fnmatch.translate(segment)), child))
+                    node = child
+                continue
+            literal_segments += 1
+            literal_chars += len(segment)
+            node = node.literal.setdefault(segment, _RuleNode())
+        
+        # Lower order wins ties, so the first rule in the file takes precedence
+        candidate = ((literal_segments, literal_chars), -order, priority)
+        if node.rule is None or candidate[:2] > node.rule[:2]:
+            node.rule = candidate
+
+    def _collect(self, node: _RuleNode, segments: List[str], index: int, found: List[Any]) -> None:
+        if index == len(segments):
+            if node.rule is not None:
+                found.append(node.rule)
+            return
+        segment = segments[index]
+        child = node.literal.get(segment)
+        if child is not None:
+            self._collect(child, segments, index + 1, found)
+        for compiled, child in node.globs:
+            if compiled.match(segment):
+                self._collect(child, segments, index + 1, found)
+        if node.rest is not None:
+            for end in range(index + 1, len(segments) + 1):
+                self._collect(node.rest, segments, end, found)
+
+    def match(self, module_name: str) -> Optional[str]:
+        """Return the priority of the most specific matching rule, if any."""
+        if module_name in self.exact:
+            return self.exact[module_name]
+        if module_name not in self._cache:
+            found: List[Any] = []
+            self._collect(self._root, module_name.split("."), 0, found)
+            self._cache[module_name] = max(found)[2] if found else None
+        return self._cache[module_name]
 
 
 class ModuleDiffAnalyzer:
@@ -114,26 +406,42 @@ class ModuleDiffAnalyzer:
         modules_path: Path,
         cache_path: Path,
         root: Path,
+        shard: Optional[List[str]] = None,
+        catalogue_path: Optional[Path] = None,
     ):
         self.priorities_path = priorities_path
         self.modules_path = modules_path
         self.cache_path = cache_path
         self.root = root
+        # Shipped ansible-doc snapshot used offline and when no fresher cache exists
+        self.catalogue_path = catalogue_path
+        self.use_cache = True
+        # Never run ansible-doc; use the cache, the catalogue or the fallback list
+        self.offline = False
+        # Where the last live listing came from: "ansible-doc", "catalogue" or "fallback"
+        self.last_source = ""
+        # Collection namespaces (e.g. community.general) or category names
+        self.shard = [token for token in (shard or []) if token]
         self.priorities_config: Dict[str, Any] = {}
         self.modules_metadata: Dict[str, Any] = {}
         self.ansible_modules: Dict[str, ModuleInfo] = {}
         self.covered_modules: Dict[str, Set[str]] = defaultdict(set)
         self.filesystem_modules: Dict[str, Set[str]] = defaultdict(set)
+        self.phase_timings: Dict[str, float] = {}
+        self.priority_rules: Optional[PriorityRules] = None
 
     def load_priorities(self) -> None:
         """Load module priorities configuration."""
         if not self.priorities_path.exists():
             print(f"Warning: Priorities file not found: {self.priorities_path}")
             self.priorities_config = {"default_priority": "P2", "modules": {}, "category_priorities": {}}
+            self.priority_rules = PriorityRules({})
             return
         
         with open(self.priorities_path, encoding="utf-8") as f:
             self.priorities_config = yaml.safe_load(f) or {}
+        
+        self.priority_rules = PriorityRules(self.priorities_config.get("modules") or {})
 
     def load_metadata(self) -> None:
         """Load modules metadata from modules.yaml."""
@@ -167,10 +475,15 @@ class ModuleDiffAnalyzer:
                     if (subdir / "README.md").exists() or (subdir / "playbook.yml").exists():
                         self.filesystem_modules[category].add(subdir.name)
 
-    def fetch_ansible_doc_list(self, use_cache: bool = True) -> Dict[str, ModuleInfo]:
-        """Fetch list of modules from ansible-doc -l."""
-        if use_cache and self.cache_path.exists():
-            print(f"Loading ansible-doc cache from {self.cache_path}")
+    def fetch_ansible_doc_list(self, use_cache: Optional[bool] = None) -> Dict[str, ModuleInfo]:
+        """Fetch list of modules from the cache, the shipped catalogue or ansible-doc -l."""
+        if use_cache is None:
+            use_cache = self.use_cache
+        catalogue = read_catalogue(self.catalogue_path) if self.catalogue_path else None
+        if use_cache and self.cache_path.exists() and (
+            catalogue is None or self._cache_is_fresher(catalogue)
+        ):
+            print(f"Module source: ansible-doc cache {self.cache_path}")
             with open(self.cache_path, encoding="utf-8") as f:
                 cached = json.load(f)
                 return {
@@ -178,14 +491,21 @@ class ModuleDiffAnalyzer:
                     for name, data in cached.items()
                 }
         
-        modules = self._execute_ansible_doc()
+        # The catalogue only covers a curated set of collections, so it never
+        # stands in for a working ansible-doc unless --offline asks for it
+        if self.offline:
+            modules = self._fallback_module_list("--offline")
+        else:
+            modules = self._execute_ansible_doc()
+        if modules and self.last_source == "ansible-doc":
+            print("Module source: ansible-doc -l")
         
         # Save to cache
-        if modules:
+        if modules and self.last_source == "ansible-doc":
             self.cache_path.parent.mkdir(parents=True, exist_ok=True)
             with open(self.cache_path, "w", encoding="utf-8") as f:
                 json.dump(
-                    {name: asdict(info) for name, info in modules.items()},
+                    {name: _record_to_dict(info) for name, info in modules.items()},
                     f,
                     indent=2,
                     ensure_ascii=False,
@@ -194,8 +514,36 @@ class ModuleDiffAnalyzer:
         
         return modules
 
+    def _cache_is_fresher(self, catalogue: Dict[str, Any]) -> bool:
+        """Return True if the local cache was written after the catalogue snapshot."""
+        try:
+            generated = datetime.fromisoformat(catalogue.get("generated_at", ""))
+        except ValueError:
+            return True
+        if generated.tzinfo is None:
+            generated = generated.replace(tzinfo=timezone.utc)
+        return self.cache_path.stat().st_mtime > generated.timestamp()
+
+    def _shard_collections(self) -> Optional[List[str]]:
+        """Collections to decode from the catalogue, or None for all of them.
+
+        Only shards made entirely of collection names narrow the load;
+        category shards need every module to resolve categories.
+        """
+        if self.shard and all("." in token for token in self.shard):
+            return self.shard
+        return None
+
     def _execute_ansible_doc(self) -> Dict[str, ModuleInfo]:
         """Execute ansible-doc -l and parse output."""
+        modules = self._run_ansible_doc()
+        if modules is None:
+            return self._fallback_module_list()
+        self.last_source = "ansible-doc"
+        return modules
+
+    def _run_ansible_doc(self) -> Optional[Dict[str, ModuleInfo]]:
+        """Run ansible-doc -l, returning None if it is unavailable or fails."""
         try:
             print("Executing ansible-doc -l (this may take a moment)...")
             result = subprocess.run(
@@ -208,19 +556,43 @@ class ModuleDiffAnalyzer:
             if result.returncode != 0:
                 print(f"Warning: ansible-doc failed with code {result.returncode}")
                 print(f"stderr: {result.stderr}")
-                return self._fallback_module_list()
+                return None
             
             return self._parse_ansible_doc_output(result.stdout)
         
         except FileNotFoundError:
             print("Warning: ansible-doc command not found, using fallback")
-            return self._fallback_module_list()
+            return None
         except subprocess.TimeoutExpired:
             print("Warning: ansible-doc timed out, using fallback")
-            return self._fallback_module_list()
+            return None
         except Exception as e:
             print(f"Warning: Error executing ansible-doc: {e}")
-            return self._fallback_module_list()
+            return None
+
+    def _ansible_core_version(self) -> str:
+        """Return the installed ansible-core version, or "" if it cannot be determined."""
+        try:
+            result = subprocess.run(
+                ["ansible-doc", "--version"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+        match = re.search(r"\[core ([^\]]+)\]", result.stdout)
+        return match.group(1) if match else ""
+
+    def write_catalogue(self, output_path: Path) -> bool:
+        """Regenerate the catalogue snapshot from ansible-doc -l."""
+        modules = self._run_ansible_doc()
+        if not modules:
+            print("Error: ansible-doc is required to regenerate the module catalogue")
+            return False
+        write_catalogue(modules, output_path, ansible_core=self._ansible_core_version())
+        print(f"Module catalogue written to: {output_path} ({len(modules)} modules)")
+        return True
 
     def _parse_ansible_doc_output(self, output: str) -> Dict[str, ModuleInfo]:
         """Parse ansible-doc -l output."""
@@ -251,9 +623,17 @@ class ModuleDiffAnalyzer:
         
         return modules
 
-    def _fallback_module_list(self) -> Dict[str, ModuleInfo]:
-        """Return a fallback list of common modules when ansible-doc is unavailable."""
-        print("Using fallback module list (ansible-doc unavailable)")
+    def _fallback_module_list(self, reason: str = "ansible-doc unavailable") -> Dict[str, ModuleInfo]:
+        """Return the catalogue, or a list of common modules, when ansible-doc is not used."""
+        if self.catalogue_path:
+            modules = load_catalogue(self.catalogue_path, self._shard_collections())
+            if modules:
+                self.last_source = "catalogue"
+                print(f"Module source: catalogue {self.catalogue_path} ({reason})")
+                return modules
+        
+        self.last_source = "fallback"
+        print(f"Module source: built-in fallback list ({reason})")
         common_modules = [
             "ansible.builtin.copy",
             "ansible.builtin.template",
@@ -308,9 +688,13 @@ class ModuleDiffAnalyzer:
 
     def get_module_priority(self, module_name: str, category: str = "") -> str:
         """Get priority for a module."""
-        # Check explicit module priority
-        if module_name in self.priorities_config.get("modules", {}):
-            return self.priorities_config["modules"][module_name]
+        if self.priority_rules is None:
+            self.priority_rules = PriorityRules(self.priorities_config.get("modules") or {})
+        
+        # Check explicit, namespace and glob module rules
+        priority = self.priority_rules.match(module_name)
+        if priority:
+            return priority
         
         # Check category priority
         if category and category in self.priorities_config.get("category_priorities", {}):
@@ -353,40 +737,84 @@ class ModuleDiffAnalyzer:
         
         return "other"
 
+    def in_shard(self, module_name: str, category: str) -> bool:
+        """Return True if a module belongs to the configured shard."""
+        if not self.shard:
+            return True
+        for token in self.shard:
+            if category == token or module_name == token or module_name.startswith(token + "."):
+                return True
+        return False
+
+    def _timed(self, phase: str, func: Callable[[], Any]) -> Any:
+        """Run one load phase and record its duration."""
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.phase_timings[phase] = time.perf_counter() - started
+
+    def load_all(self) -> None:
+        """Run the load phases concurrently.
+
+        The ansible-doc subprocess is the slowest phase, so it is started
+        first; the YAML loads and directory scan overlap with it. Each
+        phase fills its own attributes, so the combined result does not
+        depend on completion order.
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ansible_doc = pool.submit(self._timed, "ansible_doc", self.fetch_ansible_doc_list)
+            others = [
+                pool.submit(self._timed, "priorities", self.load_priorities),
+                pool.submit(self._timed, "metadata", self.load_metadata),
+                pool.submit(self._timed, "filesystem", self.load_filesystem_modules),
+            ]
+            for future in others:
+                future.result()
+            self.ansible_modules = ansible_doc.result()
+        self.phase_timings["load_wall"] = time.perf_counter() - started
+        
+        load_phases = PHASE_ORDER[:4]
+        critical = max(load_phases, key=lambda phase: self.phase_timings.get(phase, 0.0))
+        timings = ", ".join(f"{phase} {self.phase_timings[phase]:.2f}s" for phase in load_phases)
+        print(
+            f"Load phases: {timings} "
+            f"(wall {self.phase_timings['load_wall']:.2f}s, critical path: {critical})"
+        )
+
     def analyze(self) -> DiffReport:
         """Perform complete analysis."""
         print("\n=== Module Diff Analysis ===\n")
         
         # Load all data
-        self.load_priorities()
-        self.load_metadata()
-        self.load_filesystem_modules()
-        self.ansible_modules = self.fetch_ansible_doc_list()
+        self.load_all()
         
         # Analyze coverage
         coverage_details: List[ModuleCoverage] = []
         all_modules = set(self.ansible_modules.keys())
         
         # Add all modules from metadata
+        metadata_modules: Set[str] = set()
         for category_modules in self.covered_modules.values():
-            all_modules.update(category_modules)
+            metadata_modules.update(category_modules)
+        all_modules.update(metadata_modules)
+        
+        # Short names of every module directory, for filesystem matching
+        filesystem_names: Set[str] = set()
+        for cat_modules in self.filesystem_modules.values():
+            filesystem_names.update(cat_modules)
         
         # Analyze each module
         for module_name in sorted(all_modules):
             category = self.infer_module_category(module_name)
+            if not self.in_shard(module_name, category):
+                continue
             priority = self.get_module_priority(module_name, category)
             
             in_ansible_doc = module_name in self.ansible_modules
-            in_metadata = any(module_name in mods for mods in self.covered_modules.values())
-            
-            # Check filesystem - try to match module name
-            in_filesystem = False
-            for cat_modules in self.filesystem_modules.values():
-                # Extract the module short name for matching
-                short_name = module_name.split(".")[-1]
-                if short_name in cat_modules:
-                    in_filesystem = True
-                    break
+            in_metadata = module_name in metadata_modules
+            in_filesystem = module_name.split(".")[-1] in filesystem_names
             
             # Determine status
             if in_metadata and in_filesystem:
@@ -409,19 +837,30 @@ class ModuleDiffAnalyzer:
             )
             coverage_details.append(coverage)
         
-        # Calculate statistics
+        started = time.perf_counter()
+        report = self.build_report(coverage_details)
+        self.phase_timings["analysis"] = time.perf_counter() - started
+        # Fixed key order regardless of which phase finished first
+        report.phase_timings = {
+            phase: self.phase_timings[phase] for phase in PHASE_ORDER if phase in self.phase_timings
+        }
+        return report
+
+    @staticmethod
+    def build_report(coverage_details: List[ModuleCoverage]) -> DiffReport:
+        """Summarize coverage records into a report in a single pass."""
         category_stats: Dict[str, CategoryStats] = {}
+        totals = {"covered": 0, "missing": 0, "undocumented": 0}
+        total_ansible = 0
+        
         for coverage in coverage_details:
-            if coverage.category not in category_stats:
-                category_stats[coverage.category] = CategoryStats(
-                    category=coverage.category,
-                    priority_breakdown={},
-                )
-            
-            stats = category_stats[coverage.category]
+            stats = category_stats.get(coverage.category)
+            if stats is None:
+                stats = category_stats[coverage.category] = CategoryStats(category=coverage.category)
             
             if coverage.in_ansible_doc:
                 stats.total_ansible_doc += 1
+                total_ansible += 1
             
             if coverage.status == "covered":
                 stats.total_covered += 1
@@ -429,11 +868,12 @@ class ModuleDiffAnalyzer:
                 stats.total_missing += 1
             elif coverage.status == "undocumented":
                 stats.total_undocumented += 1
+            if coverage.status in totals:
+                totals[coverage.status] += 1
             
             # Priority breakdown
-            if coverage.priority not in stats.priority_breakdown:
-                stats.priority_breakdown[coverage.priority] = 0
-            stats.priority_breakdown[coverage.priority] += 1
+            breakdown = stats.priority_breakdown
+            breakdown[coverage.priority] = breakdown.get(coverage.priority, 0) + 1
         
         # Calculate coverage percentages
         for stats in category_stats.values():
@@ -441,24 +881,20 @@ class ModuleDiffAnalyzer:
                 stats.coverage_percentage = (stats.total_covered / stats.total_ansible_doc) * 100
         
         # Find duplicates (modules covered in multiple categories)
-        duplicates = self._find_duplicates(coverage_details)
+        duplicates = ModuleDiffAnalyzer._find_duplicates(coverage_details)
         
         # Find inconsistencies (in metadata but not in filesystem, or vice versa)
-        inconsistencies = self._find_inconsistencies(coverage_details)
+        inconsistencies = ModuleDiffAnalyzer._find_inconsistencies(coverage_details)
         
-        # Overall statistics
-        total_ansible = len([c for c in coverage_details if c.in_ansible_doc])
-        total_covered = len([c for c in coverage_details if c.status == "covered"])
-        total_missing = len([c for c in coverage_details if c.status == "missing"])
-        total_undocumented = len([c for c in coverage_details if c.status == "undocumented"])
+        total_covered = totals["covered"]
         overall_coverage = (total_covered / total_ansible * 100) if total_ansible > 0 else 0
         
         report = DiffReport(
             generated_at=datetime.now(timezone.utc).isoformat(),
             total_ansible_modules=total_ansible,
             total_covered=total_covered,
-            total_missing=total_missing,
-            total_undocumented=total_undocumented,
+            total_missing=totals["missing"],
+            total_undocumented=totals["undocumented"],
             overall_coverage=overall_coverage,
             categories=category_stats,
             coverage_details=coverage_details,
@@ -468,7 +904,8 @@ class ModuleDiffAnalyzer:
         
         return report
 
-    def _find_duplicates(self, coverage_details: List[ModuleCoverage]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _find_duplicates(coverage_details: List[ModuleCoverage]) -> List[Dict[str, Any]]:
         """Find modules that appear in multiple categories."""
         module_categories: Dict[str, List[str]] = defaultdict(list)
         
@@ -487,7 +924,8 @@ class ModuleDiffAnalyzer:
         
         return sorted(duplicates, key=lambda x: x["count"], reverse=True)
 
-    def _find_inconsistencies(self, coverage_details: List[ModuleCoverage]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _find_inconsistencies(coverage_details: List[ModuleCoverage]) -> List[Dict[str, Any]]:
         """Find inconsistencies between metadata and filesystem."""
         inconsistencies = []
         
@@ -510,17 +948,23 @@ class ModuleDiffAnalyzer:
         return inconsistencies
 
     def write_json_report(self, report: DiffReport, output_path: Path) -> None:
-        """Write JSON report."""
+        """Write JSON report, streaming coverage records one per line."""
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Convert to dict for JSON serialization
-        report_dict = asdict(report)
-        
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(report_dict, f, indent=2, ensure_ascii=False)
+            f.writelines(iter_json_report(report))
         
         print(f"\nJSON report written to: {output_path}")
 
+    def write_ndjson_report(self, report: DiffReport, output_path: Path) -> None:
+        """Write NDJSON report (one JSON object per line)."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.writelines(iter_ndjson_report(report))
+        
+        print(f"NDJSON report written to: {output_path}")
+
     def write_markdown_report(self, report: DiffReport, output_path: Path) -> None:
         """Write Markdown report."""
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -577,8 +1021,13 @@ class ModuleDiffAnalyzer:
         ])
         
         # Missing modules by priority
+        missing_by_priority: Dict[str, List[ModuleCoverage]] = defaultdict(list)
+        for coverage in report.coverage_details:
+            if coverage.status == "missing":
+                missing_by_priority[coverage.priority].append(coverage)
+        
         for priority in ["P1", "P2", "P3"]:
-            missing = [c for c in report.coverage_details if c.status == "missing" and c.priority == priority]
+            missing = missing_by_priority.get(priority, [])
             if missing:
                 lines.extend([
                     f"## Missing {priority} Modules",
@@ -645,6 +1094,11 @@ class ModuleDiffAnalyzer:
         print(f"Missing: {report.total_missing}")
         print(f"Overall Coverage: {report.overall_coverage:.1f}%")
         
+        if report.phase_timings:
+            print("\nPhase Timings:")
+            for phase, seconds in report.phase_timings.items():
+                print(f"  {phase}: {seconds:.2f}s")
+        
         if priority_filter:
             missing = [
                 c for c in report.coverage_details
@@ -665,6 +1119,233 @@ class ModuleDiffAnalyzer:
         print("\n" + "=" * 70)
 
 
+def _record_from_dict(cls: Any, data: Dict[str, Any]) -> Any:
+    """Build a record from a dict, ignoring keys the record does not know."""
+    known = {f.name for f in fields(cls)}
+    return cls(**{key: value for key, value in data.items() if key in known})
+
+
+def load_report(path: Path) -> DiffReport:
+    """Load a DiffReport from a JSON or NDJSON report file."""
+    with open(path, encoding="utf-8") as f:
+        first_line = f.readline()
+        try:
+            first = json.loads(first_line)
+        except json.JSONDecodeError:
+            first = None
+        
+        if isinstance(first, dict) and first.get("type") == "summary":
+            header = first
+            sections: Dict[str, List[Any]] = {section: [] for section in STREAMED_SECTIONS}
+            section_by_type = {value: key for key, value in NDJSON_RECORD_TYPES.items()}
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                section = section_by_type.get(record.pop("type", None))
+                if section:
+                    sections[section].append(record)
+        else:
+            f.seek(0)
+            header = json.load(f)
+            sections = {section: header.get(section) or [] for section in STREAMED_SECTIONS}
+            if isinstance(sections["categories"], dict):
+                sections["categories"] = list(sections["categories"].values())
+    
+    return DiffReport(
+        generated_at=header.get("generated_at", ""),
+        total_ansible_modules=header.get("total_ansible_modules", 0),
+        total_covered=header.get("total_covered", 0),
+        total_missing=header.get("total_missing", 0),
+        total_undocumented=header.get("total_undocumented", 0),
+        overall_coverage=header.get("overall_coverage", 0.0),
+        categories={
+            item["category"]: _record_from_dict(CategoryStats, item)
+            for item in sections["categories"]
+        },
+        coverage_details=[
+            _record_from_dict(ModuleCoverage, item) for item in sections["coverage_details"]
+        ],
+        duplicates=list(sections["duplicates"]),
+        inconsistencies=list(sections["inconsistencies"]),
+        phase_timings=header.get("phase_timings") or {},
+    )
+
+
+def merge_reports(reports: List[DiffReport]) -> DiffReport:
+    """Combine shard reports into one report.
+
+    Statistics, duplicates and inconsistencies are recomputed from the
+    merged records, so a full set of shards gives the same result as a
+    single run.
+    """
+    merged: Dict[str, ModuleCoverage] = {}
+    for report in reports:
+        for coverage in report.coverage_details:
+            merged.setdefault(coverage.module, coverage)
+    
+    return ModuleDiffAnalyzer.build_report([merged[name] for name in sorted(merged)])
+
+
+@dataclass
+class ReportDelta:
+    """Differences between two module_diff runs."""
+
+    old_generated_at: str
+    new_generated_at: str
+    overall_coverage_delta: float
+    added_modules: List[str] = field(default_factory=list)
+    removed_modules: List[str] = field(default_factory=list)
+    newly_covered: List[Dict[str, Any]] = field(default_factory=list)
+    lost_coverage: List[Dict[str, Any]] = field(default_factory=list)
+    newly_missing: List[Dict[str, Any]] = field(default_factory=list)
+    priority_changes: List[Dict[str, Any]] = field(default_factory=list)
+    category_moves: List[Dict[str, Any]] = field(default_factory=list)
+    category_deltas: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        return any(
+            (
+                self.added_modules,
+                self.removed_modules,
+                self.newly_covered,
+                self.lost_coverage,
+                self.newly_missing,
+                self.priority_changes,
+                self.category_moves,
+            )
+        )
+
+
+def compare_reports(old: DiffReport, new: DiffReport) -> ReportDelta:
+    """Compare two reports using per-module index lookups."""
+    old_index = {coverage.module: coverage for coverage in old.coverage_details}
+    new_index = {coverage.module: coverage for coverage in new.coverage_details}
+    
+    delta = ReportDelta(
+        old_generated_at=old.generated_at,
+        new_generated_at=new.generated_at,
+        overall_coverage_delta=new.overall_coverage - old.overall_coverage,
+        removed_modules=sorted(name for name in old_index if name not in new_index),
+    )
+    
+    for name in sorted(new_index):
+        current = new_index[name]
+        previous = old_index.get(name)
+        old_status = previous.status if previous else None
+        
+        if previous is None:
+            delta.added_modules.append(name)
+        
+        change = {"module": name, "category": current.category, "old": old_status, "new": current.status}
+        if current.status != old_status:
+            if current.status == "covered":
+                delta.newly_covered.append(change)
+            elif current.status == "missing":
+                delta.newly_missing.append(change)
+            if old_status == "covered":
+                delta.lost_coverage.append(change)
+        
+        if previous is None:
+            continue
+        if previous.priority != current.priority:
+            delta.priority_changes.append(
+                {"module": name, "old": previous.priority, "new": current.priority}
+            )
+        if previous.category != current.category:
+            delta.category_moves.append(
+                {"module": name, "old": previous.category, "new": current.category}
+            )
+    
+    empty = CategoryStats(category="")
+    for category in sorted(set(old.categories) | set(new.categories)):
+        before = old.categories.get(category, empty)
+        after = new.categories.get(category, empty)
+        entry = {
+            "covered_delta": after.total_covered - before.total_covered,
+            "missing_delta": after.total_missing - before.total_missing,
+            "old_coverage": before.coverage_percentage,
+            "new_coverage": after.coverage_percentage,
+            "coverage_delta": after.coverage_percentage - before.coverage_percentage,
+        }
+        if entry["covered_delta"] or entry["missing_delta"] or entry["coverage_delta"]:
+            delta.category_deltas[category] = entry
+    
+    return delta
+
+
+def render_delta(delta: ReportDelta) -> str:
+    """Render a delta as console/Markdown-friendly text."""
+    lines = [
+        "# Module Coverage Delta",
+        "",
+        f"- Old run: {delta.old_generated_at}",
+        f"- New run: {delta.new_generated_at}",
+        f"- Overall coverage change: {delta.overall_coverage_delta:+.1f}%",
+        f"- Added modules: {len(delta.added_modules)}",
+        f"- Removed modules: {len(delta.removed_modules)}",
+        "",
+    ]
+    
+    status_sections = [
+        ("Newly Covered", delta.newly_covered),
+        ("Lost Coverage", delta.lost_coverage),
+        ("Newly Missing", delta.newly_missing),
+    ]
+    for title, changes in status_sections:
+        if not changes:
+            continue
+        lines.extend([f"## {title} ({len(changes)})", ""])
+        for change in changes:
+            old_status = change["old"] or "new"
+            lines.append(f"- {change['module']} ({change['category']}): {old_status} -> {change['new']}")
+        lines.append("")
+    
+    move_sections = [
+        ("Priority Changes", delta.priority_changes),
+        ("Category Moves", delta.category_moves),
+    ]
+    for title, changes in move_sections:
+        if not changes:
+            continue
+        lines.extend([f"## {title} ({len(changes)})", ""])
+        for change in changes:
+            lines.append(f"- {change['module']}: {change['old']} -> {change['new']}")
+        lines.append("")
+    
+    if delta.category_deltas:
+        lines.extend([
+            "## Category Coverage Deltas",
+            "",
+            "| Category | Covered Δ | Missing Δ | Coverage % (old -> new) |",
+            "|----------|-----------|-----------|-------------------------|",
+        ])
+        for category, entry in delta.category_deltas.items():
+            lines.append(
+                f"| {category} | {entry['covered_delta']:+d} | {entry['missing_delta']:+d} | "
+                f"{entry['old_coverage']:.1f}% -> {entry['new_coverage']:.1f}% |"
+            )
+        lines.append("")
+    
+    if not delta.has_changes and not delta.category_deltas:
+        lines.append("No coverage changes between the two runs.")
+    
+    return "\n".join(lines)
+
+
+def report_delta(old: DiffReport, new: DiffReport, output_path: Optional[Path]) -> None:
+    """Compare two reports, print the delta and optionally save it as JSON."""
+    delta = compare_reports(old, new)
+    print(render_delta(delta))
+    
+    if output_path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(delta), f, indent=2, ensure_ascii=False)
+        print(f"\nDelta report written to: {output_path}")
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -678,6 +1359,12 @@ Examples:
   # Refresh ansible-doc cache and generate reports
   %(prog)s --refresh-cache
 
+  # Analyze without ansible-doc, using the shipped module catalogue
+  %(prog)s --offline
+
+  # Regenerate the shipped module catalogue from the installed ansible-doc
+  %(prog)s --write-catalogue
+
   # Filter by priority
   %(prog)s --priority P1
 
@@ -686,6 +1373,20 @@ Examples:
 
   # Custom output paths
   %(prog)s --json-output custom/path.json --md-output custom/path.md
+
+  # Also write an NDJSON report for line-by-line processing
+  %(prog)s --ndjson-output reports/module_diff.ndjson
+
+  # Compare two saved runs (JSON or NDJSON)
+  %(prog)s --compare old/module_diff.json reports/module_diff.json
+
+  # Analyze and compare against the previous run
+  %(prog)s --compare-last
+
+  # Analyze one shard (collection namespace or category), then merge shards
+  %(prog)s --shard community.general --json-output shards/general.json
+  %(prog)s --shard files,system --json-output shards/core.json
+  %(prog)s --merge shards/general.json shards/core.json
         """,
     )
     
@@ -712,6 +1413,27 @@ Examples:
         action="store_true",
         help="Refresh ansible-doc cache instead of using cached data",
     )
+    parser.add_argument(
+        "--catalogue",
+        type=Path,
+        default=DEFAULT_CATALOGUE,
+        help=f"Path to the shipped module catalogue snapshot (default: {DEFAULT_CATALOGUE})",
+    )
+    parser.add_argument(
+        "--no-catalogue",
+        action="store_true",
+        help="Ignore the module catalogue snapshot",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Do not run ansible-doc; list modules from the cache or the catalogue snapshot",
+    )
+    parser.add_argument(
+        "--write-catalogue",
+        action="store_true",
+        help="Regenerate the module catalogue from ansible-doc -l and exit",
+    )
     parser.add_argument(
         "--json-output",
         type=Path,
@@ -724,6 +1446,11 @@ Examples:
         default=DEFAULT_MD_OUTPUT,
         help=f"Path to Markdown output (default: {DEFAULT_MD_OUTPUT})",
     )
+    parser.add_argument(
+        "--ndjson-output",
+        type=Path,
+        help="Optional path to an NDJSON report (one record per line)",
+    )
     parser.add_argument(
         "--priority",
         choices=["P1", "P2", "P3"],
@@ -740,21 +1467,87 @@ Examples:
         default=ROOT,
         help=f"Project root directory (default: {ROOT})",
     )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("OLD", "NEW"),
+        help="Compare two saved reports instead of running an analysis",
+    )
+    parser.add_argument(
+        "--compare-last",
+        action="store_true",
+        help="Compare this run against the previous run saved in --last-run, then save this run there",
+    )
+    parser.add_argument(
+        "--last-run",
+        type=Path,
+        help=(
+            "Save this run for a later --compare-last "
+            f"(default with --compare-last: {DEFAULT_LAST_RUN}; other runs are not saved unless set)"
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        help="Only analyze modules of these comma-separated collections or categories",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        type=Path,
+        metavar="REPORT",
+        help="Merge shard reports (JSON or NDJSON) into one report",
+    )
+    parser.add_argument(
+        "--delta-output",
+        type=Path,
+        help="Optional JSON path for the comparison result",
+    )
     
     args = parser.parse_args()
     
+    if args.compare:
+        old_path, new_path = args.compare
+        report_delta(load_report(old_path), load_report(new_path), args.delta_output)
+        return 0
+    
+    shard = args.shard.split(",") if args.shard else None
+    last_run = args.last_run or (DEFAULT_LAST_RUN if args.compare_last and not shard else None)
+    
     # Create analyzer
     analyzer = ModuleDiffAnalyzer(
         priorities_path=args.priorities,
         modules_path=args.modules,
         cache_path=args.cache,
         root=args.root,
+        shard=shard,
+        catalogue_path=None if args.no_catalogue else args.catalogue,
     )
+    analyzer.offline = args.offline
+    
+    if args.write_catalogue:
+        return 0 if analyzer.write_catalogue(args.catalogue) else 1
+    
+    if args.merge:
+        report = merge_reports([load_report(path) for path in args.merge])
+        # Descriptions for the Markdown report come from the cache or catalogue
+        if args.cache.exists() or (analyzer.catalogue_path and analyzer.catalogue_path.exists()):
+            analyzer.offline = True
+            analyzer.ansible_modules = analyzer.fetch_ansible_doc_list()
+        analyzer.print_summary(report, priority_filter=args.priority)
+        if not args.summary:
+            analyzer.write_json_report(report, args.json_output)
+            analyzer.write_markdown_report(report, args.md_output)
+            if args.ndjson_output:
+                analyzer.write_ndjson_report(report, args.ndjson_output)
+        return 0
     
     # Refresh cache if requested
-    if args.refresh_cache and args.cache.exists():
-        print(f"Removing cache: {args.cache}")
-        args.cache.unlink()
+    if args.refresh_cache:
+        analyzer.use_cache = False
+        if args.cache.exists():
+            print(f"Removing cache: {args.cache}")
+            args.cache.unlink()
     
     # Analyze
     report = analyzer.analyze()
@@ -762,10 +1555,24 @@ Examples:
     # Print summary
     analyzer.print_summary(report, priority_filter=args.priority)
     
+    # Compare against the previous run, then remember this one
+    if args.compare_last:
+        if last_run and last_run.exists():
+            report_delta(load_report(last_run), report, args.delta_output)
+        else:
+            print(f"No previous run found at {last_run}; nothing to compare")
+    if last_run:
+        try:
+            analyzer.write_ndjson_report(report, last_run)
+        except OSError as e:
+            print(f"Warning: Could not save this run to {last_run}: {e}")
+    
     # Generate reports unless summary-only
     if not args.summary:
         analyzer.write_json_report(report, args.json_output)
         analyzer.write_markdown_report(report, args.md_output)
+        if args.ndjson_output:
+            analyzer.write_ndjson_report(report, args.ndjson_output)
     
     return 0
 
@@ -14,6 +14,11 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 import yaml
 
+try:
+    from tools.markdown_scan import scan_markdown, strip_markdown  # noqa: F401 - re-exported
+except ImportError:  # running as a script puts tools/ on sys.path
+    from markdown_scan import scan_markdown, strip_markdown  # noqa: F401
+
 ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_METADATA = ROOT / "metadata" / "modules.yaml"
 DEFAULT_DIFF = ROOT / "metadata" / "ansible_doc_diff.json"
@@ -165,57 +170,18 @@ def humanize_identifier(value: str) -> str:
     return " ".join(word.capitalize() for word in parts if word)
 
 
-def strip_markdown(text: str) -> str:
-    """Remove minimal Markdown syntax for summaries."""
-    text = re.sub(r"`([^`]*)`", r"\1", text)
-    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)
-    text = re.sub(r"\*([^*]+)\*", r"\1", text)
-    text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)
-    text = text.replace("<br>", " ").replace("<br/>", " ")
-    return text.strip()
-
-
 def extract_title(markdown_path: Path, fallback: str) -> str:
-    try:
-        lines = markdown_path.read_text(encoding="utf-8").splitlines()
-    except FileNotFoundError:
+    structure = scan_markdown(markdown_path)
+    if structure is None:
         return fallback
-    for line in lines:
-        line = line.strip()
-        if line.startswith("#"):
-            return strip_markdown(line.lstrip("# ")) or fallback
-    return fallback
+    return structure.title or fallback
 
 
 def extract_summary(markdown_path: Path, fallback: str) -> str:
-    try:
-        lines = markdown_path.read_text(encoding="utf-8").splitlines()
-    except FileNotFoundError:
-        return fallback
-    summary_lines: List[str] = []
-    in_code_block = False
-    for raw in lines:
-        line = raw.strip()
-        if line.startswith("```"):
-            in_code_block = not in_code_block
-            continue
-        if in_code_block or not line:
-            if summary_lines:
-                break
-            continue
-        if line.startswith("#"):
-            continue
-        if line.startswith(">"):
-            line = line.lstrip("> ")
-        cleaned = strip_markdown(line)
-        if not cleaned:
-            continue
-        summary_lines.append(cleaned)
-        if len(" ".join(summary_lines)) >= MAX_SUMMARY:
-            break
-    if not summary_lines:
+    structure = scan_markdown(markdown_path)
+    if structure is None or not structure.summary:
         return fallback
-    summary = re.sub(r"\s+", " ", " ".join(summary_lines)).strip()
+    summary = structure.summary
     if len(summary) > MAX_SUMMARY:
         summary = summary[:MAX_SUMMARY].rstrip() + "…"
     return summary
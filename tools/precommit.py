@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Pre-commit 检查 - Pre-commit Runner
+一次取得暂存文件列表，在单个进程中对每个文件只读取、解析一次，完成 YAML 语法、硬编码密钥、
+变量文件警告头、no_log 与 FQCN 检查；结果按文件内容哈希缓存，未变化的文件在下次提交时直接复用。
+文件较多时在多个 CPU 核上并行检查。最后在进程内运行限时审计，检查基线之外的新 Critical 问题
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import yaml
+
+try:
+    from tools.audit_cache import source_version
+    from tools.secret_scanner import DEFAULT_SCANNER, EntropyDetector, SecretScanner, is_scan_target
+except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+    from audit_cache import source_version
+    from secret_scanner import DEFAULT_SCANNER, EntropyDetector, SecretScanner, is_scan_target
+
+# 默认缓存文件（相对仓库根目录，.cache/ 已在 .gitignore 中）
+DEFAULT_CACHE = '.cache/precommit.json'
+
+# 少于该数量的待检查文件不启动进程池
+PARALLEL_MIN_FILES = 8
+
+# 每个文件最多显示的密钥发现数
+MAX_SECRETS_PER_FILE = 3
+
+# 检查顺序与各检查的输出标题、通过时的提示
+CHECKS = (
+    ('yaml', '📝 检查 YAML 语法...', '✓ YAML 语法检查通过'),
+    ('secrets', '🔒 检查硬编码密码...', '✓ 未发现硬编码密码'),
+    ('vars-header', '⚠️  检查变量文件警告头...', '✓ 变量文件警告头检查通过'),
+    ('no-log', '🔐 检查 no_log 使用...', '✓ no_log 使用检查通过'),
+    ('fqcn', '📦 检查 FQCN 使用（建议）...', '✓ FQCN 使用良好'),
+)
+
+TASK_START_PATTERN = re.compile(r'^\s*-\s*name:\s*(.*)$')
+SENSITIVE_LINE_PATTERN = re.compile(r'password|passwd|secret|token|key|credential', re.IGNORECASE)
+NO_LOG_PATTERN = re.compile(r'no_log:\s*(true|yes)')
+# 常见的非 FQCN 模块调用
+NON_FQCN_PATTERN = re.compile(
+    r'^\s+(copy|template|file|service|user|group|apt|yum|command|shell):', re.MULTILINE
+)
+
+# 一条检查结果：(检查名, 'error' 或 'warning', 消息)
+Finding = Tuple[str, str, str]
+
+
+def _sensitive_tasks(text: str) -> List[str]:
+    """包含敏感关键字但没有 no_log 的任务名（按行的简化检查，可能有误报）"""
+    tasks = []
+    name: Optional[str] = None
+    sensitive = no_log = False
+    for line in text.splitlines():
+        match = TASK_START_PATTERN.match(line)
+        if match:
+            if name is not None and sensitive and not no_log:
+                tasks.append(name)
+            name, sensitive, no_log = match.group(1), False, False
+        if name is not None:
+            sensitive = sensitive or bool(SENSITIVE_LINE_PATTERN.search(line))
+            no_log = no_log or bool(NO_LOG_PATTERN.search(line))
+    if name is not None and sensitive and not no_log:
+        tasks.append(name)
+    return tasks
+
+
+def check_file(path: str, data: bytes) -> List[Finding]:
+    """对一个文件运行全部适用的检查"""
+    findings: List[Finding] = []
+    text = data.decode('utf-8', errors='replace')
+
+    if path.endswith(('.yml', '.yaml')):
+        try:
+            yaml.safe_load(data)
+        except yaml.YAMLError:
+            findings.append(('yaml', 'error', f'YAML 语法错误: {path}'))
+
+    if is_scan_target(Path(path)):
+        secrets = DEFAULT_SCANNER.scan_text(data, path)
+        for finding in secrets[:MAX_SECRETS_PER_FILE]:
+            confidence = f' ({finding.confidence:.2f})' if finding.kind == 'high_entropy' else ''
+            findings.append(('secrets', 'error',
+                             f'{finding.path}:{finding.line}: [{finding.kind}]{confidence} {finding.text}'))
+        if len(secrets) > MAX_SECRETS_PER_FILE:
+            findings.append(('secrets', 'error', f'{path}: 另有 {len(secrets) - MAX_SECRETS_PER_FILE} 处'))
+
+    if path.endswith('vars/example_vars.yml') and '⚠️' not in text:
+        findings.append(('vars-header', 'error',
+                         f'变量文件缺少警告头: {path}\n     请添加: # ⚠️ 警告：本文件仅为示例配置'))
+
+    if path.endswith('playbook.yml'):
+        for task in _sensitive_tasks(text):
+            findings.append(('no-log', 'warning', f'建议为敏感任务添加 no_log: {path}\n     任务: {task}'))
+        if NON_FQCN_PATTERN.search(text):
+            findings.append(('fqcn', 'warning', f'建议使用 FQCN: {path}\n     (如 ansible.builtin.copy 代替 copy)'))
+    return findings
+
+
+def _check_item(item: Tuple[str, bytes]) -> List[Finding]:
+    return check_file(*item)
+
+
+def checker_version() -> str:
+    """检查逻辑（含引用的正则与密钥扫描器）的版本哈希，变化时缓存失效
+
+    熵检测器由扫描器在运行时创建，源码中没有直接引用，需要显式列出。
+    """
+    return source_version(check_file, SecretScanner, EntropyDetector)
+
+
+class ResultCache:
+    """按路径保存 (内容 SHA-1, 检查结果)"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.version = checker_version()
+        self.files: Dict[str, Tuple[str, List[Finding]]] = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return  # 缓存不存在或已损坏时从头开始
+        if data.get('version') == self.version:
+            self.files = {
+                key: (digest, [tuple(finding) for finding in findings])
+                for key, (digest, findings) in data.get('files', {}).items()
+            }
+
+    def get(self, path: str, digest: str) -> Optional[List[Finding]]:
+        entry = self.files.get(path)
+        if entry and entry[0] == digest:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, path: str, digest: str, findings: List[Finding]):
+        self.files[path] = (digest, findings)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data: Dict[str, Any] = {'version': self.version, 'files': self.files}
+        self.path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def staged_files() -> List[str]:
+    """待提交（新增、复制、修改）的文件"""
+    output = subprocess.run(
+        ['git', 'diff', '--cached', '--name-only', '--diff-filter=ACM', '-z'],
+        capture_output=True, check=True,
+    ).stdout.decode('utf-8')
+    return [name for name in output.split('\0') if name]
+
+
+def check_files(paths: Sequence[str], cache: Optional[ResultCache] = None,
+                jobs: int = 1) -> Dict[str, List[Finding]]:
+    """检查给定文件，返回每个文件的结果；未变化的文件从缓存读取"""
+    results: Dict[str, List[Finding]] = {}
+    pending: List[Tuple[str, bytes]] = []
+    digests: Dict[str, str] = {}
+    for path in paths:
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            continue  # 已删除或不是普通文件
+        digest = hashlib.sha1(data).hexdigest()
+        cached = cache.get(path, digest) if cache else None
+        if cached is not None:
+            results[path] = cached
+        else:
+            digests[path] = digest
+            pending.append((path, data))
+
+    if jobs > 1 and len(pending) >= PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            checked = list(pool.map(_check_item, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        checked = [_check_item(item) for item in pending]
+
+    for (path, _), findings in zip(pending, checked):
+        results[path] = findings
+        if cache:
+            cache.put(path, digests[path], findings)
+    return {path: results[path] for path in paths if path in results}
+
+
+def check_new_critical(root: Union[str, Path], max_seconds: float = 2) -> bool:
+    """限时审计，返回是否存在基线之外的新 Critical 问题"""
+    try:
+        from tools.audit_baseline import DEFAULT_BASELINE, Baseline
+        from tools.audit_cache import DEFAULT_CACHE as AUDIT_CACHE, FindingCache
+        from tools.comprehensive_audit import ComprehensiveAuditor, cache_engine_version
+    except ImportError:  # 以脚本方式运行时 tools/ 位于 sys.path
+        from audit_baseline import DEFAULT_BASELINE, Baseline
+        from audit_cache import DEFAULT_CACHE as AUDIT_CACHE, FindingCache
+        from comprehensive_audit import ComprehensiveAuditor, cache_engine_version
+
+    root = Path(root)
+    cache = FindingCache(root / AUDIT_CACHE, root, cache_engine_version())
+    auditor = ComprehensiveAuditor(
+        str(root),
+        baseline=Baseline.load(root / DEFAULT_BASELINE),
+        new_only=True,
+        keep_issues=False,
+        max_seconds=max_seconds,
+        cache=cache,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = auditor.run_audit()
+    cache.save()
+    return report['summary']['critical_issues'] > 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='提交前检查（默认检查 git 暂存的文件）')
+    parser.add_argument('files', nargs='*', help='要检查的文件（默认: git 暂存的文件）')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='并行检查的进程数 (默认: CPU 核数)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help=f'结果缓存路径 (默认: {DEFAULT_CACHE})')
+    parser.add_argument('--no-cache', action='store_true', help='不读取也不写入结果缓存')
+    parser.add_argument('--skip-audit', action='store_true', help='跳过基线之外新 Critical 问题的审计')
+    args = parser.parse_args(argv)
+
+    print('🔍 运行 pre-commit 检查...')
+    files = args.files or staged_files()
+    if not files:
+        print('✅ 没有文件需要检查')
+        return 0
+
+    cache = None if args.no_cache else ResultCache(args.cache)
+    results = check_files(files, cache, args.jobs)
+    if cache:
+        cache.save()
+
+    by_check: Dict[str, List[Finding]] = {}
+    for findings in results.values():
+        for finding in findings:
+            by_check.setdefault(finding[0], []).append(finding)
+
+    has_error = has_warning = False
+    for check, title, passed in CHECKS:
+        print()
+        print(title)
+        findings = by_check.get(check, [])
+        for _, level, message in findings:
+            print(f'  {"❌" if level == "error" else "⚠️ "} {message}')
+        has_error = has_error or any(level == 'error' for _, level, _ in findings)
+        has_warning = has_warning or any(level == 'warning' for _, level, _ in findings)
+        if not findings:
+            print(f'  {passed}')
+
+    if not args.skip_audit:
+        print()
+        print('🧭 检查新增审计问题...')
+        if check_new_critical('.'):
+            print('  ❌ 发现基线之外的新 Critical 问题，运行以下命令查看详情:')
+            print('     python3 tools/comprehensive_audit.py --project-root . --new-only')
+            has_error = True
+        else:
+            print('  ✓ 没有新增 Critical 问题')
+
+    print()
+    print('================================')
+    if cache:
+        print(f'💾 结果缓存: 命中 {cache.hits}，重新检查 {cache.misses}')
+    if has_error:
+        print('❌ Pre-commit 检查失败！')
+        print()
+        print('请修复上述错误后再次提交。')
+        print('如果确认这些错误可以忽略，使用 --no-verify 跳过检查：')
+        print('  git commit --no-verify')
+        return 1
+    if has_warning:
+        print('⚠️  Pre-commit 检查通过（有警告）')
+        print()
+        print('建议修复上述警告，或使用 --no-verify 跳过：')
+        print('  git commit --no-verify')
+        return 0
+    print('✅ Pre-commit 检查全部通过！')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
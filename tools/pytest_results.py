@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+pytest plugin that streams per-test results to an NDJSON file.
+
+Load it with ``-p tools.pytest_results --results-ndjson PATH``. Every test
+outcome is written and flushed as soon as it is known, so a run that is killed
+on timeout still leaves the results collected so far. A final ``summary``
+record marks a complete run.
+
+``read_results`` turns the file back into a ``TestRunResults`` record, and
+``read_coverage_total`` reads the total from a ``--cov-report=json`` file.
+``ResultCache`` keeps the last complete run keyed by ``inputs_digest``, a hash
+of every file in the checkout that the suite could read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+RESULTS_OPTION = "--results-ndjson"
+PLUGIN_NAME = "tools.pytest_results"
+DEFAULT_RESULT_CACHE = ".cache/test_results"
+
+# Generated output, caches and environments, which never feed a test outcome
+# (the result cache itself lives under .cache)
+SKIP_DIRS = frozenset({
+    ".git", ".cache", ".pytest_cache", ".venv", "venv", "reports", "__pycache__", "node_modules",
+})
+
+
+def pytest_addoption(parser) -> None:
+    group = parser.getgroup("results", "structured test results")
+    group.addoption(
+        RESULTS_OPTION,
+        dest="results_ndjson",
+        metavar="PATH",
+        help="Stream one JSON record per test outcome to PATH",
+    )
+
+
+def pytest_configure(config) -> None:
+    path = config.getoption("results_ndjson")
+    if path:
+        config.pluginmanager.register(ResultsWriter(Path(path)), "results_ndjson_writer")
+
+
+class ResultsWriter:
+    """Writes test outcomes as they are reported."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file: IO[str] = open(self.path, "w", encoding="utf-8")
+        self.started = time.monotonic()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def pytest_runtest_logreport(self, report) -> None:
+        # Record the call phase, plus setup/teardown only when they fail or skip
+        if report.when != "call" and report.outcome == "passed":
+            return
+        outcome = report.outcome
+        if report.when != "call" and outcome == "failed":
+            outcome = "error"
+        if hasattr(report, "wasxfail"):
+            outcome = "xfailed" if report.skipped else "xpassed"
+        self._write({
+            "event": "test",
+            "nodeid": report.nodeid,
+            "when": report.when,
+            "outcome": outcome,
+            "duration": round(report.duration, 6),
+        })
+
+    def pytest_collectreport(self, report) -> None:
+        if report.failed:
+            self._write({"event": "collect_error", "nodeid": report.nodeid})
+
+    def pytest_sessionfinish(self, session, exitstatus) -> None:
+        self._write({
+            "event": "summary",
+            "exitstatus": int(exitstatus),
+            "collected": session.testscollected,
+            "duration": round(time.monotonic() - self.started, 6),
+        })
+        self.file.close()
+
+
+@dataclass
+class TestRunResults:
+    """Outcomes read back from a results file."""
+
+    __test__ = False  # not a pytest test class
+
+    outcomes: Counter = field(default_factory=Counter)
+    durations: Dict[str, float] = field(default_factory=dict)
+    failures: List[str] = field(default_factory=list)
+    collect_errors: List[str] = field(default_factory=list)
+    # False when the run ended before writing its summary (timeout or crash)
+    complete: bool = False
+    exitstatus: Optional[int] = None
+    collected: int = 0
+    duration: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.outcomes.values())
+
+    def slowest(self, count: int = 5) -> List[Tuple[str, float]]:
+        return sorted(self.durations.items(), key=lambda item: -item[1])[:count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "complete": self.complete,
+            "exitstatus": self.exitstatus,
+            "collected": self.collected,
+            "outcomes": dict(self.outcomes),
+            "failures": self.failures,
+            "collect_errors": self.collect_errors,
+            "duration": self.duration,
+            "slowest": [{"nodeid": nodeid, "duration": seconds} for nodeid, seconds in self.slowest()],
+        }
+
+
+def read_results(path: Path) -> TestRunResults:
+    """Read a results file, tolerating a missing file and a truncated last line."""
+    results = TestRunResults()
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return results
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # the writer was killed mid-line
+        event = record.get("event")
+        if event == "test":
+            results.outcomes[record["outcome"]] += 1
+            if record["when"] == "call":
+                results.durations[record["nodeid"]] = record["duration"]
+            if record["outcome"] in ("failed", "error"):
+                results.failures.append(record["nodeid"])
+        elif event == "collect_error":
+            results.collect_errors.append(record["nodeid"])
+        elif event == "summary":
+            results.complete = True
+            results.exitstatus = record["exitstatus"]
+            results.collected = record["collected"]
+            results.duration = record["duration"]
+    return results
+
+
+def read_coverage_total(path: Path) -> Optional[float]:
+    """Total line coverage from a coverage.py JSON report, or ``None`` if unavailable."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    return data.get("totals", {}).get("percent_covered")
+
+
+def input_files(root: Path) -> List[str]:
+    """Relative paths of the files that can change a test outcome, sorted.
+
+    In a git checkout these are the tracked files plus untracked ones that are
+    not ignored; elsewhere every file under root. Paths inside ``SKIP_DIRS``
+    are left out either way.
+    """
+    root = Path(root)
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root,
+            capture_output=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        result = None
+    if result is not None and result.returncode == 0:
+        paths = set(os.fsdecode(path) for path in result.stdout.split(b"\0") if path)
+    else:
+        paths = set()
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                paths.add((Path(directory) / name).relative_to(root).as_posix())
+    return sorted(path for path in paths if SKIP_DIRS.isdisjoint(path.split("/")[:-1]))
+
+
+def inputs_digest(root: Path, extra: Iterable[str] = ()) -> str:
+    """Hash of every test input file under root plus the ``extra`` strings.
+
+    ``extra`` carries settings that change results without touching a file,
+    such as the interpreter version or whether coverage is collected.
+    """
+    root = Path(root)
+    digest = hashlib.sha1()
+    for item in extra:
+        digest.update(item.encode("utf-8") + b"\0")
+    for relative in input_files(root):
+        try:
+            content = (root / relative).read_bytes()
+        except OSError:
+            continue  # deleted but still tracked; leaving it out changes the digest
+        digest.update(relative.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha1(content).digest())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """The results file and coverage total of the last complete run, keyed by input digest."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.results_path = self.directory / "results.ndjson"
+        self.meta_path = self.directory / "meta.json"
+
+    def load(self, key: str) -> Optional[Tuple[TestRunResults, Optional[float]]]:
+        """Cached results and coverage for key, or ``None`` on a miss."""
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("key") != key:
+            return None
+        results = read_results(self.results_path)
+        if not results.complete:
+            return None
+        return results, meta.get("coverage")
+
+    def store(self, key: str, results_path: Path, coverage: Optional[float]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(results_path, self.results_path)
+        # Written last so a crash between the two files leaves a key mismatch, not stale results
+        self.meta_path.write_text(json.dumps({"key": key, "coverage": coverage}), encoding="utf-8")
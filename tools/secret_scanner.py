@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Hard-coded secret scanner shared by the audit tools and the pre-commit hook.
+
+All key patterns are compiled into one combined regular expression, and all
+placeholder exclusions into one more, so each file is scanned in a single
+pass. Files are scanned as bytes; large files are memory-mapped instead of
+read into memory.
+
+Scanned files: YAML (``*.yml``/``*.yaml``), Jinja templates (``*.j2``),
+inventory files and anything under ``group_vars``/``host_vars``.
+
+Besides the key patterns, an entropy detector looks for random-looking
+literals under any key. It reads at most ``ENTROPY_BYTE_BUDGET`` bytes per
+file, stops after ``ENTROPY_MAX_FINDINGS`` findings, and gives each finding
+a confidence score between 0 and 1.
+
+Usage:
+    python tools/secret_scanner.py              # scan the repository
+    python tools/secret_scanner.py FILE [...]   # scan the given files
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import mmap
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SCAN_SUFFIXES = {".yml", ".yaml", ".j2"}
+VARS_DIRS = {"group_vars", "host_vars"}
+INVENTORY_NAMES = {"hosts", "inventory"}
+SKIP_DIRS = {".git", "venv", ".venv", "node_modules", "__pycache__", ".cache", ".pytest_cache"}
+
+# Files at least this large are memory-mapped rather than read
+MMAP_THRESHOLD = 1 << 20
+
+# Minimum literal length per kind; shorter values are not reported
+MIN_LENGTHS: Dict[str, int] = {
+    "password": 8,
+    "api_key": 20,
+    "secret": 16,
+    "token": 20,
+}
+
+KIND_BY_KEYWORD = (
+    ("passw", "password"),
+    ("api", "api_key"),
+    ("secret", "secret"),
+    ("token", "token"),
+)
+
+SECRET_PATTERN = re.compile(
+    rb"(?P<pem>-----BEGIN (?:RSA |DSA |EC |OPENSSH |ENCRYPTED )?PRIVATE KEY-----)"
+    rb"|(?:^|(?<=[\s,{\"'-]))"
+    rb"(?P<key>(?:[A-Za-z0-9_.-]*[_.-])?(?:password|passwd|secret|token|api[_-]?key)"
+    rb"(?:[_.-][A-Za-z0-9_.-]*)?)"
+    rb"[\"']?[ \t]*[:=][ \t]*"
+    rb"(?P<value>\"[^\"\n]*\"|'[^'\n]*'|[^\s#,}\n]+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Placeholder words only count at the start or end of a value, so a real
+# value that merely contains "vault_" or "example" is still reported.
+# Templated values, variable references and Chinese instruction text are
+# never secrets.
+PLACEHOLDER_PATTERN = re.compile(
+    r"^(?:vault_|your_|example|placeholder|change|please|replace|secure_password|test|demo"
+    r"|on_create$|always$|\*+$|x{3,}$)"
+    r"|(?:change_?me|_here|placeholder|example|x{4,})$"
+    r"|\{\{|\{%|\$\{|^\$|lookup\(|^<[^>]*>$|^!vault|[\u4e00-\u9fff]",
+    re.IGNORECASE,
+)
+
+# SHOUTING_CASE values such as PLEASE_SET_ADMIN_PASSWORD are placeholders
+CONSTANT_PATTERN = re.compile(r"^[A-Z0-9_]+$")
+
+# snake_case identifiers naming a secret (``old_password``) are variable names
+IDENTIFIER_PATTERN = re.compile(r"^[a-z][a-z0-9]*_[a-z0-9_]*(?:passw|secret|token|key)[a-z0-9_]*$")
+
+# Keys that mention a secret but hold a path, a flag or a module option
+NON_SECRET_KEY_PATTERN = re.compile(
+    r"(?:_file|_path|_dir|_url|_length|_lock|_type|_mode|_policy|_enabled"
+    r"|_expire\w*|_hash\w*)$|^update_password$",
+    re.IGNORECASE,
+)
+
+
+# Entropy detector limits and scoring
+ENTROPY_BYTE_BUDGET = 256 * 1024
+ENTROPY_MAX_FINDINGS = 5
+ENTROPY_MIN_LENGTH = 20
+ENTROPY_MIN_CONFIDENCE = 0.65
+
+# Scalar values: the part after "key:" / "key=", or a list item
+SCALAR_PATTERN = re.compile(
+    rb"(?:(?P<key>[A-Za-z0-9_.-]+)[\"']?[ \t]*[:=]|^[ \t]*-)[ \t]*"
+    rb"(?P<value>\"[^\"\n]*\"|'[^'\n]*'|[^\s#\n][^#\n]*)",
+    re.MULTILINE,
+)
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9+/_.-]{%d,}={0,2}" % (ENTROPY_MIN_LENGTH - 1))
+HEX_PATTERN = re.compile(r"^[0-9a-fA-F]+$")
+# Dictionary-like runs (camelCase words); random strings rarely contain many
+WORD_PATTERN = re.compile(r"[A-Z]?[a-z]{3,}")
+SENSITIVE_KEY_PATTERN = re.compile(r"passw|secret|token|api[_-]?key|private|credential|auth", re.I)
+# Hashes and identifiers are random by design but not secret
+NON_SECRET_ENTROPY_KEY_PATTERN = re.compile(
+    r"checksum|sha\d*|md5|digest|hash|fingerprint|uuid|uid|(?:^|_)id$|gpg|pubkey|public",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class SecretFinding:
+    """One suspected hard-coded secret."""
+
+    path: str
+    line: int
+    kind: str
+    key: str
+    value: str
+    text: str
+    confidence: float = 1.0
+
+
+def is_scan_target(path: Path) -> bool:
+    """Return True for YAML, Jinja, inventory and group_vars/host_vars files."""
+    if path.suffix in SCAN_SUFFIXES:
+        return True
+    parts = set(path.parts[:-1])
+    if parts & VARS_DIRS:
+        return True
+    return path.name in INVENTORY_NAMES or (
+        "inventory" in parts and path.suffix in {"", ".ini", ".cfg"}
+    )
+
+
+def iter_scan_targets(root: Path) -> Iterator[Path]:
+    """Yield scan targets under root in a stable order, skipping tool directories."""
+    for path in sorted(root.rglob("*")):
+        if SKIP_DIRS.intersection(path.relative_to(root).parts[:-1]):
+            continue
+        if path.is_file() and is_scan_target(path.relative_to(root)):
+            yield path
+
+
+def _classify(key: str) -> str:
+    lowered = key.lower()
+    for keyword, kind in KIND_BY_KEYWORD:
+        if keyword in lowered:
+            return kind
+    return "secret"
+
+
+def _is_placeholder(value: str) -> bool:
+    return bool(
+        PLACEHOLDER_PATTERN.search(value)
+        or CONSTANT_PATTERN.match(value)
+        or IDENTIFIER_PATTERN.match(value)
+    )
+
+
+def shannon_entropy(token: str) -> float:
+    """Return the Shannon entropy of a string in bits per character."""
+    length = len(token)
+    return -sum(
+        count / length * math.log2(count / length) for count in Counter(token).values()
+    )
+
+
+def _random_entropy(length: int, alphabet: int) -> float:
+    """Approximate entropy of a random string of this length (Miller-Madow)."""
+    return max(1.0, math.log2(alphabet) - (alphabet - 1) / (2 * length * math.log(2)))
+
+
+def _mask(value: str) -> str:
+    return value[:4] + "…" if len(value) > 4 else "…"
+
+
+class EntropyDetector:
+    """Find random-looking literals in scalar values within a per-file byte budget."""
+
+    def __init__(
+        self,
+        byte_budget: int = ENTROPY_BYTE_BUDGET,
+        max_findings: int = ENTROPY_MAX_FINDINGS,
+        min_confidence: float = ENTROPY_MIN_CONFIDENCE,
+    ):
+        self.byte_budget = byte_budget
+        self.max_findings = max_findings
+        self.min_confidence = min_confidence
+        # Number of scans whose content went beyond the byte budget
+        self.truncated = 0
+
+    def confidence(self, token: str, key: str = "") -> float:
+        """Score how likely a token is a secret, from 0 to 1."""
+        if HEX_PATTERN.match(token):
+            if len(token) < 32:
+                return 0.0
+            alphabet = 16
+        else:
+            # Identifiers and paths: random base64 rarely has many separators
+            separators = sum(token.count(char) for char in "_-/.")
+            if separators > max(1, len(token) // 16):
+                return 0.0
+            if not (re.search(r"[0-9]", token) and re.search(r"[A-Za-z]", token)):
+                return 0.0
+            alphabet = 64
+
+        # 1.0 means as random as a random string of the same length
+        randomness = shannon_entropy(token) / _random_entropy(len(token), alphabet)
+        score = min(1.0, max(0.0, (randomness - 0.8) / 0.15)) * 0.6
+        words = sum(len(word) for word in WORD_PATTERN.findall(token)) / len(token)
+        score -= max(0.0, words - 0.5) * 0.5
+        if key and SENSITIVE_KEY_PATTERN.search(key):
+            score += 0.25
+        if len(token) >= 32:
+            score += 0.1
+        if re.search(r"[A-Z]", token) and re.search(r"[a-z]", token):
+            score += 0.05
+        return round(min(score, 1.0), 2)
+
+    def scan(self, data: Union[bytes, mmap.mmap], path: str = "", skip_lines: Iterable[int] = ()) -> Iterator[SecretFinding]:
+        """Yield findings from the first ``byte_budget`` bytes of data."""
+        window = data[: self.byte_budget]
+        if len(data) > self.byte_budget:
+            self.truncated += 1
+        skip = set(skip_lines)
+        found = 0
+        line = 1
+        position = 0
+        for match in SCALAR_PATTERN.finditer(window):
+            key = (match.group("key") or b"").decode("utf-8", "replace")
+            value = match.group("value").decode("utf-8", "replace").strip().strip("\"'")
+            if NON_SECRET_ENTROPY_KEY_PATTERN.search(key) or _is_placeholder(value):
+                continue
+            for token in TOKEN_PATTERN.findall(value):
+                confidence = self.confidence(token, key)
+                if confidence < self.min_confidence:
+                    continue
+                line += window[position:match.start()].count(b"\n")
+                position = match.start()
+                if line in skip:
+                    break
+                yield SecretFinding(
+                    path=path,
+                    line=line,
+                    kind="high_entropy",
+                    key=key,
+                    value=token,
+                    text=f"{key}: {_mask(token)}" if key else _mask(token),
+                    confidence=confidence,
+                )
+                found += 1
+                if found >= self.max_findings:
+                    return
+                break
+
+
+class SecretScanner:
+    """Scan text or files for hard-coded secrets with one combined matcher."""
+
+    def __init__(
+        self,
+        min_lengths: Optional[Dict[str, int]] = None,
+        entropy: Optional[EntropyDetector] = None,
+    ):
+        self.min_lengths = dict(MIN_LENGTHS, **(min_lengths or {}))
+        self.entropy = entropy
+
+    def scan_text(self, content: Union[str, bytes], path: str = "") -> List[SecretFinding]:
+        """Scan in-memory content."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        return list(self._scan(data, path))
+
+    def scan_file(self, path: Path) -> List[SecretFinding]:
+        """Scan one file, memory-mapping it when it is large."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            size = path.stat().st_size
+            if size == 0:
+                return []
+            if size < MMAP_THRESHOLD:
+                return list(self._scan(f.read(), str(path)))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return list(self._scan(mapped, str(path)))
+
+    def scan_paths(self, paths: Iterable[Path]) -> Iterator[SecretFinding]:
+        """Scan several files, skipping unreadable ones."""
+        for path in paths:
+            try:
+                yield from self.scan_file(path)
+            except OSError:
+                continue
+
+    def _scan(self, data: Union[bytes, mmap.mmap], path: str) -> Iterator[SecretFinding]:
+        reported = set()
+        for finding in self._scan_patterns(data, path):
+            reported.add(finding.line)
+            yield finding
+        if self.entropy is not None:
+            yield from self.entropy.scan(data, path, skip_lines=reported)
+
+    def _scan_patterns(self, data: Union[bytes, mmap.mmap], path: str) -> Iterator[SecretFinding]:
+        line = 1
+        position = 0
+        for match in SECRET_PATTERN.finditer(data):
+            finding = self._finding(match)
+            if finding is None:
+                continue
+            # Count newlines incrementally so the file is walked only once
+            line += data[position:match.start()].count(b"\n")
+            position = match.start()
+            kind, key, value = finding
+            yield SecretFinding(
+                path=path,
+                line=line,
+                kind=kind,
+                key=key,
+                value=value,
+                text=match.group(0).decode("utf-8", "replace"),
+            )
+
+    def _finding(self, match: "re.Match[bytes]") -> Optional[tuple]:
+        if match.group("pem"):
+            return "private_key", "", ""
+        key = match.group("key").decode("utf-8", "replace")
+        value = match.group("value").decode("utf-8", "replace").strip("\"'")
+        if NON_SECRET_KEY_PATTERN.search(key) or value.startswith(("/", "./", "~/")):
+            return None
+        kind = _classify(key)
+        if len(value) < self.min_lengths.get(kind, 8) or _is_placeholder(value):
+            return None
+        return kind, key, value
+
+
+DEFAULT_SCANNER = SecretScanner(entropy=EntropyDetector())
+
+
+def main() -> int:
+    """Scan the given files (or the repository) and exit 1 if secrets are found."""
+    parser = argparse.ArgumentParser(description="Scan for hard-coded secrets")
+    parser.add_argument("paths", nargs="*", type=Path, help="Files to scan (default: repository)")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=ROOT,
+        help=f"Repository root when no paths are given (default: {ROOT})",
+    )
+    parser.add_argument(
+        "--max-per-file",
+        type=int,
+        default=3,
+        help="Findings printed per file (default: 3)",
+    )
+    args = parser.parse_args()
+
+    if args.paths:
+        paths = [path for path in args.paths if path.is_file() and is_scan_target(path)]
+    else:
+        paths = list(iter_scan_targets(args.root))
+
+    printed: Dict[str, int] = {}
+    total = 0
+    for finding in DEFAULT_SCANNER.scan_paths(paths):
+        total += 1
+        if printed.get(finding.path, 0) < args.max_per_file:
+            printed[finding.path] = printed.get(finding.path, 0) + 1
+            confidence = f" ({finding.confidence:.2f})" if finding.kind == "high_entropy" else ""
+            print(f"{finding.path}:{finding.line}: [{finding.kind}]{confidence} {finding.text}")
+
+    if total:
+        print(f"Found {total} suspected hard-coded secret(s) in {len(printed)} file(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())